@@ -1,46 +1,146 @@
 import agentops
-from openai import OpenAI
 import os
+import time
 import traceback
-from dotenv import load_dotenv
-from pathlib import Path
+from contextlib import aclosing
+from features import format_summary, summarize
+from llm_client import chat_completion, stream_completion
+from metrics import ERRORS, SKIPPED, TIME_TO_VERDICT
+from rolling_stats import RollingStats
+from prescreen import PreScreenGate
+from telemetry import emit
+from ticks import as_tick
+from verdict_cache import VerdictCache
 
-# Load environment variables from .env
-env_path = Path(__file__).parent / '.env'
-load_dotenv(dotenv_path=env_path)
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+NO_ISSUE = "No issue"
+# Quotes, whitespace and Markdown a reply may open with before the verdict, e.g. '"No issue."' or "**No issue.**"
+VERDICT_LEAD = " \t\r\n\"'`*_>#"
+# Stream completions and stop as soon as the verdict is known
+STREAMING = os.getenv("RISK_STREAMING", "true").lower() not in ("0", "false", "no")
+PARTIAL_BREAKS = ".,;:!?\n"  # partial explanations are emitted at clause boundaries
+# Describe the price history with fixed-size features instead of listing every price
+PROMPT_SUMMARY = os.getenv("RISK_PROMPT_SUMMARY", "true").lower() not in ("0", "false", "no")
 
 class RiskAgent:
-    def __init__(self):
+    def __init__(self, gate=None, cache=None, streaming=None, summarize=None):
         # one trace per agent lifetime
         self.trace = agentops.start_trace(tags=["realtime", "finance"])
         print("AgentOps trace started")
+        # local pre-screen that settles clearly normal ticks without the LLM
+        self.gate = gate if gate is not None else PreScreenGate.from_env()
+        # verdicts reused across ticks with near-identical features
+        self.cache = cache if cache is not None else VerdictCache.from_env()
+        self.streaming = STREAMING if streaming is None else streaming
+        self.summarize = PROMPT_SUMMARY if summarize is None else summarize
+        self.early_stops = 0
+
+    def _history_context(self, history):
+        """Fixed-size feature summary of the history, or the raw price list."""
+        if self.summarize:
+            return format_summary(summarize(history)).replace("\n", "\n        ")
+        return f"Last {len(history)} prices: {', '.join(f'${p:.2f}' for p in history)}"
+
+    @staticmethod
+    def _verdict(text):
+        """'normal', 'anomaly', or None while streamed text could still become 'No issue.'"""
+        if NO_ISSUE in text:
+            return "normal"
+        head = text.lstrip(VERDICT_LEAD)
+        if NO_ISSUE.startswith(head[:len(NO_ISSUE)]):
+            return None
+        return "anomaly"
+
+    def _cache_verdict(self, symbol, key, result, latency):
+        # "No issue." holds for any symbol in the same buckets; an anomaly explanation names this one
+        if NO_ISSUE in result:
+            self.cache.put(symbol, key, f"{NO_ISSUE}.", latency, shared=True)
+        else:
+            self.cache.put(symbol, key, result, latency)
+
+    async def _stream_verdict(self, symbol, prompt, on_partial=None):
+        """
+        Stream the completion and return (text, seconds until the verdict was known).
+
+        A 'No issue.' verdict closes the stream immediately. Anomaly
+        explanations stream to the end, passing the text so far to
+        ``on_partial(symbol, text)`` once the verdict is known and then at
+        each clause boundary.
+        """
+        started = time.monotonic()
+        text = ""
+        verdict_latency = None
+        stream = stream_completion(
+            agent="RiskAgent",
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=150,
+        )
+        async with aclosing(stream):
+            async for delta in stream:
+                text += delta
+                verdict = self._verdict(text)
+                if verdict is None:
+                    continue
+                first = verdict_latency is None
+                if first:
+                    verdict_latency = time.monotonic() - started
+                if verdict == "normal":
+                    self.early_stops += 1
+                    break
+                if on_partial and (first or any(c in delta for c in PARTIAL_BREAKS)):
+                    on_partial(symbol, text.strip())
+        if verdict_latency is None:
+            verdict_latency = time.monotonic() - started
+        return text.strip(), verdict_latency
 
-    async def process(self, data):
+    async def process(self, data, on_partial=None):
         """
         Evaluate incoming stock data and detect anomalies.
+
+        In streaming mode ``on_partial(symbol, text)`` receives the anomaly
+        explanation while it is still being generated.
         """
-        # Calculate basic statistics from history
-        history = data['price_history'][:-1]  # All except current price
-        current_price = data['price']
-        avg_price = sum(history) / len(history)
-        price_std = (sum((p - avg_price) ** 2 for p in history) / len(history)) ** 0.5
+        # Rolling statistics of the history before this tick, maintained
+        # incrementally by the feed; fall back to computing them if absent
+        tick = as_tick(data)
+        history = tick.history[:-1]  # All except current price
+        current_price = tick.price
+        stats = tick.stats or RollingStats.from_values(history).snapshot()
+        avg_price = stats['mean']
+        price_std = stats['std']
         
         # Calculate percentage change from previous price
-        prev_price = history[-1]
-        pct_change = ((current_price - prev_price) / prev_price) * 100
+        prev_price = stats['last']
+        features = PreScreenGate.features(current_price, prev_price, avg_price, price_std)
+        pct_change = features['pct_change']
+
+        escalate = self.gate.should_escalate(features)
+        self.gate.record(escalate, tick.injected_anomaly)
+        if not escalate:
+            SKIPPED.inc(agent="RiskAgent", reason="prescreen")
+            emit("Stock Data Analysis", {
+                "symbol": tick.symbol,
+                "current_price": current_price,
+                "pct_change": pct_change,
+                "z_score": features['z_score'],
+                "vol_ratio": features['vol_ratio'],
+                "analysis": "No issue.",
+                "prescreened": True
+            })
+            return None
 
         prompt = f"""
-        Analyze this stock tick for {data['symbol']}:
+        Analyze this stock tick for {tick.symbol}:
         - Current Price: ${current_price:.2f}
         - Previous Price: ${prev_price:.2f}
         - Percentage Change: {pct_change:.2f}%
-        - Average Price (last {len(history)} ticks): ${avg_price:.2f}
+        - Average Price (last {stats['count']} ticks): ${avg_price:.2f}
         - Price Standard Deviation: ${price_std:.2f}
+        - EWMA Price: ${stats['ewma']:.2f}
+        - Range (last {stats['count']} ticks): ${stats['min']:.2f} - ${stats['max']:.2f}
 
         Historical context:
-        Last {len(history)} prices: {', '.join(f'${p:.2f}' for p in history)}
+        {self._history_context(history)}
 
         Detect if there's any anomaly (sudden drop/spike) based on:
         1. Deviation from moving average
@@ -51,27 +151,46 @@ class RiskAgent:
         If there is an anomaly, explain the specific pattern detected.
         """
 
+        volatility_pct = price_std / avg_price * 100 if avg_price else 0.0
+        cache_key = self.cache.key(pct_change, features['z_score'], volatility_pct)
+
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=150,
-            )
-            result = response.choices[0].message.content.strip()
+            result = self.cache.get(tick.symbol, cache_key)
+            cached = result is not None
+            if cached:
+                SKIPPED.inc(agent="RiskAgent", reason="cache")
+            elif self.streaming:
+                result, latency = await self._stream_verdict(tick.symbol, prompt, on_partial)
+                TIME_TO_VERDICT.observe(latency, agent="RiskAgent", mode="stream")
+                self._cache_verdict(tick.symbol, cache_key, result, latency)
+            else:
+                started = time.monotonic()
+                response = await chat_completion(
+                    agent="RiskAgent",
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=150,
+                )
+                result = response.choices[0].message.content.strip()
+                latency = time.monotonic() - started
+                TIME_TO_VERDICT.observe(latency, agent="RiskAgent", mode="full")
+                self._cache_verdict(tick.symbol, cache_key, result, latency)
 
             # Log both the analysis and the data
-            agentops.tool(name="Stock Data Analysis")({
-                "symbol": data['symbol'],
+            emit("Stock Data Analysis", {
+                "symbol": tick.symbol,
                 "current_price": current_price,
                 "pct_change": pct_change,
                 "avg_price": avg_price,
                 "price_std": price_std,
-                "analysis": result
+                "analysis": result,
+                "cached": cached
             })
 
-            if "No issue" not in result:
-                return f"{data['symbol']} Risk Alert → {result}"
+            if NO_ISSUE not in result:
+                return f"{tick.symbol} Risk Alert → {result}"
 
         except Exception as e:
-            agentops.tool(name="Processing Error")({"error": str(e)})
+            ERRORS.inc(component="RiskAgent")
+            emit("Processing Error", {"error": str(e)})
             return None
@@ -1,9 +1,15 @@
 import asyncio
 import os
 import sys
+import time
 from pathlib import Path
 from dotenv import load_dotenv
-from data_feed import stream_stock_data
+from data_feed import StockDataGenerator, STATS_WINDOW
+from history_snapshot import HISTORY_SNAPSHOT, HistorySnapshotter
+from rolling_stats import RollingStatsStore
+from tick_log import TickLogWriter, record_ticks
+from telemetry import emit, telemetry
+from metrics import ALERTS, QUEUE_DEPTH, TICK_TO_ALERT, TICKS, start_metrics_server
 from agent_logic import RiskAgent
 import agentops
 
@@ -27,15 +33,72 @@ if missing_vars:
 # Initialize AgentOps with API key from .env
 agentops.init(api_key=os.getenv("AGENTOPS_API_KEY"))
 
+# Ticks evaluated concurrently; LLM_CONCURRENCY separately bounds API calls
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "16"))
+# Optional path prefix of a tick log to record this session for replay.py
+TICK_LOG = os.getenv("TICK_LOG")
+# Port of the Prometheus /metrics endpoint; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+# Interface it listens on; set 0.0.0.0 to let a remote Prometheus scrape it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+def print_partial(symbol, text):
+    """Show an anomaly explanation while it is still streaming in."""
+    print(f"{symbol} Risk Alert (streaming) … {text}")
+
+async def handle_tick(agent, data):
+    started = time.monotonic()
+    response = await agent.process(data, on_partial=print_partial)
+    if response:
+        ALERTS.inc()
+        TICK_TO_ALERT.observe(time.monotonic() - started)
+        emit("Risk Assessment", {"input": data, "output": response})
+        print("*" * 50)
+        print(f"{response}")
+
 async def main():
     print("AgentOps Realtime POC Started...")
+    telemetry.start()
+    metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+    if metrics_runner:
+        print(f"Metrics at http://localhost:{METRICS_PORT}/metrics")
     agent = RiskAgent()
-    async for data in stream_stock_data():
-        response = await agent.process(data)
-        if response:
-            agentops.tool(name="Risk Assessment")({"input": data, "output": response})
-            print("*" * 50)
-            print(f"{response}")
+    # Per-symbol rolling statistics, updated by the feed and read by the agent
+    stats = RollingStatsStore(window=STATS_WINDOW)
+    generator = StockDataGenerator(stats)
+    # Warm start: continue from the last session's price history and rolling statistics
+    snapshotter = HistorySnapshotter(generator.history, stats=stats) if HISTORY_SNAPSHOT else None
+    if snapshotter:
+        snapshotter.restore()
+        snapshotter.start()
+    feed = generator.stream_stock_data()
+    if TICK_LOG:
+        feed = record_ticks(feed, TickLogWriter(TICK_LOG))
+    pending = set()
+    QUEUE_DEPTH.track(lambda: len(pending), queue="in_flight")
+    QUEUE_DEPTH.track(lambda: len(telemetry.buffer), queue="telemetry")
+    try:
+        async for data in feed:
+            TICKS.inc()
+            task = asyncio.create_task(handle_tick(agent, data))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            while len(pending) >= MAX_IN_FLIGHT:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        report = agent.gate.report()
+        emit("PreScreen Summary", report)
+        print(f"Pre-screen: {report}")
+        print(f"Verdict cache: {agent.cache.stats()}")
+        if snapshotter:
+            await snapshotter.stop()
+            print(f"History snapshot: {snapshotter.stats()}")
+        await telemetry.stop()
+        print(f"Telemetry: {telemetry.stats()}")
+        if metrics_runner:
+            await metrics_runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,50 @@
+"""
+Tick throughput of RiskAgent as LLM concurrency grows.
+
+Runs against the local mock completion server, so no API key is needed:
+
+    python bench_llm_concurrency.py --ticks 64 --delay 0.2
+"""
+import argparse
+import asyncio
+import time
+from openai import AsyncOpenAI
+import llm_client
+from agent_logic import RiskAgent
+from data_feed import StockDataGenerator
+from mock_llm_server import start_mock_server
+from prescreen import PreScreenGate
+from verdict_cache import VerdictCache
+
+
+async def run(agent, ticks, concurrency):
+    llm_client.configure(concurrency=concurrency)
+    generator = StockDataGenerator()
+    batch = [generator.next_tick() for _ in range(ticks)]
+    start = time.perf_counter()
+    await asyncio.gather(*(agent.process(data) for data in batch))
+    return ticks / (time.perf_counter() - start)
+
+
+async def main(ticks, delay, levels):
+    runner, base_url = await start_mock_server(delay=delay)
+    try:
+        llm_client.configure(client=AsyncOpenAI(api_key="mock", base_url=base_url))
+        # Send every tick to the LLM so the benchmark measures the call path
+        agent = RiskAgent(gate=PreScreenGate(enabled=False), cache=VerdictCache(enabled=False))
+        print(f"{ticks} ticks, mock LLM latency {delay * 1000:.0f} ms")
+        print(f"{'concurrency':>12} {'ticks/sec':>10}")
+        for concurrency in levels:
+            rate = await run(agent, ticks, concurrency)
+            print(f"{concurrency:>12} {rate:>10.1f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=64)
+    parser.add_argument("--delay", type=float, default=0.2, help="mock completion latency (s)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+    asyncio.run(main(args.ticks, args.delay, args.levels))
@@ -0,0 +1,109 @@
+"""
+RiskAgent prompt size and latency: raw price list vs. feature summary.
+
+For each history window, the same ticks go through RiskAgent with the
+history listed price by price and summarized by ``features.py``, against
+the local mock completion server. The server charges a prefill delay per
+prompt token, the way a real model's time to first token grows with the
+prompt (tokens are counted with tiktoken if installed, else ~4 chars each):
+
+    python bench_prompt.py --windows 10 60 240 1000 --ticks 200 --prompt-token-delay 0.0002
+"""
+import argparse
+import asyncio
+import time
+from openai import AsyncOpenAI
+import llm_client
+from agent_logic import RiskAgent
+from bench_streaming import chatty_responder
+from data_feed import StockDataGenerator
+from mock_llm_server import start_mock_server
+from prescreen import PreScreenGate
+from replay import percentile
+from rolling_stats import RollingStatsStore
+from ticks import HistoryStore, Tick
+from verdict_cache import VerdictCache
+
+
+def make_ticks(prices, window, n):
+    """The last ``n`` ticks of ``prices`` carrying ``window`` prices of history before them."""
+    stats = RollingStatsStore()
+    history = HistoryStore(window + 1)
+    ticks = []
+    for symbol, price in prices:
+        prior = stats[symbol].snapshot()
+        stats.push(symbol, price)
+        view = history.push(symbol, price).view()
+        if len(view) == window + 1:
+            ticks.append(Tick(symbol, price, view, stats=prior))
+    return ticks[-n:]
+
+
+def context_cost(agent, ticks):
+    """Mean seconds to build the history part of the prompt."""
+    started = time.perf_counter()
+    for tick in ticks:
+        agent._history_context(tick.history[:-1])
+    return (time.perf_counter() - started) / len(ticks)
+
+
+async def run(agent, ticks, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(tick):
+        async with semaphore:
+            started = time.monotonic()
+            await agent.process(tick)
+            return time.monotonic() - started
+
+    return await asyncio.gather(*(one(tick) for tick in ticks))
+
+
+async def main(args):
+    prompt_tokens = []
+
+    def reply(prompt):
+        prompt_tokens.append(llm_client.count_tokens(prompt))
+        return chatty_responder(prompt)
+
+    runner, base_url = await start_mock_server(delay=args.delay, reply=reply,
+                                               prompt_token_delay=args.prompt_token_delay)
+    try:
+        llm_client.configure(client=AsyncOpenAI(api_key="mock", base_url=base_url),
+                             concurrency=args.concurrency)
+        generator = StockDataGenerator(seed=args.seed)
+        needed = (max(args.windows) + 1) * len(generator.symbols) * 2 + args.ticks * 2
+        prices = []
+        for _ in range(needed):
+            symbol = generator.rng.choice(generator.symbols)
+            prices.append((symbol, generator.get_next_price(symbol)))
+
+        counter = "tiktoken" if llm_client.tiktoken else "chars/4"
+        print(f"{args.ticks} ticks per run, mock latency {args.delay * 1000:.0f} ms + "
+              f"{args.prompt_token_delay * 1e6:.0f} us/prompt token, tokens by {counter}")
+        print(f"{'window':>6} {'prompt':>8} {'tokens':>7} {'context us':>11} {'p50 ms':>8} {'p99 ms':>8}")
+        for window in args.windows:
+            ticks = make_ticks(prices, window, args.ticks)
+            for mode, summarize in (("list", False), ("summary", True)):
+                # Send every tick to the LLM so both modes see the same calls
+                agent = RiskAgent(gate=PreScreenGate(enabled=False), cache=VerdictCache(enabled=False),
+                                  streaming=False, summarize=summarize)
+                prompt_tokens.clear()
+                latencies = await run(agent, ticks, args.concurrency)
+                tokens = sum(prompt_tokens) / len(prompt_tokens)
+                print(f"{window:>6} {mode:>8} {tokens:>7.0f} {context_cost(agent, ticks) * 1e6:>11.1f} "
+                      f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 60, 240, 1000])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.3, help="mock base latency (s)")
+    parser.add_argument("--prompt-token-delay", type=float, default=0.0002,
+                        help="mock prefill time per prompt token (s)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""
+Time-to-verdict of RiskAgent with streaming early termination vs. full completions.
+
+Runs against the local mock completion server, which generates replies word
+by word like a real model (normal verdicts are "No issue." followed by a
+short justification, as chat models tend to add):
+
+    python bench_streaming.py --ticks 200 --delay 0.3 --token-delay 0.02
+"""
+import argparse
+import asyncio
+import time
+from openai import AsyncOpenAI
+import llm_client
+from agent_logic import RiskAgent
+from data_feed import StockDataGenerator
+from mock_llm import risk_responder
+from mock_llm_server import start_mock_server
+from prescreen import PreScreenGate
+from replay import percentile
+from verdict_cache import VerdictCache
+
+
+def chatty_responder(prompt):
+    reply = risk_responder([{"role": "user", "content": prompt}])
+    if reply == "No issue.":
+        return ("No issue. The move is within the recent volatility range and the price "
+                "stays close to its moving average, so no anomaly is indicated.")
+    return (f"{reply} The move is well outside the recent volatility range and far from "
+            "the moving average, which points to a sudden repricing worth reviewing.")
+
+
+async def run(agent, batch):
+    """Process ``batch`` concurrently; returns [(alerted, time_to_verdict, total_time)]."""
+    async def one(data):
+        started = time.monotonic()
+        first_partial = []
+
+        def on_partial(symbol, text):
+            if not first_partial:
+                first_partial.append(time.monotonic() - started)
+
+        response = await agent.process(data, on_partial=on_partial)
+        total = time.monotonic() - started
+        return response is not None, first_partial[0] if first_partial else total, total
+
+    return await asyncio.gather(*(one(data) for data in batch))
+
+
+def summarize(mode, results):
+    for alerted, label in ((False, "normal"), (True, "alert")):
+        verdicts = [r[1] for r in results if r[0] == alerted]
+        totals = [r[2] for r in results if r[0] == alerted]
+        if not verdicts:
+            continue
+        print(f"{mode:>8} {label:>7} {len(verdicts):>6} {percentile(verdicts, 50) * 1000:>10.0f}"
+              f" {percentile(verdicts, 99) * 1000:>10.0f} {sum(totals) / len(totals) * 1000:>11.0f}")
+
+
+async def main(ticks, delay, token_delay, seed):
+    runner, base_url = await start_mock_server(delay=delay, reply=chatty_responder,
+                                               token_delay=token_delay)
+    try:
+        llm_client.configure(client=AsyncOpenAI(api_key="mock", base_url=base_url),
+                             concurrency=ticks)
+        generator = StockDataGenerator(seed=seed)
+        batch = [generator.next_tick() for _ in range(ticks)]
+        print(f"{ticks} ticks, mock latency {delay * 1000:.0f} ms + {token_delay * 1000:.0f} ms/word")
+        print(f"{'mode':>8} {'verdict':>7} {'ticks':>6} {'p50 ms':>10} {'p99 ms':>10} {'mean total':>11}")
+        for mode, streaming in (("full", False), ("stream", True)):
+            # Send every tick to the LLM so both modes see the same calls
+            agent = RiskAgent(gate=PreScreenGate(enabled=False), cache=VerdictCache(enabled=False),
+                              streaming=streaming)
+            summarize(mode, await run(agent, batch))
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.3, help="mock time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="mock time per word (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main(args.ticks, args.delay, args.token_delay, args.seed))
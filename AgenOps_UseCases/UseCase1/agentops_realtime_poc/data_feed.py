@@ -1,53 +1,82 @@
 import asyncio
 import random
 import datetime
-from collections import defaultdict, deque
+import os
+import time
+from metrics import FEED_LATENCY
+from rolling_stats import RollingStatsStore
+from ticks import HistoryStore, Tick
 
 STOCKS = ["AAPL", "GOOG", "TSLA", "AMZN", "META"]
-MAX_HISTORY = 10  # Keep last 10 data points for each stock
+# Number of recent prices included with each tick; RiskAgent summarizes them
+# into fixed-size features, so a longer window does not lengthen its prompt
+MAX_HISTORY = int(os.getenv("PRICE_HISTORY", "60"))
+STATS_WINDOW = 1000  # Ticks covered by the rolling statistics
 
 class StockDataGenerator:
-    def __init__(self):
-        self.price_history = defaultdict(lambda: deque(maxlen=MAX_HISTORY))
+    def __init__(self, stats=None, seed=None, symbols=None):
+        # Own RNG so a seeded generator is reproducible
+        self.rng = random.Random(seed)
+        self.symbols = list(symbols) if symbols is not None else STOCKS
+        self.stats = stats if stats is not None else RollingStatsStore(window=STATS_WINDOW)
+        # Recent prices handed to each tick as a zero-copy view
+        self.history = HistoryStore(MAX_HISTORY)
+        # Whether the latest generated tick per symbol was an injected anomaly
+        self.injected_anomaly = {}
         # Initialize with some historical data
-        for symbol in STOCKS:
-            base_price = random.uniform(100, 500)
+        for symbol in self.symbols:
+            base_price = self.rng.uniform(100, 500)
             for _ in range(MAX_HISTORY):
                 # Add some random variation to create history
-                price = round(base_price * (1 + random.uniform(-0.02, 0.02)), 2)
-                self.price_history[symbol].append(price)
+                price = round(base_price * (1 + self.rng.uniform(-0.02, 0.02)), 2)
+                self.stats.push(symbol, price)
+                self.history.push(symbol, price)
 
     def get_next_price(self, symbol, allow_anomaly=True):
         """Generate next price with possible anomalies"""
-        last_price = self.price_history[symbol][-1]
-        if allow_anomaly and random.random() < 0.1:  # 10% chance of anomaly
+        last_price = self.stats[symbol].last
+        anomaly = allow_anomaly and self.rng.random() < 0.1  # 10% chance of anomaly
+        self.injected_anomaly[symbol] = anomaly
+        if anomaly:
             # Generate significant price movement (±5-15%)
-            change = random.uniform(0.05, 0.15) * (-1 if random.random() < 0.5 else 1)
+            change = self.rng.uniform(0.05, 0.15) * (-1 if self.rng.random() < 0.5 else 1)
             new_price = round(last_price * (1 + change), 2)
         else:
             # Normal price movement (±0.5-2%)
-            change = random.uniform(0.005, 0.02) * (-1 if random.random() < 0.5 else 1)
+            change = self.rng.uniform(0.005, 0.02) * (-1 if self.rng.random() < 0.5 else 1)
             new_price = round(last_price * (1 + change), 2)
         
-        self.price_history[symbol].append(new_price)
+        self.stats.push(symbol, new_price)
+        self.history.push(symbol, new_price)
         return new_price
 
-    async def stream_stock_data(self):
+    def next_tick(self, symbol=None):
+        """Generate the next tick for ``symbol`` (random if not given)."""
+        symbol = symbol or self.rng.choice(self.symbols)
+        stats = self.stats[symbol]
+        # Statistics of the history *before* this tick, for the agent
+        prior = stats.snapshot()
+        price = self.get_next_price(symbol)
+        return Tick(
+            symbol,
+            price,
+            self.history[symbol].view(),
+            timestamp=datetime.datetime.now().isoformat(),
+            stats=prior,
+            injected_anomaly=self.injected_anomaly[symbol],
+        )
+
+    async def stream_stock_data(self, interval=2):
         """Simulated live stock feed with price history."""
         while True:
-            symbol = random.choice(STOCKS)
-            price = self.get_next_price(symbol)
-            data = {
-                "symbol": symbol,
-                "price": price,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "price_history": list(self.price_history[symbol])
-            }
-            yield data
-            await asyncio.sleep(2)
+            started = time.perf_counter()
+            tick = self.next_tick()
+            FEED_LATENCY.observe(time.perf_counter() - started, source="simulated")
+            yield tick
+            await asyncio.sleep(interval)
 
-async def stream_stock_data():
+async def stream_stock_data(stats=None, seed=None, symbols=None, interval=2):
     """Entry point for stock data streaming"""
-    generator = StockDataGenerator()
-    async for data in generator.stream_stock_data():
+    generator = StockDataGenerator(stats, seed, symbols)
+    async for data in generator.stream_stock_data(interval):
         yield data
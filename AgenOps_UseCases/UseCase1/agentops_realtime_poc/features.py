@@ -0,0 +1,64 @@
+"""
+Fixed-size feature summary of a price history for LLM prompts.
+
+Listing every historical price makes the prompt grow with the window.
+``summarize`` compresses any window into the same handful of numbers:
+an OHLC bar per timeframe, EWMA volatility of tick returns, the drawdown
+from the window high and the last few returns, all computed with NumPy
+directly on the history buffer (no copy of the prices).
+"""
+import os
+import numpy as np
+
+TIMEFRAMES = (5, 20, 60)  # ticks per OHLC bar; the whole window gets a bar too
+LAST_K = 5  # most recent tick returns listed individually
+EWMA_LAMBDA = float(os.getenv("FEATURES_EWMA_LAMBDA", "0.94"))  # RiskMetrics decay
+
+
+def summarize(prices, timeframes=TIMEFRAMES, last_k=LAST_K, ewma_lambda=EWMA_LAMBDA):
+    """Feature summary of ``prices`` (oldest first; any float sequence or buffer)."""
+    p = np.asarray(prices, dtype=float)
+    n = len(p)
+    if n == 0:
+        return {"ticks": 0, "bars": [], "ewma_vol": 0.0, "drawdown": 0.0,
+                "max_drawdown": 0.0, "returns": []}
+
+    bars = []
+    for size in sorted({t for t in timeframes if t < n} | {n}):
+        window = p[-size:]
+        bars.append((size, window[0], window.max(), window.min(), window[-1]))
+
+    returns = np.diff(p) / p[:-1] * 100
+    if len(returns):
+        weights = ewma_lambda ** np.arange(len(returns) - 1, -1, -1)
+        ewma_vol = float(np.sqrt(np.dot(weights, returns ** 2) / weights.sum()))
+    else:
+        ewma_vol = 0.0
+
+    peak = np.maximum.accumulate(p)
+    drawdown = (p - peak) / peak * 100
+
+    return {
+        "ticks": n,
+        "bars": bars,
+        "ewma_vol": ewma_vol,
+        "drawdown": float(drawdown[-1]),
+        "max_drawdown": float(drawdown.min()),
+        "returns": returns[-last_k:].tolist(),
+    }
+
+
+def format_summary(summary):
+    """Prompt text for a ``summarize`` result; its length does not depend on the window."""
+    lines = [f"Window: last {summary['ticks']} ticks"]
+    for size, open_, high, low, close in summary["bars"]:
+        change = (close - open_) / open_ * 100 if open_ else 0.0
+        lines.append(f"OHLC last {size} ticks: O ${open_:.2f} H ${high:.2f} L ${low:.2f} "
+                     f"C ${close:.2f} ({change:+.2f}%)")
+    lines.append(f"EWMA volatility: {summary['ewma_vol']:.2f}% per tick")
+    lines.append(f"Drawdown from window high: {summary['drawdown']:.2f}% "
+                 f"(max {summary['max_drawdown']:.2f}%)")
+    if summary["returns"]:
+        lines.append(f"Last {len(summary['returns'])} tick returns: "
+                     + ", ".join(f"{r:+.2f}%" for r in summary["returns"]))
+    return "\n".join(lines)
@@ -0,0 +1,164 @@
+"""
+Warm-start snapshots of per-symbol price history.
+
+A restarted monitor would otherwise start every symbol from freshly
+randomized history. ``HistorySnapshotter`` periodically writes the
+``StockDataGenerator.history`` store to a small binary file and restores it
+at startup, unless the snapshot is older than ``max_age``. The feed's
+``RollingStatsStore`` is rebuilt from the restored prices, so the agent's
+statistics and the next generated price continue from the last session.
+
+File layout (native byte order; the file is only read back on this host):
+
+    header:     magic b"HSNP", version u16, capacity u32, symbols u32, saved_at f64
+    per symbol: name (32 bytes, NUL padded), count u32, ``capacity`` f64 prices
+                (oldest first, zero padded)
+
+Snapshots are written through a memory map of a temporary file that then
+replaces the previous snapshot atomically, so a crash mid-write never
+leaves a torn file; restores read the file through a read-only memory map.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+
+logger = logging.getLogger('HistorySnapshot')
+
+# Path of the snapshot file; unset disables snapshots
+HISTORY_SNAPSHOT = os.getenv("HISTORY_SNAPSHOT")
+HISTORY_SNAPSHOT_INTERVAL = float(os.getenv("HISTORY_SNAPSHOT_INTERVAL", "30"))  # seconds
+HISTORY_MAX_AGE = float(os.getenv("HISTORY_MAX_AGE", "900"))  # older snapshots are not restored
+
+MAGIC = b"HSNP"
+VERSION = 1
+HEADER = struct.Struct("=4sHIId")
+RECORD = struct.Struct("=32sI")
+PRICE_SIZE = array('d').itemsize
+
+
+def save_snapshot(store, path, now=None):
+    """Write every non-empty buffer of ``store`` to ``path``; returns the number of symbols."""
+    symbols = [symbol for symbol in store if len(store[symbol])]
+    record_size = RECORD.size + PRICE_SIZE * store.capacity
+    size = HEADER.size + len(symbols) * record_size
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w+b") as f:
+        f.truncate(size)
+        with mmap.mmap(f.fileno(), size) as mm:
+            HEADER.pack_into(mm, 0, MAGIC, VERSION, store.capacity, len(symbols),
+                             now if now is not None else time.time())
+            offset = HEADER.size
+            for symbol in symbols:
+                name = symbol.encode()
+                if len(name) > RECORD.size - 4:
+                    raise ValueError(f"Symbol {symbol!r} is too long for a history snapshot")
+                prices = store[symbol].view()
+                RECORD.pack_into(mm, offset, name, len(prices))
+                start = offset + RECORD.size
+                mm[start:start + PRICE_SIZE * len(prices)] = prices.cast('B')
+                offset += record_size
+            mm.flush()
+    os.replace(tmp_path, path)
+    return len(symbols)
+
+
+def load_snapshot(store, path, max_age=HISTORY_MAX_AGE, now=None):
+    """
+    Restore the buffers saved in ``path`` into ``store``, replacing what it
+    holds for those symbols. Returns the number of symbols restored: 0 if
+    the file is missing, unreadable or older than ``max_age`` seconds.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, capacity, count, saved_at = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != VERSION:
+                logger.warning(f"Ignoring history snapshot {path}: unknown format")
+                return 0
+            age = (now if now is not None else time.time()) - saved_at
+            if age > max_age:
+                logger.info(f"Ignoring history snapshot {path}: {age:.0f}s old (max {max_age:.0f}s)")
+                return 0
+            record_size = RECORD.size + PRICE_SIZE * capacity
+            for i in range(count):
+                offset = HEADER.size + i * record_size
+                name, length = RECORD.unpack_from(mm, offset)
+                start = offset + RECORD.size
+                prices = array('d')
+                prices.frombytes(mm[start:start + PRICE_SIZE * length])
+                store.load(name.rstrip(b"\0").decode(), prices)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Ignoring history snapshot {path}: {e}")
+        return 0
+    logger.info(f"Restored price history for {count} symbols from {path} ({age:.0f}s old)")
+    return count
+
+
+class HistorySnapshotter:
+    """
+    Restores ``store`` from ``path`` at startup and saves it every
+    ``interval`` seconds. ``stats`` (a ``RollingStatsStore``) is rebuilt
+    from the restored history.
+    """
+
+    def __init__(self, store, path=HISTORY_SNAPSHOT, interval=HISTORY_SNAPSHOT_INTERVAL,
+                 max_age=HISTORY_MAX_AGE, stats=None):
+        self.store = store
+        self.stats_store = stats
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.restored = 0
+        self.saves = 0
+        self.errors = 0
+        self.last_save_seconds = 0.0
+        self._task = None
+
+    def restore(self):
+        self.restored = load_snapshot(self.store, self.path, self.max_age)
+        if self.restored and self.stats_store is not None:
+            for symbol in self.store:
+                self.stats_store.load(symbol, self.store[symbol].view())
+        return self.restored
+
+    def save(self):
+        started = time.perf_counter()
+        try:
+            save_snapshot(self.store, self.path)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.error(f"History snapshot failed: {e}")
+            return
+        self.saves += 1
+        self.last_save_seconds = time.perf_counter() - started
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic task and save a final snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.save()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.save()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "restored": self.restored,
+            "saves": self.saves,
+            "errors": self.errors,
+            "last_save_seconds": self.last_save_seconds,
+        }
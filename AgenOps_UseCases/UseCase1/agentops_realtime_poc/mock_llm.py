@@ -0,0 +1,85 @@
+import asyncio
+import re
+import time
+from types import SimpleNamespace
+
+PCT_CHANGE = re.compile(r"Percentage Change: (-?[\d.]+)%")
+TOKEN = re.compile(r"\S+\s*")  # one word plus trailing whitespace per streamed "token"
+
+
+def risk_responder(messages, threshold=3.0):
+    """Rule-based stand-in for the RiskAgent prompt: flags moves above ``threshold`` %."""
+    match = PCT_CHANGE.search(messages[-1]["content"])
+    if not match or abs(float(match.group(1))) < threshold:
+        return "No issue."
+    pct = float(match.group(1))
+    return f"Sudden {'spike' if pct > 0 else 'drop'} of {pct:.2f}% versus the previous tick."
+
+
+class MockChatClient:
+    """
+    In-process stand-in for AsyncOpenAI's ``chat.completions`` API.
+
+    ``responder(messages)`` produces the reply text and ``latency`` seconds
+    are slept per call, plus ``token_latency`` per generated word. With
+    ``stream=True`` the words are streamed as chunks. Plug it in with
+    ``llm_client.configure(client=...)``.
+    """
+
+    def __init__(self, responder=risk_responder, latency=0.0, token_latency=0.0):
+        self.responder = responder
+        self.latency = latency
+        self.token_latency = token_latency
+        self.calls = 0
+        self.tokens = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model=None, messages=(), stream=False, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self.responder(messages)
+        tokens = TOKEN.findall(content)
+        if stream:
+            return MockStream(self, tokens)
+        self.tokens += len(tokens)
+        if self.token_latency:
+            await asyncio.sleep(self.token_latency * len(tokens))
+        return SimpleNamespace(
+            id=f"mock-{self.calls}",
+            created=int(time.time()),
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=content),
+                finish_reason="stop",
+            )],
+        )
+
+
+class MockStream:
+    """Async iterator of completion chunks; ``close`` stops generation early."""
+
+    def __init__(self, client, tokens):
+        self.client = client
+        self.tokens = iter(tokens)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        token = None if self.closed else next(self.tokens, None)
+        if token is None:
+            raise StopAsyncIteration
+        if self.client.token_latency:
+            await asyncio.sleep(self.client.token_latency)
+        self.client.tokens += 1
+        return SimpleNamespace(choices=[SimpleNamespace(
+            index=0,
+            delta=SimpleNamespace(content=token),
+            finish_reason=None,
+        )])
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import re
+import time
+import uuid
+from aiohttp import web
+from llm_client import count_tokens
+
+DEFAULT_DELAY = 0.2  # seconds per completion
+DEFAULT_REPLY = "No issue."
+TOKEN = re.compile(r"\S+\s*")  # one word plus trailing whitespace per streamed "token"
+
+
+def create_app(delay=DEFAULT_DELAY, reply=DEFAULT_REPLY, token_delay=0.0, prompt_token_delay=0.0):
+    """
+    Minimal OpenAI-compatible chat completions endpoint for benchmarks.
+
+    ``reply`` may be a string or a callable taking the last user message.
+    Each completion takes ``delay`` seconds plus ``prompt_token_delay`` per
+    prompt token (prefill) plus ``token_delay`` per generated word;
+    ``"stream": true`` requests get the words as server-sent event chunks.
+    """
+    async def stream(request, body, content):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def chunk(delta, finish_reason=None):
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n".encode()
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            for token in TOKEN.findall(content):
+                await asyncio.sleep(token_delay)
+                await response.write(chunk({"content": token}))
+            await response.write(chunk({}, "stop"))
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            pass  # client closed the stream early
+        return response
+
+    async def completions(request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        prompt_tokens = sum(count_tokens(m.get("content") or "") for m in body["messages"])
+        await asyncio.sleep(delay + prompt_token_delay * prompt_tokens)
+        content = reply(prompt) if callable(reply) else reply
+        if body.get("stream"):
+            return await stream(request, body, content)
+        await asyncio.sleep(token_delay * len(TOKEN.findall(content)))
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 0,
+                      "total_tokens": prompt_tokens},
+        })
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+
+async def start_mock_server(delay=DEFAULT_DELAY, reply=DEFAULT_REPLY, host="127.0.0.1", port=0,
+                            token_delay=0.0, prompt_token_delay=0.0):
+    """Start the mock server; returns (runner, base_url). Call runner.cleanup() to stop."""
+    runner = web.AppRunner(create_app(delay, reply, token_delay, prompt_token_delay))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}/v1"
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="127.0.0.1", port=8099)
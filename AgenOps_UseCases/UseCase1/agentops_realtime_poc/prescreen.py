@@ -0,0 +1,83 @@
+import os
+
+
+class PreScreenGate:
+    """
+    Deterministic gate in front of the LLM call.
+
+    A tick is escalated to the LLM when any of its features crosses a
+    threshold; everything else is settled locally as "No issue.". The gate
+    also keeps a confusion matrix against the generator's injected-anomaly
+    labels so the skip ratio can be weighed against missed anomalies.
+    """
+
+    def __init__(self, z_threshold=2.0, pct_threshold=3.0, vol_ratio_threshold=3.0, enabled=True):
+        self.z_threshold = z_threshold
+        self.pct_threshold = pct_threshold
+        self.vol_ratio_threshold = vol_ratio_threshold
+        self.enabled = enabled
+        self.ticks = 0
+        self.skipped = 0
+        self.true_positives = 0
+        self.false_positives = 0
+        self.false_negatives = 0
+        self.true_negatives = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a gate from PRESCREEN_* environment variables."""
+        return cls(
+            z_threshold=float(os.getenv("PRESCREEN_Z", "2.0")),
+            pct_threshold=float(os.getenv("PRESCREEN_PCT", "3.0")),
+            vol_ratio_threshold=float(os.getenv("PRESCREEN_VOL_RATIO", "3.0")),
+            enabled=os.getenv("PRESCREEN_ENABLED", "true").lower() not in ("0", "false", "no"),
+        )
+
+    @staticmethod
+    def features(current_price, prev_price, avg_price, price_std):
+        """z-score, % change and move-to-volatility ratio for one tick."""
+        pct_change = ((current_price - prev_price) / prev_price) * 100
+        if price_std > 0:
+            z_score = (current_price - avg_price) / price_std
+            vol_ratio = abs(current_price - prev_price) / price_std
+        else:
+            # Flat history: any move at all is worth a look
+            z_score = vol_ratio = 0.0 if current_price == prev_price else float("inf")
+        return {"z_score": z_score, "pct_change": pct_change, "vol_ratio": vol_ratio}
+
+    def should_escalate(self, features):
+        """Return True if the tick needs the LLM, False if it is clearly normal."""
+        if not self.enabled:
+            return True
+        return (
+            abs(features["z_score"]) >= self.z_threshold
+            or abs(features["pct_change"]) >= self.pct_threshold
+            or features["vol_ratio"] >= self.vol_ratio_threshold
+        )
+
+    def record(self, escalated, is_anomaly=None):
+        """Count a decision; ``is_anomaly`` is the ground-truth label if known."""
+        self.ticks += 1
+        if not escalated:
+            self.skipped += 1
+        if is_anomaly is None:
+            return
+        if escalated and is_anomaly:
+            self.true_positives += 1
+        elif escalated:
+            self.false_positives += 1
+        elif is_anomaly:
+            self.false_negatives += 1
+        else:
+            self.true_negatives += 1
+
+    def report(self):
+        tp, fp, fn = self.true_positives, self.false_positives, self.false_negatives
+        return {
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "escalated": self.ticks - self.skipped,
+            "skip_ratio": self.skipped / self.ticks if self.ticks else 0.0,
+            "precision": tp / (tp + fp) if tp + fp else None,
+            "recall": tp / (tp + fn) if tp + fn else None,
+        }
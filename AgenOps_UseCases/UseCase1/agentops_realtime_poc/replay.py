@@ -0,0 +1,164 @@
+"""
+Record and replay tick logs through RiskAgent.
+
+Record a reproducible simulated session (no API calls):
+
+    python replay.py record ticks --ticks 5000 --seed 42
+
+Replay it at 10x real time against the mock LLM:
+
+    python replay.py replay ticks --speed 10 --latency 0.2
+
+``--speed 0`` replays as fast as possible; ``--llm openai`` uses the real API.
+"""
+import argparse
+import asyncio
+import time
+import llm_client
+from agent_logic import RiskAgent
+from data_feed import StockDataGenerator, MAX_HISTORY, STATS_WINDOW
+from mock_llm import MockChatClient
+from prescreen import PreScreenGate
+from rolling_stats import RollingStatsStore
+from tick_log import TickLog, TickLogWriter
+from ticks import HistoryStore, Tick
+from verdict_cache import VerdictCache
+
+SIMULATED_TICK_INTERVAL = 2.0  # seconds between generator ticks
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def record_simulated(path, ticks, seed=None, symbols=None):
+    """
+    Write ``ticks`` simulated ticks to a tick log, spaced like the live stream.
+
+    With ``symbols`` set, ticks come from the vectorized MarketSimulator for
+    that many symbols instead of StockDataGenerator.
+    """
+    start = time.time()
+    with TickLogWriter(path) as writer:
+        if symbols:
+            from market_sim import MarketSimulator
+            sim = MarketSimulator(symbols, seed=seed, dt=SIMULATED_TICK_INTERVAL)
+            written = 0
+            while written < ticks:
+                prices, _ = sim.step()
+                timestamp = start + sim.steps * SIMULATED_TICK_INTERVAL
+                for symbol, price in zip(sim.symbols, prices.round(2).tolist()):
+                    if written == ticks:
+                        break
+                    writer.append(symbol, price, timestamp)
+                    written += 1
+            return
+        generator = StockDataGenerator(seed=seed)
+        for i in range(ticks):
+            tick = generator.next_tick()
+            writer.append(tick["symbol"], tick["price"], start + i * SIMULATED_TICK_INTERVAL)
+
+
+def replay_ticks(log, window=STATS_WINDOW):
+    """Rebuild feed-shaped ticks (with prior stats) from a tick log."""
+    stats = RollingStatsStore(window=window)
+    history = HistoryStore(MAX_HISTORY)
+    for symbol, timestamp, price in log:
+        symbol_stats = stats[symbol]
+        prior = symbol_stats.snapshot()
+        symbol_stats.push(price)
+        view = history.push(symbol, price).view()
+        if prior["count"] < 2:
+            continue  # not enough history for the agent yet
+        yield timestamp, Tick(symbol, price, view, timestamp=timestamp, stats=prior)
+
+
+async def replay(log, agent, speed=0.0, max_in_flight=16):
+    """Feed a tick log through ``agent`` at ``speed``x real time and report results."""
+    latencies = []
+    pending = set()
+
+    async def handle(tick, dispatched):
+        if await agent.process(tick):
+            latencies.append(time.monotonic() - dispatched)
+
+    ticks = 0
+    first_ts = None
+    start = time.monotonic()
+    for timestamp, tick in replay_ticks(log):
+        if first_ts is None:
+            first_ts = timestamp
+        if speed:
+            delay = (timestamp - first_ts) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        ticks += 1
+        task = asyncio.create_task(handle(tick, time.monotonic()))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        while len(pending) >= max_in_flight:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    if pending:
+        await asyncio.gather(*pending)
+    elapsed = time.monotonic() - start
+
+    return {
+        "ticks": ticks,
+        "elapsed": elapsed,
+        "ticks_per_sec": ticks / elapsed if elapsed else 0.0,
+        "alerts": len(latencies),
+        "p50_alert_latency": percentile(latencies, 50),
+        "p99_alert_latency": percentile(latencies, 99),
+        "prescreen": agent.gate.report(),
+        "verdict_cache": agent.cache.stats(),
+    }
+
+
+async def main(args):
+    mock = None
+    if args.llm == "mock":
+        mock = MockChatClient(latency=args.latency, token_latency=args.token_latency)
+        llm_client.configure(client=mock)
+    agent = RiskAgent(gate=PreScreenGate(enabled=not args.no_prescreen),
+                      cache=VerdictCache(enabled=not args.no_cache),
+                      streaming=not args.no_stream)
+    with TickLog(args.path) as log:
+        print(f"Replaying {len(log)} ticks from {args.path} at "
+              f"{'max' if not args.speed else f'{args.speed:g}x'} speed")
+        report = await replay(log, agent, args.speed, args.max_in_flight)
+    if mock:
+        report["llm_calls"] = mock.calls
+        report["llm_tokens"] = mock.tokens
+    for key, value in report.items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and replay RiskAgent tick logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="record a simulated session")
+    rec.add_argument("path")
+    rec.add_argument("--ticks", type=int, default=5000)
+    rec.add_argument("--seed", type=int, default=None)
+    rec.add_argument("--symbols", type=int, default=None,
+                     help="record from the vectorized simulator with this many symbols")
+    rep = commands.add_parser("replay", help="replay a tick log through RiskAgent")
+    rep.add_argument("path")
+    rep.add_argument("--speed", type=float, default=0.0, help="x real time; 0 = as fast as possible")
+    rep.add_argument("--llm", choices=["mock", "openai"], default="mock")
+    rep.add_argument("--latency", type=float, default=0.0, help="mock LLM latency (s)")
+    rep.add_argument("--token-latency", type=float, default=0.0, help="mock LLM latency per word (s)")
+    rep.add_argument("--max-in-flight", type=int, default=16)
+    rep.add_argument("--no-prescreen", action="store_true", help="send every tick to the LLM")
+    rep.add_argument("--no-cache", action="store_true", help="disable the verdict cache")
+    rep.add_argument("--no-stream", action="store_true", help="wait for full completions")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_simulated(args.path, args.ticks, args.seed, args.symbols)
+        print(f"Recorded {args.ticks} ticks to {args.path}")
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,167 @@
+from array import array
+from collections import deque
+
+DEFAULT_WINDOW = 1000
+DEFAULT_EWMA_ALPHA = 0.1
+
+
+class RollingStats:
+    """
+    Fixed-size ring buffer of prices with O(1) (amortised) statistics.
+
+    Mean and variance are maintained with Welford's update, extended to a
+    sliding window by replacing the evicted value in a single step. Min/max
+    use monotonic deques so they never rescan the window.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, ewma_alpha=DEFAULT_EWMA_ALPHA):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self._buf = array('d', bytes(8 * window))
+        self._head = 0  # index of the oldest value once the buffer is full
+        self._seq = 0   # total number of values ever pushed
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.ewma = None
+        self._min = deque()  # (seq, value), values increasing
+        self._max = deque()  # (seq, value), values decreasing
+
+    def push(self, value):
+        value = float(value)
+        if self.count < self.window:
+            self._buf[(self._head + self.count) % self.window] = value
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            old = self._buf[self._head]
+            self._buf[self._head] = value
+            self._head = (self._head + 1) % self.window
+            old_mean = self.mean
+            self.mean += (value - old) / self.count
+            self._m2 += (value - old) * (value - self.mean + old - old_mean)
+            if self._m2 < 0.0:
+                self._m2 = 0.0
+
+        self.ewma = value if self.ewma is None else (
+            self.ewma_alpha * value + (1 - self.ewma_alpha) * self.ewma
+        )
+
+        seq = self._seq
+        self._seq += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+        oldest = self._seq - self.count
+        if self._min[0][0] < oldest:
+            self._min.popleft()
+        if self._max[0][0] < oldest:
+            self._max.popleft()
+
+        # Re-anchor the running sums once per window to stop float drift.
+        if self._seq % self.window == 0:
+            self._recompute()
+
+    def _recompute(self):
+        values = self.values()
+        self.mean = sum(values) / len(values)
+        self._m2 = sum((v - self.mean) ** 2 for v in values)
+
+    @property
+    def last(self):
+        if not self.count:
+            return None
+        return self._buf[(self._head + self.count - 1) % self.window]
+
+    @property
+    def variance(self):
+        """Population variance, matching the agents' previous calculation."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    def tail(self, n):
+        """Return the most recent ``n`` values, oldest first."""
+        n = min(n, self.count)
+        start = self._head + self.count - n
+        return [self._buf[(start + i) % self.window] for i in range(n)]
+
+    def values(self):
+        return self.tail(self.count)
+
+    def snapshot(self):
+        """Current statistics as a plain dict (no copy of the window)."""
+        return {
+            "count": self.count,
+            "last": self.last,
+            "mean": self.mean,
+            "variance": self.variance,
+            "std": self.std,
+            "ewma": self.ewma,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_values(cls, values, window=None, ewma_alpha=DEFAULT_EWMA_ALPHA):
+        values = list(values)
+        stats = cls(window or max(1, len(values)), ewma_alpha)
+        for v in values:
+            stats.push(v)
+        return stats
+
+    def __len__(self):
+        return self.count
+
+
+class RollingStatsStore:
+    """Per-symbol RollingStats shared by the data feed and the agents."""
+
+    def __init__(self, window=DEFAULT_WINDOW, ewma_alpha=DEFAULT_EWMA_ALPHA):
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self._stats = {}
+
+    def __getitem__(self, symbol):
+        stats = self._stats.get(symbol)
+        if stats is None:
+            stats = self._stats[symbol] = RollingStats(self.window, self.ewma_alpha)
+        return stats
+
+    def __contains__(self, symbol):
+        return symbol in self._stats
+
+    def __iter__(self):
+        return iter(self._stats)
+
+    def __len__(self):
+        return len(self._stats)
+
+    def load(self, symbol, values):
+        """Replace ``symbol``'s statistics with those of ``values`` (oldest first), e.g. a restored history."""
+        stats = self._stats[symbol] = RollingStats(self.window, self.ewma_alpha)
+        for value in values:
+            stats.push(value)
+        return stats
+
+    def push(self, symbol, price):
+        stats = self[symbol]
+        stats.push(price)
+        return stats
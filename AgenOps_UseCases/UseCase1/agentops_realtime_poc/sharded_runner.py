@@ -0,0 +1,323 @@
+"""
+Multi-process sharded RiskAgent monitor.
+
+Symbols are partitioned by hash across N worker processes. Each worker owns
+its own feed state, event loop and RiskAgent; alerts come back over an IPC
+queue and are merged into a single stream ordered by tick time.
+
+Alerts arrive at tick time plus LLM latency, so each shard also reports a
+watermark: the oldest tick it still has in flight, or the current time if
+it is idle. No later alert from that shard can be for an earlier tick. The
+merger holds alerts until they are older than every live shard's watermark.
+
+    python sharded_runner.py --shards 4 --symbols 2000 --feed sim --llm mock --duration 30
+"""
+import argparse
+import asyncio
+import heapq
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+import zlib
+from pathlib import Path
+from dotenv import load_dotenv
+
+DEFAULT_SHARDS = os.cpu_count() or 1
+STATS_INTERVAL = 5.0    # seconds between shard heartbeats
+WATERMARK_INTERVAL = 0.2  # seconds between shard watermark reports
+SHUTDOWN_TIMEOUT = 30.0  # seconds to wait for shards to drain on shutdown
+
+
+def shard_of(symbol, shards):
+    """Stable shard index for ``symbol`` (same in every process and run)."""
+    return zlib.crc32(symbol.encode("utf-8")) % shards
+
+
+def partition(symbols, shards):
+    """
+    Split ``symbols`` into at most ``shards`` non-empty parts by hash. There
+    are never more parts than symbols, and a hash slot no symbol lands in
+    gets no part (and so no process).
+    """
+    shards = min(shards, len(symbols))
+    parts = [[] for _ in range(shards)]
+    for symbol in symbols:
+        parts[shard_of(symbol, shards)].append(symbol)
+    return [part for part in parts if part]
+
+
+def shard_main(shard_id, symbols, out, stop, options):
+    """Worker process entry point."""
+    env_path = Path(__file__).parent / '.env'
+    load_dotenv(dotenv_path=env_path)
+    try:
+        asyncio.run(_run_shard(shard_id, symbols, out, stop, options))
+    except KeyboardInterrupt:
+        pass  # the parent coordinates shutdown through ``stop``
+
+
+async def _run_shard(shard_id, symbols, out, stop, options):
+    import agentops
+    import llm_client
+    from agent_logic import RiskAgent
+    from data_feed import stream_stock_data
+    from telemetry import telemetry
+
+    if options["llm"] == "mock":
+        from mock_llm import MockChatClient
+        llm_client.configure(client=MockChatClient(latency=options["latency"]))
+    elif os.getenv("AGENTOPS_API_KEY"):
+        agentops.init(api_key=os.getenv("AGENTOPS_API_KEY"))
+        telemetry.start()
+
+    agent = RiskAgent()
+    seed = None if options["seed"] is None else options["seed"] + shard_id
+    if options["feed"] == "sim":
+        from market_sim import MarketSimulator
+        feed = MarketSimulator(symbols=symbols, seed=seed).stream_ticks(interval=options["interval"])
+    else:
+        feed = stream_stock_data(seed=seed, symbols=symbols, interval=options["interval"])
+
+    counters = {"ticks": 0, "alerts": 0, "errors": 0}
+    started = time.monotonic()
+    pending = {}  # task -> tick time
+
+    def watermark():
+        """No alert this shard sends from now on is for a tick before this time."""
+        return min(pending.values(), default=time.time())
+
+    def snapshot():
+        elapsed = time.monotonic() - started
+        return {
+            **counters,
+            "symbols": len(symbols),
+            "in_flight": len(pending),
+            "watermark": watermark(),
+            "ticks_per_sec": counters["ticks"] / elapsed if elapsed else 0.0,
+            "prescreen": agent.gate.report(),
+            "verdict_cache": agent.cache.stats(),
+        }
+
+    async def handle(data, tick_time):
+        try:
+            response = await agent.process(data)
+        except Exception:
+            counters["errors"] += 1
+            return
+        if response:
+            counters["alerts"] += 1
+            out.put(("alert", tick_time, shard_id, data["symbol"], response))
+
+    async def heartbeat():
+        last_stats = time.monotonic()
+        while True:
+            await asyncio.sleep(WATERMARK_INTERVAL)
+            # Queued after any alert of a tick that has left ``pending``, so the merger sees those first
+            out.put(("watermark", time.time(), shard_id, watermark()))
+            if time.monotonic() - last_stats >= STATS_INTERVAL:
+                last_stats = time.monotonic()
+                out.put(("stats", time.time(), shard_id, snapshot()))
+
+    async def consume():
+        async for data in feed:
+            if stop.is_set():
+                break
+            counters["ticks"] += 1
+            tick_time = time.time()
+            task = asyncio.create_task(handle(data, tick_time))
+            pending[task] = tick_time
+            task.add_done_callback(lambda done: pending.pop(done, None))
+            while len(pending) >= options["max_in_flight"]:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+    beat = asyncio.create_task(heartbeat())
+    consumer = asyncio.create_task(consume())
+    try:
+        # Poll ``stop`` on a timer too: the feed may not yield again for a long time
+        while not stop.is_set():
+            done, _ = await asyncio.wait({consumer}, timeout=WATERMARK_INTERVAL)
+            if done:
+                consumer.result()  # re-raise a feed error
+                break
+    finally:
+        consumer.cancel()
+        beat.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await telemetry.stop()
+        out.put(("done", time.time(), shard_id, snapshot()))
+
+
+class ShardedMonitor:
+    """Starts the shard processes and merges their output."""
+
+    def __init__(self, symbols, shards=DEFAULT_SHARDS, **options):
+        if not symbols:
+            raise ValueError("ShardedMonitor needs at least one symbol")
+        self.parts = partition(symbols, shards)
+        self.shards = len(self.parts)
+        self.options = options
+        ctx = mp.get_context("spawn")
+        self.out = ctx.Queue()
+        self.stop_event = ctx.Event()
+        self.processes = [
+            ctx.Process(target=shard_main, name=f"shard-{i}",
+                        args=(i, part, self.out, self.stop_event, options), daemon=True)
+            for i, part in enumerate(self.parts)
+        ]
+        self.health = {i: {"last_seen": None, "stats": None, "done": False, "watermark": None}
+                       for i in range(self.shards)}
+        self._reorder = []  # heap of (tick_time, seq, shard_id, symbol, alert)
+        self._seq = 0
+
+    def start(self):
+        for process in self.processes:
+            process.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _receive(self, message):
+        kind, timestamp, shard_id, *payload = message
+        health = self.health[shard_id]
+        health["last_seen"] = time.time()
+        if kind == "alert":
+            symbol, alert = payload
+            heapq.heappush(self._reorder, (timestamp, self._seq, shard_id, symbol, alert))
+            self._seq += 1
+        elif kind == "watermark":
+            health["watermark"] = payload[0]
+        else:
+            health["stats"] = payload[0]
+            health["watermark"] = payload[0]["watermark"]
+            if kind == "done":
+                health["done"] = True
+
+    def low_watermark(self):
+        """
+        Tick time before which no live shard can still send an alert. A
+        shard that has not reported yet holds everything back; finished or
+        dead shards no longer count.
+        """
+        marks = [health["watermark"] for shard_id, health in self.health.items()
+                 if not health["done"] and self.processes[shard_id].is_alive()]
+        return min((-math.inf if mark is None else mark for mark in marks), default=math.inf)
+
+    def _release(self, flush=False):
+        """Pop alerts older than every live shard's watermark (all of them if ``flush``)."""
+        cutoff = math.inf if flush else self.low_watermark()
+        while self._reorder and self._reorder[0][0] < cutoff:
+            tick_time, _, shard_id, symbol, alert = heapq.heappop(self._reorder)
+            yield tick_time, shard_id, symbol, alert
+
+    def alerts(self, duration=None, on_poll=None):
+        """
+        Merged alert stream as (tick_time, shard_id, symbol, alert).
+
+        Runs until ``duration`` seconds elapse (or forever), then shuts the
+        shards down gracefully and flushes the remaining alerts. ``on_poll``
+        is called after every queue poll, e.g. to report shard health.
+        """
+        deadline = time.monotonic() + duration if duration else None
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                try:
+                    self._receive(self.out.get(timeout=0.2))
+                except queue.Empty:
+                    pass
+                if on_poll:
+                    on_poll(self)
+                yield from self._release()
+        finally:
+            yield from self.shutdown()
+
+    def shutdown(self):
+        """Signal the shards, drain their final messages and join them."""
+        self.stop()
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while time.monotonic() < deadline and not all(h["done"] for h in self.health.values()):
+            try:
+                self._receive(self.out.get(timeout=0.2))
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.processes):
+                    break
+        yield from self._release(flush=True)
+        for process in self.processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+
+    def shard_health(self):
+        """Per-shard liveness, heartbeat age and last reported stats."""
+        now = time.time()
+        report = {}
+        for shard_id, health in self.health.items():
+            last_seen = health["last_seen"]
+            report[shard_id] = {
+                "alive": self.processes[shard_id].is_alive(),
+                "symbols": len(self.parts[shard_id]),
+                "heartbeat_age": now - last_seen if last_seen else None,
+                "stale": last_seen is None or now - last_seen > 3 * STATS_INTERVAL,
+                "watermark_lag": now - health["watermark"] if health["watermark"] else None,
+                "stats": health["stats"],
+            }
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded multi-process RiskAgent monitor")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    parser.add_argument("--symbols", type=int, default=None,
+                        help="number of synthetic symbols (default: data_feed.STOCKS)")
+    parser.add_argument("--feed", choices=["generator", "sim"], default="generator")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between feed steps")
+    parser.add_argument("--llm", choices=["openai", "mock"], default="openai")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock LLM latency (s)")
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run (default: forever)")
+    args = parser.parse_args()
+
+    from data_feed import STOCKS
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)] if args.symbols else STOCKS
+    monitor = ShardedMonitor(
+        symbols, args.shards,
+        feed=args.feed, interval=args.interval, llm=args.llm, latency=args.latency,
+        max_in_flight=args.max_in_flight, seed=args.seed,
+    )
+    print(f"Starting {monitor.shards} shards for {len(symbols)} symbols...")
+    monitor.start()
+    next_report = [time.monotonic() + STATS_INTERVAL]
+
+    def report(monitor):
+        if time.monotonic() >= next_report[0]:
+            next_report[0] = time.monotonic() + STATS_INTERVAL
+            _print_health(monitor)
+
+    try:
+        for tick_time, shard_id, symbol, alert in monitor.alerts(args.duration, report):
+            print(f"[shard {shard_id}] {alert}")
+    except KeyboardInterrupt:
+        print("\nStopping shards...")
+        for _ in monitor.shutdown():
+            pass
+    _print_health(monitor)
+
+
+def _print_health(monitor):
+    total_rate = 0.0
+    for shard_id, health in monitor.shard_health().items():
+        stats = health["stats"] or {}
+        total_rate += stats.get("ticks_per_sec", 0.0)
+        print(f"  shard {shard_id}: alive={health['alive']} stale={health['stale']} "
+              f"symbols={health['symbols']} ticks={stats.get('ticks', 0)} "
+              f"alerts={stats.get('alerts', 0)} errors={stats.get('errors', 0)} "
+              f"ticks/sec={stats.get('ticks_per_sec', 0.0):.1f}")
+    print(f"  total ticks/sec: {total_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
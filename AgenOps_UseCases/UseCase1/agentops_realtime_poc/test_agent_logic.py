@@ -0,0 +1,28 @@
+import asyncio
+import llm_client
+from agent_logic import RiskAgent
+from mock_llm import MockChatClient
+from prescreen import PreScreenGate
+from verdict_cache import VerdictCache
+
+
+def test_verdict_ignores_leading_quotes_and_markdown():
+    for text in ('"No issue."', "'No issue.'", "  No issue.", "\n**No issue.**", "`No issue`"):
+        assert RiskAgent._verdict(text) == "normal", text
+
+
+def test_verdict_waits_while_the_reply_could_still_be_no_issue():
+    for text in ('"', "'", " ", "**", '"No', "  No iss"):
+        assert RiskAgent._verdict(text) is None, text
+    assert RiskAgent._verdict('"Sudden') == "anomaly"
+    assert RiskAgent._verdict("  Sharp drop") == "anomaly"
+
+
+def test_quoted_no_issue_streams_no_partial_alert():
+    llm_client.configure(client=MockChatClient(responder=lambda messages: '"No issue."'))
+    agent = RiskAgent(gate=PreScreenGate(enabled=False), cache=VerdictCache(), streaming=True)
+    partials = []
+    text, _ = asyncio.run(agent._stream_verdict("AAPL", "prompt", lambda symbol, text: partials.append(text)))
+    assert text == '"No issue."'
+    assert partials == []
+    assert agent.early_stops == 1
@@ -0,0 +1,39 @@
+import asyncio
+import llm_client
+from agent_logic import RiskAgent
+from mock_llm import MockChatClient
+from prescreen import PreScreenGate
+from ticks import HistoryBuffer, Tick
+from verdict_cache import VerdictCache
+
+
+def test_gate_escalates_on_any_threshold():
+    gate = PreScreenGate()
+    assert not gate.should_escalate(PreScreenGate.features(100.5, 100.0, 100.2, 1.0))
+    assert gate.should_escalate(PreScreenGate.features(104.0, 100.0, 100.0, 5.0))  # 4% move
+    assert gate.should_escalate(PreScreenGate.features(103.0, 102.9, 100.0, 1.0))  # z = 3
+    assert gate.should_escalate(PreScreenGate.features(100.0, 99.6, 100.0, 0.1))  # move of 4 sigma
+    # Flat history: any move escalates, no move does not
+    assert gate.should_escalate(PreScreenGate.features(100.01, 100.0, 100.0, 0.0))
+    assert not gate.should_escalate(PreScreenGate.features(100.0, 100.0, 100.0, 0.0))
+    assert PreScreenGate(enabled=False).should_escalate(PreScreenGate.features(100.0, 100.0, 100.0, 1.0))
+
+
+def test_report_counts_decisions_against_labels():
+    gate = PreScreenGate()
+    for escalated, is_anomaly in ((True, True), (True, False), (False, True), (False, False), (False, None)):
+        gate.record(escalated, is_anomaly)
+    report = gate.report()
+    assert (report["ticks"], report["skipped"], report["escalated"]) == (5, 3, 2)
+    assert report["precision"] == 0.5 and report["recall"] == 0.5
+
+
+def test_calm_tick_is_settled_without_the_llm():
+    client = MockChatClient()
+    llm_client.configure(client=client)
+    agent = RiskAgent(gate=PreScreenGate(), cache=VerdictCache(), streaming=False)
+    prices = [100.0, 100.2, 99.9, 100.1, 100.0]
+    tick = Tick("AAPL", prices[-1], HistoryBuffer(len(prices), prices).view())
+    assert asyncio.run(agent.process(tick)) is None
+    assert client.calls == 0
+    assert agent.gate.report()["skipped"] == 1
@@ -0,0 +1,36 @@
+import numpy as np
+from rolling_stats import RollingStats, RollingStatsStore
+
+
+def test_sliding_window_matches_numpy():
+    rng = np.random.default_rng(1)
+    prices = 100 + np.cumsum(rng.normal(0, 1, 2500))
+    stats = RollingStats(window=50, ewma_alpha=0.1)
+    ewma = None
+    for i, price in enumerate(prices):
+        stats.push(price)
+        ewma = price if ewma is None else 0.1 * price + 0.9 * ewma
+        window = prices[max(0, i - 49):i + 1]
+        assert stats.count == len(window)
+        assert np.isclose(stats.mean, window.mean(), rtol=0, atol=1e-9)
+        assert np.isclose(stats.variance, window.var(), rtol=1e-9, atol=1e-9)  # population variance
+        assert stats.min == window.min() and stats.max == window.max()
+        assert stats.last == price
+        assert np.isclose(stats.ewma, ewma)
+    assert stats.values() == prices[-50:].tolist()
+
+
+def test_constant_prices_have_zero_variance():
+    stats = RollingStats.from_values([101.25] * 30, window=10)
+    assert stats.variance == 0.0
+    assert stats.std == 0.0
+
+
+def test_store_keeps_one_window_per_symbol():
+    store = RollingStatsStore(window=3)
+    for price in (1.0, 2.0, 3.0, 4.0):
+        store.push("AAPL", price)
+    store.push("MSFT", 10.0)
+    assert store["AAPL"].values() == [2.0, 3.0, 4.0]
+    assert store["MSFT"].values() == [10.0]
+    assert store.load("AAPL", [5.0, 6.0]).mean == 5.5
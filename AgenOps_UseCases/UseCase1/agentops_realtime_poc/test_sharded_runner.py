@@ -0,0 +1,35 @@
+import asyncio
+import queue
+import threading
+import time
+from sharded_runner import ShardedMonitor, _run_shard, partition
+
+
+def test_partition_has_no_empty_shards():
+    parts = partition(["AAPL", "MSFT"], 8)
+    assert all(parts) and len(parts) <= 2
+    assert sorted(sum(partition(["AAPL", "MSFT", "TSLA"], 2), [])) == ["AAPL", "MSFT", "TSLA"]
+
+
+def test_monitor_starts_one_process_per_non_empty_shard():
+    monitor = ShardedMonitor(["AAPL"], shards=4)
+    assert monitor.parts == [["AAPL"]]
+    assert len(monitor.processes) == monitor.shards == 1
+
+
+def test_shard_stops_while_the_feed_is_idle():
+    out, stop = queue.Queue(), threading.Event()
+    options = {"llm": "mock", "latency": 0.0, "seed": 1, "feed": "generator",
+               "interval": 3600.0, "max_in_flight": 4}
+
+    async def run():
+        # The feed yields one tick, then sleeps for an hour
+        asyncio.get_running_loop().call_later(0.3, stop.set)
+        await asyncio.wait_for(_run_shard(0, ["AAPL"], out, stop, options), timeout=5)
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - started < 2
+    messages = [out.get_nowait() for _ in range(out.qsize())]
+    assert messages[-1][0] == "done"
+    assert messages[-1][3]["ticks"] == 1
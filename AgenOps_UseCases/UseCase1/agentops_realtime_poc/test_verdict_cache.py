@@ -0,0 +1,42 @@
+import asyncio
+import re
+import llm_client
+from agent_logic import RiskAgent
+from mock_llm import MockChatClient
+from prescreen import PreScreenGate
+from ticks import HistoryBuffer, Tick
+from verdict_cache import VerdictCache
+
+SYMBOL = re.compile(r"stock tick for (\w+)")
+
+
+def test_explanations_are_not_shared_across_symbols():
+    cache = VerdictCache()
+    key = cache.key(5.0, 3.0, 1.0)
+    cache.put("AAPL", key, "AAPL spiked 5% to $200", shared=False)
+    assert cache.get("AAPL", key) == "AAPL spiked 5% to $200"
+    assert cache.get("MSFT", key) is None
+
+
+def test_shared_verdicts_serve_every_symbol():
+    cache = VerdictCache()
+    key = cache.key(0.1, 0.2, 1.0)
+    cache.put("AAPL", key, "No issue.", shared=True)
+    assert cache.get("MSFT", key) == "No issue."
+
+
+def test_risk_agent_does_not_reuse_another_symbols_alert():
+    def responder(messages):
+        symbol = SYMBOL.search(messages[-1]["content"]).group(1)
+        return f"Sudden spike in {symbol}."
+
+    client = MockChatClient(responder=responder)
+    llm_client.configure(client=client)
+    agent = RiskAgent(gate=PreScreenGate(enabled=False), cache=VerdictCache(), streaming=False)
+    prices = [100.0, 101.0, 99.0, 100.0, 110.0]  # the same move, so the same cache buckets
+    alerts = [
+        asyncio.run(agent.process(Tick(symbol, prices[-1], HistoryBuffer(len(prices), prices).view())))
+        for symbol in ("AAPL", "MSFT")
+    ]
+    assert alerts == ["AAPL Risk Alert → Sudden spike in AAPL.", "MSFT Risk Alert → Sudden spike in MSFT."]
+    assert client.calls == 2
@@ -0,0 +1,127 @@
+import mmap
+import os
+import time
+from array import array
+
+# Column files making up one tick log
+SYMBOL_IDS = ".sym"   # uint32 symbol id per tick
+TIMESTAMPS = ".ts"    # float64 unix time per tick
+PRICES = ".px"        # float64 price per tick
+SYMBOLS = ".symbols"  # symbol names, one per line, line number = id
+
+
+class TickLogWriter:
+    """
+    Append-only columnar tick log.
+
+    Each column is a flat binary file so the log can be memory-mapped by
+    ``TickLog`` without parsing. Appending to an existing log keeps its
+    symbol ids.
+    """
+
+    def __init__(self, path, flush_every=1024):
+        self.path = str(path)
+        self.flush_every = flush_every
+        self.symbols = []
+        if os.path.exists(self.path + SYMBOLS):
+            with open(self.path + SYMBOLS, "r", encoding="utf-8") as f:
+                self.symbols = f.read().split()
+        self._ids = {s: i for i, s in enumerate(self.symbols)}
+        self._new_symbols = []
+        self._sym = array('I')
+        self._ts = array('d')
+        self._px = array('d')
+
+    def append(self, symbol, price, timestamp=None):
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self._new_symbols.append(symbol)
+        self._sym.append(symbol_id)
+        self._ts.append(time.time() if timestamp is None else timestamp)
+        self._px.append(price)
+        if len(self._px) >= self.flush_every:
+            self.flush()
+
+    def record(self, tick):
+        """Append a feed tick (a dict with 'symbol' and 'price')."""
+        self.append(tick["symbol"], tick["price"])
+
+    def flush(self):
+        if self._new_symbols:
+            with open(self.path + SYMBOLS, "a", encoding="utf-8") as f:
+                f.write("".join(f"{s}\n" for s in self._new_symbols))
+            self._new_symbols = []
+        for suffix, column in ((SYMBOL_IDS, self._sym), (TIMESTAMPS, self._ts), (PRICES, self._px)):
+            with open(self.path + suffix, "ab") as f:
+                column.tofile(f)
+            del column[:]
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TickLog:
+    """Read-only, memory-mapped view of a tick log written by TickLogWriter."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path + SYMBOLS, "r", encoding="utf-8") as f:
+            self.symbols = f.read().split()
+        self._maps = []
+        self.symbol_ids = self._map(SYMBOL_IDS, 'I')
+        self.timestamps = self._map(TIMESTAMPS, 'd')
+        self.prices = self._map(PRICES, 'd')
+        self._len = min(len(self.symbol_ids), len(self.timestamps), len(self.prices))
+
+    def _map(self, suffix, typecode):
+        with open(self.path + suffix, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(array(typecode))
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        view = memoryview(mm)
+        # Ignore a trailing partial record from an interrupted write
+        usable = len(view) - len(view) % array(typecode).itemsize
+        return view[:usable].cast(typecode)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        """(symbol, timestamp, price) of tick ``i``."""
+        return self.symbols[self.symbol_ids[i]], self.timestamps[i], self.prices[i]
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self[i]
+
+    def close(self):
+        for view in (self.symbol_ids, self.timestamps, self.prices):
+            view.release()
+        for mm in self._maps:
+            mm.close()
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+async def record_ticks(feed, writer):
+    """Pass ticks from ``feed`` through unchanged while appending them to ``writer``."""
+    try:
+        async for tick in feed:
+            writer.record(tick)
+            yield tick
+    finally:
+        writer.close()
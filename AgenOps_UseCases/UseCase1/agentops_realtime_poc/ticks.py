@@ -0,0 +1,171 @@
+"""
+Compact tick records and per-symbol price history without per-tick copies.
+
+``HistoryBuffer`` keeps the last ``capacity`` prices of a symbol in an
+``array('d')`` chunk that is only ever appended to. ``view()`` returns a
+read-only ``memoryview`` slice of it: no values are copied, and since later
+appends write past the end of every view handed out (a full chunk is
+carried over into a fresh array rather than overwritten), a view stays
+valid for as long as a queued tick holds it.
+
+``Tick`` is a ``__slots__`` record for the fields the feeds produce. It
+keeps the numeric ``change_pct`` and also answers the dict-style lookups
+(``tick["price_history"]``, ``tick.get("stats")``, ``"volume" in tick``)
+used throughout the agents, so dict ticks and Ticks are interchangeable;
+the agents themselves take ``as_tick(data)`` and read attributes.
+"""
+from array import array
+
+CHUNK_FACTOR = 8  # chunk size as a multiple of capacity; the carry-over copy is amortised over it
+
+
+class HistoryBuffer:
+    """The last ``capacity`` values of one series, handed out as zero-copy read-only views."""
+
+    __slots__ = ("capacity", "_chunk", "_buf", "_view", "_start", "_end")
+
+    def __init__(self, capacity, values=(), chunk_factor=CHUNK_FACTOR):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._chunk = capacity * max(2, chunk_factor)
+        values = array('d', values)
+        self._new_chunk(values[-capacity:] if len(values) > capacity else values)
+
+    def _new_chunk(self, carry):
+        self._buf = array('d', bytes(8 * self._chunk))
+        self._buf[:len(carry)] = carry
+        self._view = memoryview(self._buf).toreadonly()
+        self._start = 0
+        self._end = len(carry)
+
+    def append(self, value):
+        if self._end == self._chunk:
+            self._new_chunk(self._buf[self._end - self.capacity + 1:self._end])
+        self._buf[self._end] = value
+        self._end += 1
+        if self._end > self.capacity:
+            self._start = self._end - self.capacity
+
+    def view(self):
+        """Read-only view of the current window, oldest first."""
+        return self._view[self._start:self._end]
+
+    @property
+    def last(self):
+        return self._buf[self._end - 1] if self._end else None
+
+    def __len__(self):
+        return min(self._end, self.capacity)
+
+
+class HistoryStore:
+    """Per-symbol HistoryBuffers of a fixed capacity."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffers = {}
+
+    def __getitem__(self, symbol):
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            buffer = self._buffers[symbol] = HistoryBuffer(self.capacity)
+        return buffer
+
+    def __contains__(self, symbol):
+        return symbol in self._buffers
+
+    def __iter__(self):
+        return iter(self._buffers)
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def load(self, symbol, values):
+        """Replace ``symbol``'s history with ``values`` (oldest first), e.g. from a snapshot."""
+        buffer = self._buffers[symbol] = HistoryBuffer(self.capacity, values)
+        return buffer
+
+    def push(self, symbol, price):
+        buffer = self[symbol]
+        buffer.append(price)
+        return buffer
+
+
+TICK_FIELDS = ("symbol", "price", "history", "timestamp", "volume", "change_pct",
+               "stats", "injected_anomaly", "trades")
+# dict key -> Tick attribute; the history is exposed under the feeds' old "price_history" key
+_KEYS = {("price_history" if name == "history" else name): name for name in TICK_FIELDS}
+
+
+class Tick:
+    """One price update; ``history`` is a HistoryBuffer view ending with ``price``."""
+
+    __slots__ = TICK_FIELDS
+
+    def __init__(self, symbol, price, history, timestamp=None, volume=None, change_pct=None,
+                 stats=None, injected_anomaly=None, trades=None):
+        self.symbol = symbol
+        self.price = price
+        self.history = history
+        self.timestamp = timestamp
+        self.volume = volume
+        self.change_pct = change_pct
+        self.stats = stats
+        self.injected_anomaly = injected_anomaly
+        self.trades = trades
+
+    @property
+    def change_percent(self):
+        """``change_pct`` formatted like the feeds' old ``"1.23%"`` strings."""
+        return f"{self.change_pct:.2f}%" if self.change_pct is not None else None
+
+    def get(self, key, default=None):
+        if key == "change_percent":
+            value = self.change_percent
+        else:
+            name = _KEYS.get(key)
+            value = getattr(self, name) if name else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        keys = [key for key, name in _KEYS.items() if getattr(self, name) is not None]
+        if self.change_pct is not None:
+            keys.append("change_percent")
+        return keys
+
+    def to_dict(self):
+        """Plain dict copy (history as a list), e.g. for JSON or another process."""
+        data = {key: self[key] for key in self.keys()}
+        data["price_history"] = list(self.history)
+        return data
+
+    def __repr__(self):
+        return f"Tick({self.symbol!r}, {self.price!r}, history={list(self.history)!r})"
+
+
+def as_tick(data):
+    """``data`` as a Tick; a dict tick is converted once (its history is used as is)."""
+    if data is None or isinstance(data, Tick):
+        return data
+    change_percent = data.get("change_percent")
+    return Tick(
+        data.get("symbol"),
+        data.get("price"),
+        data.get("price_history"),
+        timestamp=data.get("timestamp"),
+        volume=data.get("volume"),
+        change_pct=float(change_percent.rstrip("%")) if change_percent else data.get("change_pct"),
+        stats=data.get("stats"),
+        injected_anomaly=data.get("injected_anomaly"),
+        trades=data.get("trades"),
+    )
@@ -0,0 +1,113 @@
+import math
+import os
+import time
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """
+    LRU + TTL cache of LLM verdicts keyed on quantized tick features.
+
+    Ticks whose % change, z-score and volatility regime fall into the same
+    buckets share one verdict, so only the first of a run of near-identical
+    ticks pays for an LLM call. Only ``shared`` verdicts, which carry nothing
+    symbol-specific (e.g. a bare "No issue."), are served across symbols;
+    any other verdict (an explanation naming the symbol and its prices) is
+    only served to the symbol it was stored for. Symbols in ``bypass``
+    always miss.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0, pct_width=0.5, z_width=0.5, vol_width=0.5,
+                 bypass=(), enabled=True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.pct_width = pct_width
+        self.z_width = z_width
+        self.vol_width = vol_width
+        self.bypass = set(bypass)
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key or (symbol, *key) -> (verdict, stored_at, latency)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.latency_saved = 0.0
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from VERDICT_CACHE_* environment variables."""
+        bypass = os.getenv("VERDICT_CACHE_BYPASS", "")
+        return cls(
+            maxsize=int(os.getenv("VERDICT_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("VERDICT_CACHE_TTL", "300")),
+            pct_width=float(os.getenv("VERDICT_CACHE_PCT_WIDTH", "0.5")),
+            z_width=float(os.getenv("VERDICT_CACHE_Z_WIDTH", "0.5")),
+            vol_width=float(os.getenv("VERDICT_CACHE_VOL_WIDTH", "0.5")),
+            bypass=[s.strip() for s in bypass.split(",") if s.strip()],
+            enabled=os.getenv("VERDICT_CACHE_ENABLED", "true").lower() not in ("0", "false", "no"),
+        )
+
+    def key(self, pct_change, z_score, volatility_pct):
+        """
+        Quantized feature signature.
+
+        ``volatility_pct`` is the price standard deviation as a percentage of
+        the mean price, i.e. the volatility regime.
+        """
+        return (
+            self._bucket(pct_change, self.pct_width),
+            self._bucket(z_score, self.z_width),
+            self._bucket(volatility_pct, self.vol_width),
+        )
+
+    @staticmethod
+    def _bucket(value, width):
+        # Infinite features (e.g. z-score over a flat history) get their own bucket
+        return math.floor(value / width) if math.isfinite(value) else value
+
+    def get(self, symbol, key):
+        """Cached verdict for ``key`` or None; counts hits, misses and bypasses."""
+        if not self.enabled or symbol in self.bypass:
+            self.bypassed += 1
+            return None
+        # This symbol's own verdict first, then one shared across symbols
+        entry = self._lookup((symbol, *key)) or self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.latency_saved += entry[2]
+        return entry[0]
+
+    def _lookup(self, entry_key):
+        entry = self._entries.get(entry_key)
+        if entry is not None and time.monotonic() - entry[1] > self.ttl:
+            del self._entries[entry_key]
+            return None
+        if entry is not None:
+            self._entries.move_to_end(entry_key)
+        return entry
+
+    def put(self, symbol, key, verdict, latency=0.0, shared=False):
+        """
+        Store the verdict an LLM call returned in ``latency`` seconds. Pass
+        ``shared=True`` only for verdicts that hold for any symbol in the
+        same buckets.
+        """
+        if not self.enabled or symbol in self.bypass:
+            return
+        entry_key = key if shared else (symbol, *key)
+        self._entries[entry_key] = (verdict, time.monotonic(), latency)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved": self.latency_saved,
+        }
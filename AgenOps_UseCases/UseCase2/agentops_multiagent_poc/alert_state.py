@@ -0,0 +1,129 @@
+import math
+import os
+import time
+from llm_budget import severity
+from metrics import SKIPPED
+
+NORMAL = "normal"
+ALERTED = "alerted"
+COOLING = "cooling"
+
+ANALYZE = "analyze"
+SUPPRESS = "suppress"
+
+ALERT_COOLDOWN = float(os.getenv("ALERT_COOLDOWN", "300"))  # seconds calm before a symbol resets
+ALERT_ESCALATION = float(os.getenv("ALERT_ESCALATION", "1.5"))  # severity ratio that warrants re-analysis
+ALERT_EXIT_SEVERITY = float(os.getenv("ALERT_EXIT_SEVERITY", "0.5"))  # below this an alert starts cooling
+
+
+class AlertStateMachine:
+    """
+    Per-symbol alert state: normal → alerted → cooling → normal.
+
+    The first watcher flag for a symbol is analyzed and moves it to
+    ``alerted``. Further flags are suppressed unless their severity is at
+    least ``escalation`` times the last analyzed one. Hysteresis: the alert
+    only starts cooling once severity drops below ``exit_severity`` (well
+    under the flag threshold of 1.0), returns to ``alerted`` if it rises
+    again, and resets to ``normal`` after ``cooldown`` calm seconds. A flag
+    on a symbol that has cooled for ``cooldown`` seconds is a new alert,
+    and a symbol that stays flagged is re-analyzed once every ``cooldown``
+    seconds rather than suppressed forever.
+
+    An ANALYZE counts from the moment it is returned, so concurrent flags
+    for the symbol are suppressed while it is in flight. The caller then
+    reports the outcome: ``confirm`` once the analysis ran, or ``cancel``
+    if it never did (dropped, expired or shed), after which later flags are
+    judged against the last analysis that did run.
+    """
+
+    def __init__(self, cooldown=ALERT_COOLDOWN, escalation=ALERT_ESCALATION,
+                 exit_severity=ALERT_EXIT_SEVERITY):
+        self.cooldown = cooldown
+        self.escalation = escalation
+        self.exit_severity = exit_severity
+        # symbol -> [state, last analyzed severity, state changed at, last analyzed at,
+        #            (severity, analyzed at) of the last confirmed analysis or None]
+        self._symbols = {}
+        self.analyzed = 0
+        self.cancelled = 0
+        self.escalated = 0
+        self.suppressed = 0
+
+    def state(self, symbol):
+        entry = self._symbols.get(symbol)
+        return entry[0] if entry else NORMAL
+
+    def observe(self, symbol, severity, flagged, now=None):
+        """
+        Feed one watcher result; returns ANALYZE or SUPPRESS for flagged
+        ticks and None otherwise.
+        """
+        now = now if now is not None else time.monotonic()
+        entry = self._symbols.get(symbol)
+        if flagged:
+            if entry is not None and entry[0] == COOLING and now - entry[2] >= self.cooldown:
+                entry = None  # cooled down: a new alert
+            if entry is None or now - entry[3] >= self.cooldown:
+                self._symbols[symbol] = [ALERTED, severity, now, now, entry[4] if entry else None]
+                self.analyzed += 1
+                return ANALYZE
+            if severity >= entry[1] * self.escalation:
+                entry[:] = [ALERTED, severity, now, now, entry[4]]
+                self.analyzed += 1
+                self.escalated += 1
+                return ANALYZE
+            # Timestamps stay put, so suppression ends at most ``cooldown`` after the last analysis
+            entry[0] = ALERTED
+            self.suppressed += 1
+            SKIPPED.inc(agent="AnalyzerAgent", reason="duplicate")
+            return SUPPRESS
+
+        if entry is None:
+            return None
+        if severity >= self.exit_severity:
+            entry[0] = ALERTED
+        elif entry[0] == ALERTED:
+            entry[0], entry[2] = COOLING, now
+        elif now - entry[2] >= self.cooldown:
+            del self._symbols[symbol]
+        return None
+
+    def confirm(self, symbol, severity, analyzed_at):
+        """The analysis ``observe`` returned ANALYZE for at ``analyzed_at`` ran."""
+        entry = self._symbols.get(symbol)
+        if entry is not None and (entry[4] is None or analyzed_at > entry[4][1]):
+            entry[4] = (severity, analyzed_at)
+
+    def cancel(self, symbol, severity, analyzed_at):
+        """The analysis ``observe`` returned ANALYZE for at ``analyzed_at`` never ran."""
+        entry = self._symbols.get(symbol)
+        if entry is not None and entry[4] == (severity, analyzed_at):
+            return  # already confirmed
+        # ``analyzed`` and ``escalated`` count granted analyses; ``cancelled`` is how many never ran
+        self.cancelled += 1
+        # Only undo it if no later analysis has replaced it
+        if entry is not None and entry[1] == severity and entry[3] == analyzed_at:
+            entry[1], entry[3] = entry[4] if entry[4] is not None else (0.0, -math.inf)
+
+    def observe_result(self, watch_result, now=None):
+        """``observe`` for a WatcherAgent result; results without stats are ignored."""
+        if not watch_result or "pct_change" not in watch_result:
+            return None
+        return self.observe(
+            watch_result["symbol"],
+            severity(watch_result["pct_change"], watch_result["z_score"]),
+            bool(watch_result.get("alert")),
+            now,
+        )
+
+    def stats(self):
+        states = [entry[0] for entry in self._symbols.values()]
+        return {
+            "analyzed": self.analyzed,
+            "escalated": self.escalated,
+            "cancelled": self.cancelled,
+            "suppressed": self.suppressed,
+            "alerted": states.count(ALERTED),
+            "cooling": states.count(COOLING),
+        }
@@ -1,23 +1,27 @@
 import agentops
-import os
 import traceback
 import logging
-from openai import OpenAI
+from llm_budget import Shed
+from llm_client import chat_completion
+from metrics import ERRORS
+from telemetry import emit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('AnalyzerAgent')
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 class AnalyzerAgent:
     def __init__(self):
         logger.info("Initializing AnalyzerAgent...")
         self.trace = agentops.start_trace(tags=["AnalyzerAgent"])
         logger.info("✅ AnalyzerAgent trace started")
 
-    async def analyze(self, context):
-        """Analyze flagged anomalies and assess risk severity."""
+    async def analyze(self, context, priority=0.0, deadline=None):
+        """
+        Analyze flagged anomalies and assess risk severity.
+
+        Raises ``Shed`` if ``deadline`` passes before LLM budget is available.
+        """
         logger.info("Starting analysis of flagged anomaly...")
         
         prompt = f"""
@@ -37,7 +41,10 @@ class AnalyzerAgent:
 
         try:
             logger.info("Sending request to OpenAI for risk analysis...")
-            response = client.chat.completions.create(
+            response = await chat_completion(
+                agent="AnalyzerAgent",
+                priority=priority,
+                deadline=deadline,
                 model="gpt-3.5-turbo",  # Using gpt-3.5-turbo instead of gpt-4 for better availability
                 messages=[
                     {"role": "system", "content": "You are a risk analysis agent."},
@@ -48,7 +55,7 @@ class AnalyzerAgent:
             logger.info("Received response from OpenAI")
 
             result = response.choices[0].message.content.strip()
-            agentops.tool(name="Analyzer Assessment")({
+            emit("Analyzer Assessment", {
                 "input": context,
                 "output": result,
                 "tags": ["analyzer"]
@@ -56,8 +63,12 @@ class AnalyzerAgent:
 
             return f"🔍 {result}"
 
+        except Shed:
+            logger.info("Alert went stale before an LLM slot was free")
+            raise
         except Exception as e:
-            agentops.tool(name="AnalyzerError")({
+            ERRORS.inc(component="AnalyzerAgent")
+            emit("AnalyzerError", {
                 "error": str(e),
                 "traceback": traceback.format_exc()
             })
@@ -7,7 +7,17 @@ from dotenv import load_dotenv
 import agentops
 from watcher_agent import WatcherAgent
 from analyzer_agent import AnalyzerAgent
-from data_feed_live import stream_stock_data
+from data_feed_live import (STOCKS, AdaptivePollScheduler, LiveStockDataManager, stream_stock_data,
+                            stream_stock_data_adaptive)
+from data_feed_ws import TradeStreamManager, stream_trades
+from history_snapshot import HISTORY_SNAPSHOT, HistorySnapshotter
+from pipeline import AlertPipeline
+from alert_state import AlertStateMachine
+from llm_budget import LLMDispatcher
+import llm_client
+from tick_log import TickLogWriter, record_ticks
+from telemetry import telemetry
+from metrics import QUEUE_DEPTH, start_metrics_server
 
 # Configure logging
 logging.basicConfig(
@@ -40,54 +50,135 @@ if missing_vars:
 # Initialize AgentOps
 agentops.init(api_key=os.getenv("AGENTOPS_API_KEY"))
 
+# Pipeline sizing: worker pools and bounded queues per agent
+WATCHER_WORKERS = int(os.getenv("WATCHER_WORKERS", "4"))
+ANALYZER_WORKERS = int(os.getenv("ANALYZER_WORKERS", "2"))
+WATCHER_QUEUE = int(os.getenv("WATCHER_QUEUE", "100"))
+ANALYZER_QUEUE = int(os.getenv("ANALYZER_QUEUE", "20"))
+MAX_ALERT_AGE = float(os.getenv("MAX_ALERT_AGE", "60"))  # seconds before an alert is stale
+WATCHER_MAX_AGE = float(os.getenv("WATCHER_MAX_AGE", "30"))  # seconds a tick may wait for the watcher LLM
+WATCHER_BATCH_SIZE = int(os.getenv("WATCHER_BATCH_SIZE", "5"))  # ticks per watcher LLM request
+# "poll" the REST quote API every POLL_INTERVAL seconds, "adaptive" to poll each symbol
+# on its own volatility-driven schedule, or "push" trades over the WebSocket
+FEED_MODE = os.getenv("FEED_MODE", "poll")
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "15"))
+# Skip re-analysis of symbols that are already alerted (see alert_state.py)
+ALERT_DEDUP = os.getenv("ALERT_DEDUP", "true").lower() in ("1", "true", "yes")
+# Optional path prefix of a tick log to record this session for replay.py
+TICK_LOG = os.getenv("TICK_LOG")
+# Port of the Prometheus /metrics endpoint; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))
+# Interface it listens on; set 0.0.0.0 to let a remote Prometheus scrape it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+def print_result(data, watch_result, analysis):
+    """Pipeline sink: print one tick's outcome as a single block."""
+    lines = [f"\n📊 Processing {data['symbol']} - ${data['price']:.2f}"]
+    if len(data['price_history']) > 1:
+        pct_change = ((data['price'] - data['price_history'][-2]) / data['price_history'][-2]) * 100
+        lines.append(f"   Change: {pct_change:+.2f}% | Volume: {data.get('volume', 'N/A')}")
+
+    if not watch_result:
+        lines.append("   ⏳ No significant movement detected")
+        print("\n".join(lines))
+        return
+
+    if watch_result.get("suppressed"):
+        lines.append(f"   🔁 Alert still active for {data['symbol']}"
+                     f" ({watch_result.get('pct_change', 0.0):+.2f}%), analysis suppressed")
+    elif watch_result.get("alert"):
+        lines.append("\n" + "🚨 " * 20)
+        lines.append(f"⚠️  ALERT: Unusual movement detected for {data['symbol']}")
+        lines.append(f"   Current Price: ${data['price']:.2f}")
+        if 'pct_change' in watch_result:
+            lines.append(f"   Change: {watch_result['pct_change']:+.2f}%")
+        if 'z_score' in watch_result:
+            lines.append(f"   Z-Score: {watch_result['z_score']:.2f}")
+        lines.append("\n🔍 Analysis:")
+        lines.append(analysis)
+        lines.append("🚨 " * 20 + "\n")
+    else:
+        lines.append("   ✅ Normal market behavior")
+
+    # Add a visual separator between stocks
+    lines.append("-" * 40)
+    print("\n".join(lines))
+
 async def main():
     logger.info("\n" + "=" * 80)
     logger.info("🚀 AgentOps Multi-Agent Live POC Started...")
     logger.info("=" * 80 + "\n")
     
+    telemetry.start()
+    # Severity-ordered LLM admission within LLM_CONCURRENCY, LLM_RPM and LLM_TPM
+    dispatcher = LLMDispatcher.from_env()
+    llm_client.configure(dispatcher=dispatcher)
+    QUEUE_DEPTH.track(lambda: dispatcher.stats()["waiting"], queue="llm_dispatcher")
+    QUEUE_DEPTH.track(lambda: len(telemetry.buffer), queue="telemetry")
+    metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+    if metrics_runner:
+        logger.info(f"Metrics at http://localhost:{METRICS_PORT}/metrics")
     logger.info("Initializing agents...")
     watcher = WatcherAgent()
     analyzer = AnalyzerAgent()
     logger.info("Agents initialized successfully")
 
+    scheduler = AdaptivePollScheduler(STOCKS) if FEED_MODE == "adaptive" else None
+
+    def sink(data, watch_result, analysis):
+        # Alerted symbols are polled more often for a while
+        if scheduler and watch_result and watch_result.get("alert"):
+            scheduler.alert(data["symbol"])
+        print_result(data, watch_result, analysis)
+
+    pipeline = AlertPipeline(
+        watcher, analyzer, sink,
+        watcher_workers=WATCHER_WORKERS,
+        analyzer_workers=ANALYZER_WORKERS,
+        watcher_queue=WATCHER_QUEUE,
+        analyzer_queue=ANALYZER_QUEUE,
+        max_alert_age=MAX_ALERT_AGE,
+        watcher_batch_size=WATCHER_BATCH_SIZE,
+        watcher_max_age=WATCHER_MAX_AGE,
+        alert_state=AlertStateMachine() if ALERT_DEDUP else None,
+    )
+    if FEED_MODE == "push":
+        manager = TradeStreamManager()
+        feed = stream_trades(manager=manager)
+    elif scheduler:
+        manager = LiveStockDataManager()
+        feed = stream_stock_data_adaptive(scheduler=scheduler, manager=manager)
+    else:
+        manager = LiveStockDataManager()
+        feed = stream_stock_data(interval=POLL_INTERVAL, manager=manager)
+    logger.info(f"Feed mode: {FEED_MODE}")
+    # Warm start: the watcher gets full price history from the first tick
+    snapshotter = HistorySnapshotter(manager.price_history) if HISTORY_SNAPSHOT else None
+    if snapshotter:
+        snapshotter.restore()
+        snapshotter.start()
+    if TICK_LOG:
+        feed = record_ticks(feed, TickLogWriter(TICK_LOG))
     try:
-        async for data in stream_stock_data(interval=15):  # fetch every 15 sec
-            # Show the incoming data
-            print(f"\n📊 Processing {data['symbol']} - ${data['price']:.2f}")
-            if len(data['price_history']) > 1:
-                pct_change = ((data['price'] - data['price_history'][-2]) / data['price_history'][-2]) * 100
-                print(f"   Change: {pct_change:+.2f}% | Volume: {data.get('volume', 'N/A')}")
-            
-            watch_result = await watcher.detect(data)
-            
-            if not watch_result:
-                print("   ⏳ No significant movement detected")
-                continue
-
-            if watch_result.get("alert"):
-                print("\n" + "🚨 " * 20)
-                print(f"⚠️  ALERT: Unusual movement detected for {data['symbol']}")
-                print(f"   Current Price: ${data['price']:.2f}")
-                if 'pct_change' in watch_result:
-                    print(f"   Change: {watch_result['pct_change']:+.2f}%")
-                if 'z_score' in watch_result:
-                    print(f"   Z-Score: {watch_result['z_score']:.2f}")
-                
-                analysis = await analyzer.analyze(watch_result["context"])
-                print("\n🔍 Analysis:")
-                print(analysis)
-                print("🚨 " * 20 + "\n")
-            else:
-                print("   ✅ Normal market behavior")
-            
-            # Add a visual separator between stocks
-            print("-" * 40)
+        await pipeline.run(feed, report_interval=60)
 
     except KeyboardInterrupt:
         print("\n\n⚡ Stopping the stock monitoring system...")
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
     finally:
+        logger.info(f"Pipeline stats: {pipeline.stats()}")
+        logger.info(f"Verdict cache stats: {watcher.cache.stats()}")
+        logger.info(f"LLM dispatcher stats: {dispatcher.stats()}")
+        if scheduler:
+            logger.info(f"Poll scheduler stats: {scheduler.stats()}")
+        if snapshotter:
+            await snapshotter.stop()
+            logger.info(f"History snapshot stats: {snapshotter.stats()}")
+        await telemetry.stop()
+        logger.info(f"Telemetry stats: {telemetry.stats()}")
+        if metrics_runner:
+            await metrics_runner.cleanup()
         print("\n" + "=" * 80)
         print("🏁 AgentOps Multi-Agent Live POC Completed")
         print("=" * 80 + "\n")
@@ -0,0 +1,97 @@
+"""
+Detection latency of the push (WebSocket) feed vs. the poll (REST) feed.
+
+Both feeds run side by side against the local mock trade server. A simple
+local detector (|move| > 3% versus the previous tick) stands in for the
+watcher, and every price jump the server injects is matched to the first
+tick of each feed that flags it:
+
+    python bench_feed_latency.py --symbols 20 --duration 60 --poll-interval 15
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+os.environ.setdefault("FINNHUB_API_KEY", "mock")  # the local server ignores the token
+
+from data_feed_live import LiveStockDataManager, stream_stock_data
+from data_feed_ws import TradeStreamManager, stream_trades
+from mock_trade_server import MockTradeServer
+from replay import percentile
+
+THRESHOLD = 3.0  # % move versus the previous tick that counts as detected
+
+
+async def consume(feed, detections, staleness):
+    """Record (symbol, arrival time) of every tick the detector flags."""
+    last_price = {}
+    async for tick in feed:
+        now = time.time()
+        if tick.get("timestamp"):
+            staleness.append(now - tick["timestamp"])
+        prev = last_price.get(tick["symbol"])
+        last_price[tick["symbol"]] = tick["price"]
+        if prev and abs(tick["price"] - prev) / prev * 100 > THRESHOLD:
+            detections.append((tick["symbol"], now))
+
+
+def match(jumps, detections, horizon):
+    """Latency from each jump to its first detection within ``horizon`` seconds."""
+    latencies, missed = [], 0
+    for symbol, jumped_at, _ in jumps:
+        hits = [t - jumped_at for s, t in detections if s == symbol and 0 <= t - jumped_at <= horizon]
+        if hits:
+            latencies.append(min(hits))
+        else:
+            missed += 1
+    return latencies, missed
+
+
+async def main(args):
+    server = MockTradeServer(trade_rate=args.trade_rate, jump_prob=args.jump_prob, seed=args.seed)
+    ws_url, rest_url = await server.start()
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+    push = TradeStreamManager(url=ws_url, coalesce=args.coalesce)
+    poll = LiveStockDataManager(rate_limit=100000, burst=1000, base_url=rest_url)
+    results = {"push": ([], []), "poll": ([], [])}
+    tasks = [
+        asyncio.create_task(consume(stream_trades(symbols, push), *results["push"])),
+        asyncio.create_task(consume(stream_stock_data(args.poll_interval, symbols, manager=poll),
+                                    *results["poll"])),
+    ]
+    await asyncio.sleep(args.duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # Jumps in the last poll interval cannot have been polled yet
+    jumps = [j for j in server.jumps if j[1] < time.time() - args.poll_interval]
+    await server.stop()
+
+    print(f"{len(symbols)} symbols, {args.duration:.0f}s, {len(jumps)} jumps, "
+          f"coalesce {args.coalesce}s, poll every {args.poll_interval}s")
+    print(f"{'feed':>5} {'detected':>9} {'missed':>7} {'p50 ms':>8} {'p99 ms':>8} {'stale p50 ms':>13}")
+    for name, (detections, staleness) in results.items():
+        latencies, missed = match(jumps, detections, args.poll_interval * 2)
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        stale = percentile(staleness, 50)
+        print(f"{name:>5} {len(latencies):>9} {missed:>7} "
+              f"{p50 * 1000 if p50 is not None else float('nan'):>8.0f} "
+              f"{p99 * 1000 if p99 is not None else float('nan'):>8.0f} "
+              f"{stale * 1000 if stale is not None else float('nan'):>13.0f}")
+    print(f"push stream: {push.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to run")
+    parser.add_argument("--poll-interval", type=float, default=15.0)
+    parser.add_argument("--coalesce", type=float, default=0.5)
+    parser.add_argument("--trade-rate", type=float, default=5.0, help="trades per symbol per second")
+    parser.add_argument("--jump-prob", type=float, default=0.002)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main(args))
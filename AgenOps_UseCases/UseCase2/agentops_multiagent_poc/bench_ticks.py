@@ -0,0 +1,116 @@
+"""
+Per-tick cost of dict ticks with copied history vs. Tick records with views.
+
+``dict`` builds ticks the way the feeds used to (a fresh ``list(deque)`` of
+the history and a formatted ``change_percent`` string per tick); ``tick``
+uses ``Tick`` with a ``HistoryBuffer`` view. Both are consumed by the
+watcher's movement statistics. Reports time per tick, the CPU share that
+costs at ``--rate`` ticks/sec, and the memory a backlog of one second of
+ticks keeps alive (what a queued pipeline holds during a burst):
+
+    python bench_ticks.py --ticks 100000 --symbols 500 --history 10
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from ticks import HistoryStore, Tick
+
+
+def dict_feed(prices, history_len):
+    history = defaultdict(lambda: deque(maxlen=history_len))
+    for symbol, price, change in prices:
+        history[symbol].append(price)
+        yield {
+            "symbol": symbol,
+            "price": price,
+            "change_percent": f"{change:.2f}%",
+            "price_history": list(history[symbol]),
+        }
+
+
+def tick_feed(prices, history_len):
+    history = HistoryStore(history_len)
+    for symbol, price, change in prices:
+        yield Tick(symbol, price, history.push(symbol, price).view(), change_pct=change)
+
+
+def stats(price, history):
+    """The movement statistics WatcherAgent computes for every tick."""
+    prev_price = history[-2] if len(history) > 1 else price
+    pct_change = (price - prev_price) / prev_price * 100
+    avg_price = sum(history) / len(history)
+    std_dev = (sum((p - avg_price) ** 2 for p in history) / len(history)) ** 0.5
+    return pct_change, (price - avg_price) / std_dev if std_dev else 0.0
+
+
+def consume_dict(tick):
+    return stats(tick["price"], tick["price_history"])
+
+
+def consume_tick(tick):
+    return stats(tick.price, tick.history)
+
+
+def make_prices(n, symbols, seed):
+    rng = random.Random(seed)
+    names = [f"SYM{i:04d}" for i in range(symbols)]
+    last = {name: rng.uniform(100, 500) for name in names}
+    prices = []
+    for _ in range(n):
+        name = rng.choice(names)
+        last[name] = round(last[name] * (1 + rng.gauss(0, 0.01)), 2)
+        prices.append((name, last[name], rng.uniform(-5, 5)))
+    return prices
+
+
+def timed(feed, consume, prices, history_len):
+    started = time.perf_counter()
+    for tick in feed(prices, history_len):
+        consume(tick)
+    return (time.perf_counter() - started) / len(prices)
+
+
+def backlog(feed, consume, prices, history_len, warm):
+    """Bytes and allocated blocks retained by the ticks after the first ``warm`` ones."""
+    ticks = feed(prices, history_len)
+    for _, tick in zip(range(warm), ticks):  # fill the histories first
+        consume(tick)
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    before = tracemalloc.get_traced_memory()[0]
+    queued = list(ticks)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    blocks = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    for tick in queued:
+        consume(tick)
+    return retained / len(queued), blocks / len(queued)
+
+
+def main(args):
+    prices = make_prices(args.ticks, args.symbols, args.seed)
+    burst = int(args.rate)
+    print(f"{args.ticks} ticks over {args.symbols} symbols, history {args.history}, "
+          f"backlog {burst} ticks")
+    print(f"{'ticks':>5} {'us/tick':>8} {'CPU at rate':>12} {'bytes/queued':>13} {'blocks/queued':>14}")
+    for name, feed, consume in (("dict", dict_feed, consume_dict), ("tick", tick_feed, consume_tick)):
+        timed(feed, consume, prices[:1000], args.history)  # warm up
+        per_tick = min(timed(feed, consume, prices, args.history) for _ in range(args.repeat))
+        retained, blocks = backlog(feed, consume, prices[:len(prices) // 2 + burst], args.history,
+                                   len(prices) // 2)
+        print(f"{name:>5} {per_tick * 1e6:>8.2f} {per_tick * args.rate:>11.1%} "
+              f"{retained:>13.0f} {blocks:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--history", type=int, default=10, help="prices per tick history")
+    parser.add_argument("--rate", type=float, default=10000, help="ticks per second")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -1,9 +1,15 @@
 import aiohttp
 import asyncio
+import heapq
+import math
 import os
+import time
 import logging
-from collections import defaultdict, deque
+from collections import defaultdict
 from dotenv import load_dotenv
+from metrics import ERRORS, FEED_LATENCY
+from rate_limit import TokenBucket
+from ticks import HistoryStore, Tick
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -18,16 +24,41 @@ if not API_KEY:
 STOCKS = ["AAPL", "GOOG", "TSLA", "AMZN", "MSFT"]
 MAX_HISTORY = 10  # Keep last 10 data points for each stock
 
+# Finnhub free tier: 60 calls/minute, bursts capped at 30 calls/second
+RATE_LIMIT_PER_MINUTE = int(os.getenv("FINNHUB_RATE_LIMIT", "60"))
+RATE_LIMIT_BURST = int(os.getenv("FINNHUB_BURST", "30"))
+MAX_CONNECTIONS = int(os.getenv("FINNHUB_MAX_CONNECTIONS", "20"))
+REQUEST_TIMEOUT = 10  # seconds per quote request
+# Adaptive polling: share of the rate limit the scheduler plans to use, and interval bounds
+POLL_BUDGET_SHARE = float(os.getenv("POLL_BUDGET_SHARE", "0.9"))
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "5"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "300"))
+BASE_URL = os.getenv("FINNHUB_BASE_URL", "https://finnhub.io/api/v1")
+
 class LiveStockDataManager:
-    def __init__(self):
+    def __init__(self, rate_limit=RATE_LIMIT_PER_MINUTE, burst=RATE_LIMIT_BURST,
+                 max_connections=MAX_CONNECTIONS, base_url=BASE_URL):
         logger.info("Initializing LiveStockDataManager...")
-        self.price_history = defaultdict(lambda: deque(maxlen=MAX_HISTORY))
+        self.base_url = base_url
+        self.price_history = HistoryStore(MAX_HISTORY)
         self.session = None
+        self.max_connections = max_connections
+        self.rate_limiter = TokenBucket(rate_limit / 60.0, min(burst, rate_limit))
         logger.info("LiveStockDataManager initialized")
 
     async def initialize_session(self):
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            # Pooled keep-alive connections to the quote API with cached DNS
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
 
     async def close_session(self):
         if self.session:
@@ -41,44 +72,74 @@ class LiveStockDataManager:
             logger.info("Initializing new session...")
             await self.initialize_session()
 
-        url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={API_KEY}"
+        await self.rate_limiter.acquire()
+        url = f"{self.base_url}/quote?symbol={symbol}&token={API_KEY}"
         headers = {'X-Finnhub-Token': API_KEY}
         logger.debug(f"Requesting URL: {url}")
         
-        async with self.session.get(url, headers=headers) as resp:
-            if resp.status != 200:
-                logger.error(f"Error fetching {symbol}: HTTP {resp.status}")
-                return None
+        started = time.monotonic()
+        try:
+            async with self.session.get(url, headers=headers) as resp:
+                if resp.status != 200:
+                    logger.error(f"Error fetching {symbol}: HTTP {resp.status}")
+                    ERRORS.inc(component="feed")
+                    return None
             
-            try:
-                data = await resp.json()
-                logger.debug(f"Raw response for {symbol}: {data}")
+                try:
+                    data = await resp.json()
+                    logger.debug(f"Raw response for {symbol}: {data}")
                 
-                if 'c' not in data:  # Current price
-                    logger.error(f"No quote data received for {symbol}. Response: {data}")
-                    return None
+                    if 'c' not in data:  # Current price
+                        logger.error(f"No quote data received for {symbol}. Response: {data}")
+                        return None
 
-                price = float(data['c'])  # Current price
-                if price <= 0:
-                    logger.error(f"Invalid price {price} received for {symbol}")
-                    return None
+                    price = float(data['c'])  # Current price
+                    if price <= 0:
+                        logger.error(f"Invalid price {price} received for {symbol}")
+                        return None
                     
-                # Update price history
-                self.price_history[symbol].append(price)
+                    # Update price history
+                    history = self.price_history.push(symbol, price)
                 
-                # Calculate percentage change
-                prev_close = data.get('pc', price)  # Previous close price
-                change_percent = ((price - prev_close) / prev_close) * 100 if prev_close > 0 else 0
+                    # Calculate percentage change
+                    prev_close = data.get('pc', price)  # Previous close price
+                    change_percent = ((price - prev_close) / prev_close) * 100 if prev_close > 0 else 0
                 
-                return {
-                    "symbol": symbol,
-                    "price": price,
-                    "volume": int(data.get('v', 0)),  # Volume
-                    "change_percent": f"{change_percent:.2f}%",
-                    "price_history": list(self.price_history[symbol])
-                }
-            except (KeyError, ValueError, TypeError):
-                return None
+                    return Tick(
+                        symbol,
+                        price,
+                        history.view(),
+                        timestamp=data.get('t'),  # time of the quoted price (s)
+                        volume=int(data.get('v', 0)),
+                        change_pct=change_percent,
+                    )
+                except (KeyError, ValueError, TypeError):
+                    return None
+        finally:
+            FEED_LATENCY.observe(time.monotonic() - started, source="finnhub")
+
+    async def fetch_batch(self, symbols):
+        """
+        Fetch all symbols concurrently, yielding quotes as they complete.
+
+        Requests share the pooled session and the rate limiter; failed or
+        empty quotes are logged and skipped.
+        """
+        if not self.session:
+            await self.initialize_session()
+        tasks = [asyncio.create_task(self.fetch_stock_price(symbol)) for symbol in symbols]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    stock_data = await next_done
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.error(f"Quote request failed: {e!r}")
+                    continue
+                if stock_data:
+                    yield stock_data
+        finally:
+            for task in tasks:
+                task.cancel()
 
     async def __aenter__(self):
         await self.initialize_session()
@@ -87,22 +148,176 @@ class LiveStockDataManager:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close_session()
 
-async def stream_stock_data(interval=10):
-    """Continuously stream live stock data with price history."""
-    logger.info(f"Starting stock data stream with {len(STOCKS)} symbols, interval: {interval}s")
-    async with LiveStockDataManager() as manager:
+class AdaptivePollScheduler:
+    """
+    Per-symbol next-poll times on a min-heap, paced by volatility and alerts.
+
+    Each symbol gets a share of the requests-per-minute budget proportional
+    to its realized volatility (std. dev. of tick-to-tick % returns, floored
+    at ``min_volatility``), multiplied by ``alert_boost`` for ``alert_ttl``
+    seconds after it raised an alert. Intervals are clamped to
+    [``min_interval``, ``max_interval``], so quiet symbols are still polled
+    and volatile ones cannot starve the rest.
+    """
+
+    def __init__(self, symbols, rpm=RATE_LIMIT_PER_MINUTE * POLL_BUDGET_SHARE,
+                 min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+                 min_volatility=0.05, alert_boost=4.0, alert_ttl=300.0):
+        self.rpm = rpm
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.min_volatility = min_volatility
+        self.alert_boost = alert_boost
+        self.alert_ttl = alert_ttl
+        self.volatility = {}
+        self.alert_until = {}
+        self.intervals = {}
+        self.polls = defaultdict(int)
+        self.next_at = {}
+        self._heap = []
+        now = time.monotonic()
+        # Spread the first round over the budget instead of a thundering herd
+        spacing = 60.0 / rpm if rpm else 0.0
+        for i, symbol in enumerate(symbols):
+            self.volatility[symbol] = self.min_volatility
+            self._schedule(symbol, now + i * spacing)
+
+    def _schedule(self, symbol, at):
+        self.next_at[symbol] = at
+        heapq.heappush(self._heap, (at, symbol))
+
+    def _weight(self, symbol, now):
+        weight = self.volatility[symbol]
+        if self.alert_until.get(symbol, 0) > now:
+            weight *= self.alert_boost
+        return weight
+
+    def interval(self, symbol, now=None):
+        """Seconds until ``symbol`` should be polled again."""
+        now = now if now is not None else time.monotonic()
+        total = sum(self._weight(s, now) for s in self.volatility)
+        rate = self.rpm / 60.0 * self._weight(symbol, now) / total  # polls per second
+        return min(self.max_interval, max(self.min_interval, 1.0 / rate if rate else self.max_interval))
+
+    @staticmethod
+    def realized_volatility(prices):
+        returns = [(b - a) / a * 100 for a, b in zip(prices, prices[1:]) if a]
+        if len(returns) < 2:
+            return None
+        mean = sum(returns) / len(returns)
+        return math.sqrt(sum((r - mean) ** 2 for r in returns) / (len(returns) - 1))
+
+    def due(self):
+        """(seconds until the next poll, symbols due now)."""
+        now = time.monotonic()
+        symbols = []
+        while self._heap and self._heap[0][0] <= now:
+            at, symbol = heapq.heappop(self._heap)
+            if self.next_at.get(symbol) == at:  # skip entries superseded by a reschedule
+                del self.next_at[symbol]
+                symbols.append(symbol)
+        wait = self._heap[0][0] - now if self._heap else self.max_interval
+        return max(0.0, wait), symbols
+
+    def polled(self, symbol, price_history=None):
+        """Record a poll of ``symbol`` and schedule the next one."""
+        now = time.monotonic()
+        self.polls[symbol] += 1
+        if price_history:
+            volatility = self.realized_volatility(list(price_history))
+            if volatility is not None:
+                self.volatility[symbol] = max(self.min_volatility, volatility)
+        self.intervals[symbol] = self.interval(symbol, now)
+        self._schedule(symbol, now + self.intervals[symbol])
+
+    def alert(self, symbol):
+        """Boost ``symbol`` for ``alert_ttl`` seconds and poll it as soon as the budget allows."""
+        now = time.monotonic()
+        self.alert_until[symbol] = now + self.alert_ttl
+        if symbol in self.next_at:
+            self._schedule(symbol, min(self.next_at[symbol], now + self.min_interval))
+
+    def stats(self):
+        """Planned vs. budgeted requests/minute and how polls are spread across symbols."""
+        now = time.monotonic()
+        total_polls = sum(self.polls.values())
+        per_symbol = {
+            symbol: {
+                "interval": round(self.intervals.get(symbol, self.interval(symbol, now)), 1),
+                "volatility": round(self.volatility[symbol], 3),
+                "alerted": self.alert_until.get(symbol, 0) > now,
+                "polls": self.polls[symbol],
+                "quota_share": round(self.polls[symbol] / total_polls, 3) if total_polls else 0.0,
+            }
+            for symbol in self.volatility
+        }
+        return {
+            "budget_rpm": self.rpm,
+            "planned_rpm": round(sum(60.0 / v["interval"] for v in per_symbol.values()), 1),
+            "polls": total_polls,
+            "symbols": per_symbol,
+        }
+
+def _log_stock_data(stock_data):
+    logger.info(f"Yielding data for {stock_data['symbol']}:")
+    logger.info(f"  Price: ${stock_data['price']:.2f}")
+    logger.info(f"  History: {list(stock_data['price_history'])}")
+    logger.info(f"  Volume: {stock_data.get('volume', 'N/A')}")
+    logger.info(f"  Change %: {stock_data.get('change_percent', 'N/A')}")
+
+async def stream_stock_data(interval=10, symbols=None, batch=True, manager=None):
+    """
+    Continuously stream live stock data with price history.
+
+    With ``batch=True`` each cycle fetches all symbols concurrently and yields
+    them in completion order; otherwise symbols are fetched one by one.
+    """
+    symbols = symbols or STOCKS
+    logger.info(f"Starting stock data stream with {len(symbols)} symbols, interval: {interval}s")
+    async with manager or LiveStockDataManager() as manager:
         while True:
             logger.info("Fetching new batch of stock data...")
-            for symbol in STOCKS:
-                stock_data = await manager.fetch_stock_price(symbol)
-                if stock_data:
-                    logger.info(f"Yielding data for {symbol}:")
-                    logger.info(f"  Price: ${stock_data['price']:.2f}")
-                    logger.info(f"  History: {stock_data['price_history']}")
-                    logger.info(f"  Volume: {stock_data.get('volume', 'N/A')}")
-                    logger.info(f"  Change %: {stock_data.get('change_percent', 'N/A')}")
+            if batch:
+                async for stock_data in manager.fetch_batch(symbols):
+                    _log_stock_data(stock_data)
                     yield stock_data
-                else:
-                    logger.warning(f"No data received for {symbol}")
+            else:
+                for symbol in symbols:
+                    stock_data = await manager.fetch_stock_price(symbol)
+                    if stock_data:
+                        _log_stock_data(stock_data)
+                        yield stock_data
+                    else:
+                        logger.warning(f"No data received for {symbol}")
             logger.info(f"Sleeping for {interval} seconds...")
             await asyncio.sleep(interval)
+
+async def stream_stock_data_adaptive(symbols=None, scheduler=None, manager=None):
+    """
+    Stream live quotes polled on each symbol's own volatility-driven schedule.
+
+    Pass a ``scheduler`` to call ``scheduler.alert(symbol)`` from the alert
+    sink, which shortens that symbol's polling interval.
+    """
+    symbols = symbols or STOCKS
+    scheduler = scheduler or AdaptivePollScheduler(symbols)
+    logger.info(f"Starting adaptive stock data stream with {len(symbols)} symbols, "
+                f"budget {scheduler.rpm:.0f} requests/min")
+    async with manager or LiveStockDataManager() as manager:
+        while True:
+            wait, due = scheduler.due()
+            if not due:
+                await asyncio.sleep(wait)
+                continue
+            polled = set()
+            try:
+                async for stock_data in manager.fetch_batch(due):
+                    polled.add(stock_data["symbol"])
+                    scheduler.polled(stock_data["symbol"], stock_data["price_history"])
+                    _log_stock_data(stock_data)
+                    yield stock_data
+            finally:
+                # Failed quotes keep their current cadence
+                for symbol in due:
+                    if symbol not in polled:
+                        scheduler.polled(symbol)
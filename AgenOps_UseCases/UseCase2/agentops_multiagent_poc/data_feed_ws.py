@@ -0,0 +1,198 @@
+"""
+Push-based trade ingestion from the Finnhub WebSocket.
+
+Instead of polling quotes, ``TradeStreamManager`` subscribes to trades and
+coalesces them per symbol into ticks shaped like ``data_feed_live``'s, so
+the watcher sees a move within ``coalesce`` seconds of the trade.
+"""
+import aiohttp
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from data_feed_live import API_KEY, MAX_HISTORY, STOCKS
+from metrics import ERRORS, FEED_LATENCY
+from ticks import HistoryStore, Tick
+
+logger = logging.getLogger('TradeStream')
+
+WS_URL = os.getenv("FINNHUB_WS_URL", "wss://ws.finnhub.io")
+# Trades per symbol within this window are merged into one tick (seconds)
+COALESCE_INTERVAL = float(os.getenv("FINNHUB_WS_COALESCE", "0.5"))
+RECONNECT_MIN_BACKOFF = 1.0  # seconds, doubled after each failed attempt
+RECONNECT_MAX_BACKOFF = 60.0
+
+
+class TradeStreamManager:
+    def __init__(self, url=WS_URL, token=API_KEY, coalesce=COALESCE_INTERVAL,
+                 min_backoff=RECONNECT_MIN_BACKOFF, max_backoff=RECONNECT_MAX_BACKOFF):
+        self.url = url
+        self.token = token
+        self.coalesce = coalesce
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.price_history = HistoryStore(MAX_HISTORY)
+        self.session_open = {}  # symbol -> first traded price, the reference for change_percent
+        self.symbols = set()
+        self._ws = None
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.trades = 0
+        self.malformed = 0
+        self.ticks = 0
+
+    async def subscribe(self, symbol):
+        """Add ``symbol``; it is (re)subscribed on every connection."""
+        self.symbols.add(symbol)
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.send_str(json.dumps({"type": "subscribe", "symbol": symbol}))
+
+    async def unsubscribe(self, symbol):
+        self.symbols.discard(symbol)
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.send_str(json.dumps({"type": "unsubscribe", "symbol": symbol}))
+
+    def _tick(self, symbol, price, volume, trades, trade_time):
+        history = self.price_history.push(symbol, price)
+        reference = self.session_open.setdefault(symbol, price)
+        change_percent = (price - reference) / reference * 100 if reference > 0 else 0
+        self.ticks += 1
+        return Tick(
+            symbol,
+            price,
+            history.view(),
+            timestamp=trade_time,  # time of the latest coalesced trade (s)
+            volume=volume,
+            change_pct=change_percent,
+            trades=trades,
+        )
+
+    @staticmethod
+    def _parse_trade(trade):
+        """(symbol, price, volume, trade time in s) of one trade; raises on a malformed trade."""
+        symbol, volume = trade["s"], trade.get("v", 0)
+        if not isinstance(symbol, str) or not isinstance(volume, (int, float)):
+            raise TypeError(f"bad symbol {symbol!r} or volume {volume!r}")
+        return symbol, float(trade["p"]), volume, trade["t"] / 1000
+
+    def _skip(self, what, data, error):
+        """Count and log a malformed message or trade; the connection stays open."""
+        self.malformed += 1
+        ERRORS.inc(component="feed_ws")
+        logger.warning(f"Skipping malformed {what} ({error!r}): {str(data)[:200]}")
+
+    async def _receive(self, ws):
+        """Yield coalesced ticks until the socket closes."""
+        pending = {}  # symbol -> [price, volume, trades, trade_time]
+        flush_at = None
+        while True:
+            timeout = max(0.0, flush_at - time.monotonic()) if pending else None
+            try:
+                msg = await ws.receive(timeout=timeout)
+            except asyncio.TimeoutError:
+                msg = None
+            if msg is not None and msg.type == aiohttp.WSMsgType.TEXT:
+                self.messages += 1
+                try:
+                    message = json.loads(msg.data)
+                    kind = message.get("type")
+                    trades = message.get("data", []) if kind == "trade" else []
+                    if not isinstance(trades, list):
+                        raise TypeError(f"trade data is {type(trades).__name__}, not a list")
+                except (ValueError, AttributeError, TypeError) as e:
+                    self._skip("message", msg.data, e)
+                    kind = None
+                if kind == "trade":
+                    now = time.time()
+                    for trade in trades:
+                        self.trades += 1
+                        try:
+                            symbol, price, volume, trade_time = self._parse_trade(trade)
+                        except (KeyError, TypeError, ValueError) as e:
+                            self._skip("trade", trade, e)
+                            continue
+                        FEED_LATENCY.observe(max(0.0, now - trade_time), source="finnhub_ws")
+                        entry = pending.get(symbol)
+                        if entry is None:
+                            pending[symbol] = [price, volume, 1, trade_time]
+                        else:
+                            entry[0] = price
+                            entry[1] += volume
+                            entry[2] += 1
+                            entry[3] = trade_time
+                    if pending and flush_at is None:
+                        flush_at = time.monotonic() + self.coalesce
+                elif kind == "error":
+                    logger.error(f"Trade stream error: {message.get('msg')}")
+                    ERRORS.inc(component="feed_ws")
+            elif msg is not None and msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                                  aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                for symbol, (price, volume, trades, trade_time) in pending.items():
+                    yield self._tick(symbol, price, volume, trades, trade_time)
+                return
+            if pending and time.monotonic() >= flush_at:
+                batch, pending, flush_at = pending, {}, None
+                for symbol, (price, volume, trades, trade_time) in batch.items():
+                    yield self._tick(symbol, price, volume, trades, trade_time)
+
+    async def stream(self):
+        """Ticks for all subscribed symbols, reconnecting with exponential backoff."""
+        backoff = self.min_backoff
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    ws = await session.ws_connect(f"{self.url}?token={self.token}", heartbeat=30)
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
+                    ERRORS.inc(component="feed_ws")
+                    delay = backoff * random.uniform(0.5, 1.0)
+                    logger.error(f"Trade stream connect failed: {e!r}; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+
+                self.connects += 1
+                if self.connects > 1:
+                    self.reconnects += 1
+                backoff = self.min_backoff
+                self._ws = ws
+                logger.info(f"Trade stream connected, subscribing to {len(self.symbols)} symbols")
+                try:
+                    for symbol in self.symbols:
+                        await ws.send_str(json.dumps({"type": "subscribe", "symbol": symbol}))
+                    async for tick in self._receive(ws):
+                        yield tick
+                except (aiohttp.ClientError, ConnectionError) as e:
+                    ERRORS.inc(component="feed_ws")
+                    logger.error(f"Trade stream failed: {e!r}")
+                finally:
+                    self._ws = None
+                    await ws.close()
+                delay = backoff * random.uniform(0.5, 1.0)
+                logger.warning(f"Trade stream disconnected, reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "connected": self._ws is not None and not self._ws.closed,
+            "symbols": len(self.symbols),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "trades": self.trades,
+            "malformed": self.malformed,
+            "ticks": self.ticks,
+        }
+
+
+async def stream_trades(symbols=None, manager=None):
+    """Push counterpart of ``data_feed_live.stream_stock_data``."""
+    manager = manager or TradeStreamManager()
+    for symbol in symbols or STOCKS:
+        await manager.subscribe(symbol)
+    logger.info(f"Starting trade stream with {len(manager.symbols)} symbols, "
+                f"coalescing every {manager.coalesce}s")
+    async for tick in manager.stream():
+        yield tick
@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from rate_limit import TokenBucket
+
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))  # requests per minute; 0 = unlimited
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))  # tokens per minute; 0 = unlimited
+BURST_SECONDS = 5  # budget that may be spent at once after an idle period
+
+
+class Shed(Exception):
+    """The request's deadline passed while it waited for LLM budget."""
+
+
+def severity(pct_change, z_score):
+    """How anomalous a tick is, relative to the 3% move / z > 2 thresholds the prompts use."""
+    return max(abs(pct_change) / 3.0, abs(z_score) / 2.0)
+
+
+class LLMDispatcher:
+    """
+    Grants LLM calls in severity order within concurrency, RPM and TPM budgets.
+
+    Waiting requests sit on a max-heap keyed by priority (FIFO among equal
+    priorities). A request is granted once a concurrency slot is free and
+    both token buckets can cover it; requests whose deadline passes while
+    they wait are shed with ``Shed`` instead of spending budget on stale
+    ticks. Token costs are estimates, so set ``tpm`` with some headroom.
+    """
+
+    def __init__(self, concurrency=4, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.concurrency = concurrency
+        self.rpm = TokenBucket(rpm / 60.0, max(1.0, rpm / 60.0 * BURST_SECONDS)) if rpm else None
+        self.tpm = TokenBucket(tpm / 60.0, max(1.0, tpm / 60.0 * BURST_SECONDS)) if tpm else None
+        self.in_flight = 0
+        self._heap = []  # (-priority, seq, future, tokens, deadline)
+        self._seq = itertools.count()
+        self._timer = None
+        self.granted = 0
+        self.shed = 0
+        self.wait_total = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def from_env(cls):
+        from llm_client import LLM_CONCURRENCY
+        return cls(concurrency=LLM_CONCURRENCY)
+
+    def _wait_time(self, tokens):
+        wait = self.rpm.wait_time(1) if self.rpm else 0.0
+        if self.tpm:
+            wait = max(wait, self.tpm.wait_time(tokens))
+        return wait
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        if any(entry[4] is not None and entry[4] <= now for entry in self._heap):
+            live = []
+            for entry in self._heap:
+                if entry[4] is not None and entry[4] <= now:
+                    if not entry[2].done():
+                        entry[2].set_exception(Shed())
+                        self.shed += 1
+                else:
+                    live.append(entry)
+            heapq.heapify(live)
+            self._heap = live
+
+        wait = 0.0
+        while self._heap and self.in_flight < self.concurrency:
+            _, _, future, tokens, _ = self._heap[0]
+            if future.done():  # caller gave up
+                heapq.heappop(self._heap)
+                continue
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                break
+            heapq.heappop(self._heap)
+            if self.rpm:
+                self.rpm.try_acquire(1)
+            if self.tpm:
+                self.tpm.try_acquire(min(tokens, self.tpm.capacity))
+            self.in_flight += 1
+            future.set_result(None)
+
+        if self._heap:
+            deadlines = [entry[4] - now for entry in self._heap if entry[4] is not None]
+            delays = deadlines + ([wait] if wait > 0 else [])
+            if delays:
+                self._timer = asyncio.get_running_loop().call_later(max(0.0, min(delays)), self._dispatch)
+
+    async def acquire(self, priority=0.0, tokens=0, deadline=None):
+        """Wait for budget; ``deadline`` is a time.monotonic() value, raises Shed once passed."""
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (-priority, next(self._seq), future, tokens, deadline))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()  # granted just as the caller was cancelled
+            raise
+        waited = time.monotonic() - started
+        self.granted += 1
+        self.wait_total += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority=0.0, tokens=0, deadline=None):
+        await self.acquire(priority, tokens, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "waiting": len(self._heap),
+            "in_flight": self.in_flight,
+            "granted": self.granted,
+            "shed": self.shed,
+            "avg_wait": self.wait_total / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+from pathlib import Path
+from metrics import ERRORS, LLM_LATENCY
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to ~4 characters per token
+    tiktoken = None
+
+# Load environment variables from .env
+env_path = Path(__file__).parent / '.env'
+load_dotenv(dotenv_path=env_path)
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # max requests in flight
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per call
+
+_client = None
+_semaphore = None
+_dispatcher = None
+_encodings = {}
+
+
+def get_client():
+    """Shared AsyncOpenAI client, created on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    return _semaphore
+
+
+def configure(concurrency=None, timeout=None, client=None, dispatcher=None):
+    """
+    Override the concurrency limit, per-call timeout or client.
+
+    A ``dispatcher`` (e.g. ``llm_budget.LLMDispatcher``) replaces the
+    first-come-first-served concurrency limit with its own admission policy.
+    """
+    global LLM_CONCURRENCY, LLM_TIMEOUT, _client, _semaphore, _dispatcher
+    if concurrency is not None:
+        LLM_CONCURRENCY = concurrency
+        _semaphore = None
+    if timeout is not None:
+        LLM_TIMEOUT = timeout
+    if client is not None:
+        _client = client
+    if dispatcher is not None:
+        _dispatcher = dispatcher
+
+
+def count_tokens(text, model="gpt-4"):
+    """Prompt tokens of ``text`` for ``model`` with tiktoken, or ~4 characters per token without it."""
+    if tiktoken is None:
+        return len(text) // 4
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _encodings[model] = encoding
+    return len(encoding.encode(text))
+
+
+def estimate_tokens(kwargs):
+    """Rough upper bound of a request's tokens: ~4 characters per prompt token plus max_tokens."""
+    prompt = sum(len(m.get("content") or "") for m in kwargs.get("messages", ()))
+    return prompt // 4 + kwargs.get("max_tokens", 0)
+
+
+def _admission(priority, deadline, kwargs):
+    if _dispatcher is not None:
+        return _dispatcher.slot(priority, estimate_tokens(kwargs), deadline)
+    return get_semaphore()
+
+
+async def chat_completion(timeout=None, agent="unknown", priority=0.0, deadline=None, **kwargs):
+    """
+    Create a chat completion without blocking the event loop.
+
+    At most LLM_CONCURRENCY calls are in flight across all agents; each call
+    is cancelled with asyncio.TimeoutError after ``timeout`` seconds. Call
+    latency (excluding the wait for a concurrency slot) is recorded per
+    ``agent`` and model. ``priority`` and ``deadline`` are passed to the
+    configured dispatcher, if any.
+    """
+    async with _admission(priority, deadline, kwargs):
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(
+                get_client().chat.completions.create(**kwargs),
+                timeout if timeout is not None else LLM_TIMEOUT,
+            )
+        except Exception:
+            ERRORS.inc(component="llm")
+            raise
+        finally:
+            LLM_LATENCY.observe(time.monotonic() - started, agent=agent, model=kwargs.get("model", ""))
+
+
+async def _close_stream(stream):
+    # Instrumentation wrappers (e.g. AgentOps) may not forward close()
+    while not hasattr(stream, "close") and hasattr(stream, "_stream"):
+        stream = stream._stream
+    if hasattr(stream, "close"):
+        await stream.close()
+
+
+async def stream_completion(timeout=None, agent="unknown", priority=0.0, deadline=None, **kwargs):
+    """
+    Stream a chat completion, yielding content deltas as they arrive.
+
+    Shares the concurrency limit and ``timeout`` (for the whole stream) with
+    ``chat_completion``. Closing the generator early, e.g. with
+    ``contextlib.aclosing`` after a ``break``, closes the HTTP stream so the
+    remaining tokens are not generated.
+    """
+    async with _admission(priority, deadline, kwargs):
+        started = time.monotonic()
+        deadline = started + (timeout if timeout is not None else LLM_TIMEOUT)
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                get_client().chat.completions.create(stream=True, **kwargs),
+                deadline - time.monotonic(),
+            )
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), deadline - time.monotonic())
+                except StopAsyncIteration:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception:
+            ERRORS.inc(component="llm")
+            raise
+        finally:
+            if stream is not None:
+                await _close_stream(stream)
+            LLM_LATENCY.observe(time.monotonic() - started, agent=agent, model=kwargs.get("model", ""))
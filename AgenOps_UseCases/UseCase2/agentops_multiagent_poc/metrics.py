@@ -0,0 +1,218 @@
+"""
+In-process metrics exported in the Prometheus text format.
+
+Counters, gauges and histograms live in a module-level ``registry``;
+``start_metrics_server`` serves them at ``/metrics`` from the app's own
+event loop:
+
+    curl localhost:9100/metrics
+"""
+import bisect
+import math
+from aiohttp import web
+
+# Seconds; covers sub-millisecond local work up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. ticks processed."""
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, e.g. queue depth.
+
+    ``track`` registers a callable that is sampled at scrape time instead of
+    being set explicitly.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def track(self, function, **labels):
+        self._functions[self._key(labels)] = function
+
+    def value(self, **labels):
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def _samples(self):
+        values = dict(self._values)
+        for key, function in self._functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                continue  # a broken sampler must not break the scrape
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts plus sum and count of observed values."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def _samples(self):
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, hits in zip(self.buckets, series):
+                cumulative += hits
+                labels = _format_labels(self.labels, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, key, [("le", "+Inf")])
+            yield f"{self.name}_bucket{labels} {series[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {series[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labels != metric.labels:
+                raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Shared by both AgentOps apps so dashboards work against either
+FEED_LATENCY = registry.histogram(
+    "feed_fetch_seconds", "Time to fetch or generate one tick", ("source",))
+LLM_LATENCY = registry.histogram(
+    "llm_call_seconds", "Chat completion latency", ("agent", "model"))
+TIME_TO_VERDICT = registry.histogram(
+    "llm_time_to_verdict_seconds", "Time until the LLM verdict is known", ("agent", "mode"))
+TICK_TO_ALERT = registry.histogram(
+    "tick_to_alert_seconds", "Time from tick arrival to the alert being emitted")
+TICKS = registry.counter("ticks_total", "Ticks received from the feed")
+ALERTS = registry.counter("alerts_total", "Alerts emitted")
+ERRORS = registry.counter("errors_total", "Errors by component", ("component",))
+SKIPPED = registry.counter(
+    "llm_calls_skipped_total", "Ticks settled without an LLM call", ("agent", "reason"))
+QUEUE_DEPTH = registry.gauge("queue_depth", "Items waiting or in flight", ("queue",))
+
+
+async def handle_metrics(request):
+    # The Prometheus text exposition format, version 0.0.4
+    return web.Response(text=registry.render(), content_type="text/plain; version=0.0.4", charset="utf-8")
+
+
+async def start_metrics_server(host="127.0.0.1", port=9100):
+    """
+    Serve ``/metrics`` in the background; returns the AppRunner to clean up.
+    Listens on localhost only unless ``host`` says otherwise (e.g. "0.0.0.0").
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
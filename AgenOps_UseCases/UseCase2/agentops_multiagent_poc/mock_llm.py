@@ -0,0 +1,68 @@
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+
+PCT_CHANGE = re.compile(r"Percentage Change: (-?[\d.]+)%")
+Z_SCORE = re.compile(r"Z-Score \(deviation from mean\): (-?[\d.]+)")
+BATCH_ROWS = re.compile(r"Ticks \(JSON\):\s*(\[.*?\])\s*\n", re.DOTALL)
+
+
+def _flag(pct_change, z_score, pct_threshold=3.0, z_threshold=2.0):
+    return abs(pct_change) > pct_threshold or abs(z_score) > z_threshold
+
+
+def monitor_responder(messages):
+    """
+    Rule-based stand-in for the watcher and analyzer prompts.
+
+    Watcher prompts are answered YES/NO (or a JSON verdict array for batched
+    prompts) using the same thresholds the prompt suggests; anything else is
+    treated as an analyzer prompt and gets a canned risk assessment.
+    """
+    prompt = messages[-1]["content"]
+    rows = BATCH_ROWS.search(prompt)
+    if rows:
+        return json.dumps([
+            {"id": row["id"], "flag": _flag(row["pct_change"], row["z_score"]), "reason": "mock"}
+            for row in json.loads(rows.group(1))
+        ])
+    pct, z = PCT_CHANGE.search(prompt), Z_SCORE.search(prompt)
+    if "Reply with either" in prompt and pct and z:
+        if _flag(float(pct.group(1)), float(z.group(1))):
+            return "YES - movement exceeds normal thresholds"
+        return "NO"
+    return ("RISK LEVEL: Medium\nCAUSE: Mock assessment\n"
+            "IMPACT: Mock assessment\nACTION: Continue monitoring")
+
+
+class MockChatClient:
+    """
+    In-process stand-in for AsyncOpenAI's ``chat.completions`` API.
+
+    ``responder(messages)`` produces the reply text and ``latency`` seconds
+    are slept per call. Plug it in with ``llm_client.configure(client=...)``.
+    """
+
+    def __init__(self, responder=monitor_responder, latency=0.0):
+        self.responder = responder
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model=None, messages=(), **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self.responder(messages)
+        return SimpleNamespace(
+            id=f"mock-{self.calls}",
+            created=int(time.time()),
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=content),
+                finish_reason="stop",
+            )],
+        )
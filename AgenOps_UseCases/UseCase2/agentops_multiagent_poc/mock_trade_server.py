@@ -0,0 +1,141 @@
+"""
+Local stand-in for the Finnhub trade WebSocket and quote REST API.
+
+Prices follow a seeded random walk with occasional jumps. Subscribed
+WebSocket clients receive ``{"type": "trade", "data": [...]}`` messages,
+and ``GET /api/v1/quote?symbol=...`` returns the latest price, so the push
+and poll feeds can be compared against the same market:
+
+    python mock_trade_server.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from aiohttp import web, WSMsgType
+
+DEFAULT_TRADE_RATE = 5.0  # trades per symbol per second
+DEFAULT_JUMP_PROB = 0.002  # chance per trade of a 4-10% jump
+
+
+class MockTradeServer:
+    def __init__(self, trade_rate=DEFAULT_TRADE_RATE, jump_prob=DEFAULT_JUMP_PROB, seed=None):
+        self.trade_rate = trade_rate
+        self.jump_prob = jump_prob
+        self.rng = random.Random(seed)
+        self.prices = {}       # symbol -> latest price
+        self.prev_close = {}   # symbol -> first price seen
+        self.trade_times = {}  # symbol -> latest trade time (s)
+        self.jumps = []        # (symbol, time, price) of every injected jump
+        self.clients = {}      # websocket -> set of subscribed symbols
+        self._ticker = None
+        self.runner = None
+
+    def _price(self, symbol):
+        if symbol not in self.prices:
+            self.prices[symbol] = self.prev_close[symbol] = round(self.rng.uniform(100, 500), 2)
+            self.trade_times[symbol] = time.time()
+        return self.prices[symbol]
+
+    def _trade(self, symbol):
+        price = self._price(symbol)
+        now = time.time()
+        if self.rng.random() < self.jump_prob:
+            price *= 1 + self.rng.choice([-1, 1]) * self.rng.uniform(0.04, 0.10)
+            self.jumps.append((symbol, now, round(price, 2)))
+        else:
+            price *= 1 + self.rng.gauss(0, 0.001)
+        self.prices[symbol] = round(price, 2)
+        self.trade_times[symbol] = now
+        return {"s": symbol, "p": self.prices[symbol], "t": int(now * 1000),
+                "v": self.rng.randint(1, 500)}
+
+    async def _run_market(self):
+        """Generate trades for every subscribed symbol and push them to subscribers."""
+        interval = 1.0 / self.trade_rate
+        while True:
+            symbols = set().union(*self.clients.values()) if self.clients else set()
+            trades = {symbol: self._trade(symbol) for symbol in symbols}
+            for ws, subscribed in list(self.clients.items()):
+                data = [trades[s] for s in subscribed if s in trades]
+                if data and not ws.closed:
+                    try:
+                        await ws.send_str(json.dumps({"type": "trade", "data": data}))
+                    except ConnectionError:
+                        pass
+            await asyncio.sleep(interval)
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.clients[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                message = json.loads(msg.data)
+                if message.get("type") == "subscribe":
+                    self._price(message["symbol"])
+                    self.clients[ws].add(message["symbol"])
+                elif message.get("type") == "unsubscribe":
+                    self.clients[ws].discard(message["symbol"])
+        finally:
+            self.clients.pop(ws, None)
+        return ws
+
+    async def handle_quote(self, request):
+        symbol = request.query.get("symbol", "")
+        price = self._price(symbol)
+        return web.json_response({
+            "c": price,
+            "pc": self.prev_close[symbol],
+            "t": int(self.trade_times[symbol]),
+            "v": 0,
+        })
+
+    async def drop_connections(self):
+        """Close every client socket, e.g. to exercise reconnects."""
+        for ws in list(self.clients):
+            await ws.close()
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle_ws)
+        app.router.add_get("/api/v1/quote", self.handle_quote)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving; returns (ws_url, rest_base_url)."""
+        self.runner = web.AppRunner(self.create_app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        port = self.runner.addresses[0][1]
+        self._ticker = asyncio.create_task(self._run_market())
+        return f"ws://{host}:{port}/", f"http://{host}:{port}/api/v1"
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+        await self.drop_connections()
+        if self.runner:
+            await self.runner.cleanup()
+
+
+async def main(args):
+    server = MockTradeServer(args.trade_rate, args.jump_prob, args.seed)
+    ws_url, rest_url = await server.start(port=args.port)
+    print(f"Trade WebSocket at {ws_url}, quotes at {rest_url}/quote")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Finnhub-compatible trade/quote server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--trade-rate", type=float, default=DEFAULT_TRADE_RATE)
+    parser.add_argument("--jump-prob", type=float, default=DEFAULT_JUMP_PROB)
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(main(parser.parse_args()))
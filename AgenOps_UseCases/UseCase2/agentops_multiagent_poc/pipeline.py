@@ -0,0 +1,330 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import traceback
+from alert_state import ANALYZE, SUPPRESS
+from llm_budget import Shed, severity
+from metrics import ALERTS, ERRORS, QUEUE_DEPTH, TICK_TO_ALERT, TICKS
+
+logger = logging.getLogger('Pipeline')
+
+# What a stage does with a new item when its queue is full
+BLOCK = "block"              # wait for space (backpressure on the producer)
+DROP_NEWEST = "drop_newest"  # discard the incoming item
+DROP_OLDEST = "drop_oldest"  # discard the oldest queued item to make room
+POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+
+class StageStats:
+    """Counters and latency totals for one pipeline stage."""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.expired = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.service_total = 0.0
+        self.latency_max = 0.0
+
+    def snapshot(self, depth):
+        done = self.processed or 1
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "expired": self.expired,
+            "errors": self.errors,
+            "avg_wait": self.wait_total / done,
+            "avg_service": self.service_total / done,
+            "max_latency": self.latency_max,
+        }
+
+
+class StageQueue(asyncio.PriorityQueue):
+    """Priority queue of (key, seq, ...) entries that can also evict its least urgent entry."""
+
+    def pop_least_urgent(self):
+        # Largest key is least urgent; among equals the oldest (smallest seq) goes first
+        entry = max(self._queue, key=lambda e: (e[0], -e[1]))
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+        return entry
+
+
+class Stage:
+    """
+    Bounded queue drained by a pool of workers.
+
+    ``handler`` is an async callable taking one item and the time it entered
+    the pipeline. With ``batch_size`` > 1 a worker takes up to that many
+    already-queued items at once and the handler receives two lists instead.
+    Items older than ``max_age`` seconds (measured from when they entered
+    the pipeline) are discarded instead of being handled.
+
+    Items are served first in, first out unless ``priority`` is given: a
+    function of the item whose highest values are served first (and, with
+    DROP_OLDEST, whose lowest values are dropped first).
+
+    ``on_discard(item)`` is called for every item that is dropped, expires,
+    is shed or fails instead of being handled.
+    """
+
+    def __init__(self, name, handler, workers=1, maxsize=100, policy=BLOCK, max_age=None,
+                 batch_size=1, priority=None, on_discard=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}; expected one of {POLICIES}")
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.policy = policy
+        self.max_age = max_age
+        self.priority = priority
+        self.on_discard = on_discard
+        self.queue = StageQueue(maxsize=maxsize)
+        self._seq = itertools.count()
+        self.stats = StageStats()
+        self._tasks = []
+        QUEUE_DEPTH.track(self.queue.qsize, queue=name)
+
+    async def put(self, item, started=None):
+        """Enqueue ``item``; returns False if the policy dropped it."""
+        key = -self.priority(item) if self.priority else 0
+        entry = (key, next(self._seq), time.monotonic(), started or time.monotonic(), item)
+        if self.queue.full():
+            if self.policy == DROP_NEWEST:
+                self.stats.dropped += 1
+                self._discard(item)
+                return False
+            if self.policy == DROP_OLDEST:
+                self._discard(self.queue.pop_least_urgent()[4])
+                self.queue.task_done()
+                self.stats.dropped += 1
+        await self.queue.put(entry)
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.queue.qsize())
+        return True
+
+    def _discard(self, item):
+        if self.on_discard:
+            self.on_discard(item)
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            entries = [await self.queue.get()]
+            while len(entries) < self.batch_size and not self.queue.empty():
+                entries.append(self.queue.get_nowait())
+            try:
+                dequeued_at = time.monotonic()
+                live = []
+                for entry in entries:
+                    if self.max_age is not None and dequeued_at - entry[3] > self.max_age:
+                        self.stats.expired += 1
+                        self._discard(entry[4])
+                    else:
+                        live.append(entry)
+                if not live:
+                    continue
+                if self.batch_size > 1:
+                    await self.handler([e[4] for e in live], [e[3] for e in live])
+                else:
+                    await self.handler(live[0][4], live[0][3])
+                done_at = time.monotonic()
+                for _, _, enqueued_at, _, _ in live:
+                    self.stats.processed += 1
+                    self.stats.wait_total += dequeued_at - enqueued_at
+                    self.stats.service_total += done_at - dequeued_at
+                    self.stats.latency_max = max(self.stats.latency_max, done_at - enqueued_at)
+            except Shed:
+                # The deadline passed while waiting for LLM budget
+                self.stats.expired += 1
+                for entry in live:
+                    self._discard(entry[4])
+            except Exception as e:
+                self.stats.errors += 1
+                for entry in live:
+                    self._discard(entry[4])
+                ERRORS.inc(component=self.name)
+                logger.error(f"{self.name} worker failed: {e}")
+                logger.debug(traceback.format_exc())
+            finally:
+                for _ in entries:
+                    self.queue.task_done()
+
+    def snapshot(self):
+        return self.stats.snapshot(self.queue.qsize())
+
+
+class AlertPipeline:
+    """
+    feed → watcher workers → analyzer workers → sink.
+
+    A slow analysis no longer stalls detection of later ticks: each agent
+    has its own bounded queue and worker pool. By default the watcher queue
+    applies backpressure to the feed, while the analyzer queue drops the
+    oldest alerts and expires alerts older than ``max_alert_age`` so alert
+    latency stays bounded during bursts.
+
+    With ``watcher_batch_size`` > 1, watcher workers hand up to that many
+    queued ticks to ``WatcherAgent.detect_batch`` in one LLM request.
+
+    Alerts are analyzed most severe first (by % change and z-score), and
+    LLM calls carry that severity and a deadline (``max_alert_age``, or
+    ``watcher_max_age`` for watcher calls) so a budgeted dispatcher in
+    ``llm_client`` can prioritize them and shed stale ones.
+
+    With an ``alert_state`` (``alert_state.AlertStateMachine``), repeat
+    alerts for a symbol that is already alerted or cooling down skip the
+    analyzer unless the move escalates; they reach the sink with
+    ``watch_result["suppressed"]`` set. An analysis the state machine
+    granted is confirmed once the analyzer returns and cancelled if the
+    alert is dropped, expires, is shed or fails first.
+
+    ``sink(tick, watch_result, analysis)`` receives every watcher result
+    (``analysis`` is None for ticks that were not escalated) and may be a
+    plain function or a coroutine function. ``on_drop(tick)`` is called
+    instead for a tick that never reaches the sink: dropped or expired in
+    a queue, shed, or failed.
+    """
+
+    def __init__(self, watcher, analyzer, sink,
+                 watcher_workers=4, analyzer_workers=2,
+                 watcher_queue=100, analyzer_queue=20,
+                 watcher_policy=BLOCK, analyzer_policy=DROP_OLDEST,
+                 max_alert_age=60.0, watcher_batch_size=1, watcher_max_age=None,
+                 alert_state=None, on_drop=None):
+        self.watcher = watcher
+        self.analyzer = analyzer
+        self.sink = sink
+        self.on_drop = on_drop
+        watch_handler = self._watch_batch if watcher_batch_size > 1 else self._watch
+        self.watch_stage = Stage("watcher", watch_handler, watcher_workers,
+                                 watcher_queue, watcher_policy, batch_size=watcher_batch_size,
+                                 on_discard=self._drop)
+        self.analyze_stage = Stage("analyzer", self._analyze, analyzer_workers,
+                                   analyzer_queue, analyzer_policy, max_alert_age,
+                                   priority=self._severity, on_discard=self._discard_alert)
+        self.watcher_max_age = watcher_max_age
+        self.max_alert_age = max_alert_age
+        self.alert_state = alert_state
+        self.alerts = 0
+        self.alert_latency_total = 0.0
+        self.alert_latency_max = 0.0
+
+    @staticmethod
+    def _severity(item):
+        watch_result = item[1]
+        return severity(watch_result.get("pct_change", 0.0), watch_result.get("z_score", 0.0))
+
+    @staticmethod
+    def _deadline(started, max_age):
+        return started + max_age if max_age is not None else None
+
+    async def _emit(self, tick, watch_result, analysis):
+        result = self.sink(tick, watch_result, analysis)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def _route(self, tick, watch_result, started):
+        if watch_result and watch_result.get("shed"):
+            await self._emit(tick, watch_result, None)
+            return
+        now = time.monotonic()
+        decision = self.alert_state.observe_result(watch_result, now) if self.alert_state else None
+        if decision == SUPPRESS:
+            watch_result["suppressed"] = True
+            await self._emit(tick, watch_result, None)
+        elif watch_result and watch_result.get("alert"):
+            # (symbol, severity, time) of the analysis the state machine granted, settled by _analyze
+            claim = (watch_result["symbol"], self._severity((tick, watch_result)), now) if decision == ANALYZE else None
+            await self.analyze_stage.put((tick, watch_result, claim), started)
+        else:
+            await self._emit(tick, watch_result, None)
+
+    async def _watch(self, tick, started):
+        watch_result = await self.watcher.detect(tick, self._deadline(started, self.watcher_max_age))
+        await self._route(tick, watch_result, started)
+
+    async def _watch_batch(self, ticks, started):
+        results = await self.watcher.detect_batch(ticks, self._deadline(min(started), self.watcher_max_age))
+        for tick, watch_result, tick_started in zip(ticks, results, started):
+            await self._route(tick, watch_result, tick_started)
+
+    def _drop(self, tick):
+        if self.on_drop:
+            self.on_drop(tick)
+
+    def _discard_alert(self, item):
+        tick, _, claim = item
+        if claim:
+            self.alert_state.cancel(*claim)
+        self._drop(tick)
+
+    async def _analyze(self, item, started):
+        tick, watch_result, claim = item
+        analysis = await self.analyzer.analyze(
+            watch_result["context"],
+            priority=self._severity(item),
+            deadline=self._deadline(started, self.max_alert_age),
+        )
+        if claim:
+            self.alert_state.confirm(*claim)
+        latency = time.monotonic() - started
+        ALERTS.inc()
+        TICK_TO_ALERT.observe(latency)
+        self.alerts += 1
+        self.alert_latency_total += latency
+        self.alert_latency_max = max(self.alert_latency_max, latency)
+        await self._emit(tick, watch_result, analysis)
+
+    async def _report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(f"Pipeline stats: {self.stats()}")
+
+    async def run(self, feed, report_interval=None):
+        """Pump ``feed`` (an async iterator of ticks) through the pipeline."""
+        self.watch_stage.start()
+        self.analyze_stage.start()
+        reporter = asyncio.create_task(self._report(report_interval)) if report_interval else None
+        try:
+            async for tick in feed:
+                TICKS.inc()
+                await self.watch_stage.put(tick)
+            # Feed exhausted: let in-flight work finish
+            await self.watch_stage.queue.join()
+            await self.analyze_stage.queue.join()
+        finally:
+            if reporter:
+                reporter.cancel()
+            await self.watch_stage.stop()
+            await self.analyze_stage.stop()
+
+    def stats(self):
+        return {
+            "watcher": self.watch_stage.snapshot(),
+            "analyzer": self.analyze_stage.snapshot(),
+            "alerts": self.alerts,
+            "avg_alert_latency": self.alert_latency_total / self.alerts if self.alerts else 0.0,
+            "max_alert_latency": self.alert_latency_max,
+            **({"alert_state": self.alert_state.stats()} if self.alert_state else {}),
+        }
@@ -0,0 +1,164 @@
+"""
+Record and replay tick logs through the WatcherAgent/AnalyzerAgent pipeline.
+
+Record a reproducible simulated session (no API calls):
+
+    python replay.py record ticks --ticks 5000 --seed 42
+
+Replay it at 10x real time against the mock LLM:
+
+    python replay.py replay ticks --speed 10 --latency 0.2
+
+Live sessions are recorded by running app.py with TICK_LOG=<path>.
+``--speed 0`` replays as fast as possible; ``--llm openai`` uses the real API.
+"""
+import argparse
+import asyncio
+import time
+import llm_client
+from alert_state import AlertStateMachine
+from analyzer_agent import AnalyzerAgent
+from data_feed import StockDataGenerator, MAX_HISTORY
+from llm_budget import LLMDispatcher
+from mock_llm import MockChatClient
+from pipeline import AlertPipeline
+from tick_log import TickLog, TickLogWriter
+from ticks import HistoryStore, Tick
+from watcher_agent import WatcherAgent
+
+SIMULATED_TICK_INTERVAL = 2.0  # seconds between generator ticks
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def record_simulated(path, ticks, seed=None):
+    """Write ``ticks`` generator ticks to a tick log, spaced like the simulated stream."""
+    generator = StockDataGenerator(seed)
+    start = time.time()
+    with TickLogWriter(path) as writer:
+        for i in range(ticks):
+            symbol = generator.rng.choice(list(generator.price_history))
+            price = generator.get_next_price(symbol)
+            writer.append(symbol, price, start + i * SIMULATED_TICK_INTERVAL)
+
+
+def replay_ticks(log):
+    """Rebuild feed-shaped ticks (with price history) from a tick log."""
+    history = HistoryStore(MAX_HISTORY)
+    for symbol, timestamp, price in log:
+        yield timestamp, Tick(symbol, price, history.push(symbol, price).view())
+
+
+async def paced(log, speed, dispatched):
+    """Yield replayed ticks at ``speed``x the recorded pace, stamping dispatch times."""
+    first_ts = None
+    start = time.monotonic()
+    for timestamp, tick in replay_ticks(log):
+        if first_ts is None:
+            first_ts = timestamp
+        if speed:
+            delay = (timestamp - first_ts) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        dispatched[id(tick)] = time.monotonic()
+        yield tick
+
+
+async def replay(log, watcher, analyzer, speed=0.0, **pipeline_options):
+    """Feed a tick log through the alert pipeline and report throughput and latency."""
+    dispatched = {}
+    latencies = []
+
+    def sink(tick, watch_result, analysis):
+        started = dispatched.pop(id(tick), None)
+        if analysis is not None and started is not None:
+            latencies.append(time.monotonic() - started)
+
+    def drop(tick):
+        # Dropped, expired and shed ticks never reach the sink
+        dispatched.pop(id(tick), None)
+
+    pipeline = AlertPipeline(watcher, analyzer, sink, on_drop=drop, **pipeline_options)
+    start = time.monotonic()
+    await pipeline.run(paced(log, speed, dispatched))
+    elapsed = time.monotonic() - start
+    stats = pipeline.stats()
+    ticks = stats["watcher"]["enqueued"]
+
+    return {
+        "ticks": ticks,
+        "elapsed": elapsed,
+        "ticks_per_sec": ticks / elapsed if elapsed else 0.0,
+        "alerts": len(latencies),
+        "alerts_dropped": stats["analyzer"]["dropped"] + stats["analyzer"]["expired"],
+        "p50_alert_latency": percentile(latencies, 50),
+        "p99_alert_latency": percentile(latencies, 99),
+        "verdict_cache": watcher.cache.stats(),
+        **({"alert_state": stats["alert_state"]} if "alert_state" in stats else {}),
+    }
+
+
+async def main(args):
+    mock = None
+    if args.llm == "mock":
+        mock = MockChatClient(latency=args.latency)
+        llm_client.configure(client=mock)
+    dispatcher = None
+    if args.rpm or args.tpm:
+        dispatcher = LLMDispatcher(llm_client.LLM_CONCURRENCY, args.rpm, args.tpm)
+        llm_client.configure(dispatcher=dispatcher)
+    watcher = WatcherAgent()
+    analyzer = AnalyzerAgent()
+    with TickLog(args.path) as log:
+        print(f"Replaying {len(log)} ticks from {args.path} at "
+              f"{'max' if not args.speed else f'{args.speed:g}x'} speed")
+        report = await replay(log, watcher, analyzer, args.speed,
+                              watcher_workers=args.watcher_workers,
+                              analyzer_workers=args.analyzer_workers,
+                              watcher_batch_size=args.batch_size,
+                              watcher_max_age=args.watcher_max_age,
+                              max_alert_age=args.max_alert_age,
+                              alert_state=AlertStateMachine(args.cooldown) if args.dedup else None)
+    if mock:
+        report["llm_calls"] = mock.calls
+    if dispatcher:
+        report["llm_dispatcher"] = dispatcher.stats()
+    for key, value in report.items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and replay watcher/analyzer tick logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="record a simulated session")
+    rec.add_argument("path")
+    rec.add_argument("--ticks", type=int, default=5000)
+    rec.add_argument("--seed", type=int, default=None)
+    rep = commands.add_parser("replay", help="replay a tick log through the agents")
+    rep.add_argument("path")
+    rep.add_argument("--speed", type=float, default=0.0, help="x real time; 0 = as fast as possible")
+    rep.add_argument("--llm", choices=["mock", "openai"], default="mock")
+    rep.add_argument("--latency", type=float, default=0.0, help="mock LLM latency (s)")
+    rep.add_argument("--watcher-workers", type=int, default=4)
+    rep.add_argument("--analyzer-workers", type=int, default=2)
+    rep.add_argument("--batch-size", type=int, default=1, help="ticks per watcher request")
+    rep.add_argument("--rpm", type=float, default=0, help="LLM requests/minute budget (0 = unlimited)")
+    rep.add_argument("--tpm", type=float, default=0, help="LLM tokens/minute budget (0 = unlimited)")
+    rep.add_argument("--watcher-max-age", type=float, default=None,
+                     help="shed ticks waiting longer than this for the watcher LLM (s)")
+    rep.add_argument("--max-alert-age", type=float, default=60.0)
+    rep.add_argument("--dedup", action="store_true",
+                     help="suppress repeat alerts for symbols already alerted (alert_state.py)")
+    rep.add_argument("--cooldown", type=float, default=300.0, help="alert cooldown with --dedup (s)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_simulated(args.path, args.ticks, args.seed)
+        print(f"Recorded {args.ticks} ticks to {args.path}")
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+import agentops
+
+logger = logging.getLogger('Telemetry')
+
+TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000"))
+TELEMETRY_BATCH_SIZE = int(os.getenv("TELEMETRY_BATCH_SIZE", "100"))
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "2.0"))  # seconds
+TELEMETRY_FALLBACK = os.getenv("TELEMETRY_FALLBACK", "telemetry.jsonl")
+
+
+def agentops_export(name, payload):
+    agentops.tool(name=name)(payload)
+
+
+class TelemetryExporter:
+    """
+    Buffers tool events off the hot path and exports them in batches.
+
+    ``emit`` only appends to a bounded deque (the oldest events are dropped
+    when it is full). A background task flushes a batch whenever
+    ``batch_size`` events are waiting or ``flush_interval`` has elapsed,
+    running the exporter in a worker thread so a slow backend never blocks
+    the event loop. Events the exporter rejects are appended to a local
+    JSONL file instead.
+    """
+
+    def __init__(self, maxsize=TELEMETRY_QUEUE_SIZE, batch_size=TELEMETRY_BATCH_SIZE,
+                 flush_interval=TELEMETRY_FLUSH_INTERVAL, fallback_path=TELEMETRY_FALLBACK,
+                 export=agentops_export):
+        self.buffer = deque(maxlen=maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fallback_path = fallback_path
+        self.export = export
+        self.emitted = 0
+        self.exported = 0
+        self.dropped = 0
+        self.fallback = 0
+        self._wakeup = None
+        self._task = None
+
+    def emit(self, name, payload):
+        """Queue one event; never blocks."""
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((name, payload, time.time()))
+        self.emitted += 1
+        if self._wakeup is not None and len(self.buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and flush everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._wakeup = None
+        while self.buffer:
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self.buffer:
+                await self.flush()
+                if len(self.buffer) < self.batch_size:
+                    break
+
+    async def flush(self):
+        batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+        if batch:
+            await asyncio.to_thread(self._export_batch, batch)
+
+    def _export_batch(self, batch):
+        failed = []
+        for name, payload, emitted_at in batch:
+            try:
+                self.export(name, payload)
+                self.exported += 1
+            except Exception as e:
+                logger.warning(f"Telemetry export failed for {name}: {e}")
+                failed.append((name, payload, emitted_at))
+        if failed:
+            self._write_fallback(failed)
+
+    def _write_fallback(self, events):
+        try:
+            with open(self.fallback_path, "a", encoding="utf-8") as f:
+                for name, payload, emitted_at in events:
+                    f.write(json.dumps({"name": name, "timestamp": emitted_at, "payload": payload},
+                                       default=str) + "\n")
+            self.fallback += len(events)
+        except OSError as e:
+            logger.error(f"Telemetry fallback write failed, dropping {len(events)} events: {e}")
+            self.dropped += len(events)
+
+    def stats(self):
+        return {
+            "emitted": self.emitted,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "fallback": self.fallback,
+            "buffered": len(self.buffer),
+        }
+
+
+telemetry = TelemetryExporter()
+
+
+def emit(name, payload):
+    """Queue an event on the shared exporter."""
+    telemetry.emit(name, payload)
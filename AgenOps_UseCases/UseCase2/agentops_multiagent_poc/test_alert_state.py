@@ -0,0 +1,59 @@
+from alert_state import ALERTED, ANALYZE, NORMAL, SUPPRESS, AlertStateMachine
+
+
+def test_flag_after_cooldown_is_a_new_alert():
+    machine = AlertStateMachine(cooldown=300)
+    assert machine.observe("AAPL", 2.0, True, now=0) == ANALYZE
+    assert machine.observe("AAPL", 0.1, False, now=10) is None  # starts cooling
+    assert machine.observe("AAPL", 2.0, True, now=3600) == ANALYZE
+    assert machine.state("AAPL") == ALERTED
+
+
+def test_flag_while_cooling_is_suppressed():
+    machine = AlertStateMachine(cooldown=300)
+    machine.observe("AAPL", 2.0, True, now=0)
+    machine.observe("AAPL", 0.1, False, now=10)
+    assert machine.observe("AAPL", 2.0, True, now=100) == SUPPRESS
+
+
+def test_persistent_flag_is_reanalyzed_every_cooldown():
+    machine = AlertStateMachine(cooldown=300)
+    assert machine.observe("AAPL", 2.0, True, now=0) == ANALYZE
+    assert machine.observe("AAPL", 2.0, True, now=200) == SUPPRESS
+    # Suppression does not push the next analysis back
+    assert machine.observe("AAPL", 2.0, True, now=299) == SUPPRESS
+    assert machine.observe("AAPL", 2.0, True, now=600) == ANALYZE
+    assert machine.observe("AAPL", 2.0, True, now=3600) == ANALYZE
+    assert machine.observe("AAPL", 2.0, True, now=86400) == ANALYZE
+    assert machine.stats()["analyzed"] == 4
+    assert machine.stats()["suppressed"] == 2
+
+
+def test_calm_symbol_resets_to_normal():
+    machine = AlertStateMachine(cooldown=300)
+    machine.observe("AAPL", 2.0, True, now=0)
+    machine.observe("AAPL", 0.1, False, now=10)
+    machine.observe("AAPL", 0.1, False, now=400)
+    assert machine.state("AAPL") == NORMAL
+
+
+def test_cancelled_analysis_does_not_suppress_the_next_flag():
+    machine = AlertStateMachine(cooldown=300)
+    assert machine.observe("AAPL", 2.0, True, now=0) == ANALYZE
+    machine.cancel("AAPL", 2.0, 0)
+    assert machine.observe("AAPL", 2.0, True, now=10) == ANALYZE
+    assert machine.stats()["analyzed"] == 2
+    assert machine.stats()["cancelled"] == 1
+
+
+def test_cancelled_escalation_falls_back_to_the_confirmed_analysis():
+    machine = AlertStateMachine(cooldown=300)
+    machine.observe("AAPL", 2.0, True, now=0)
+    machine.confirm("AAPL", 2.0, 0)
+    assert machine.observe("AAPL", 4.0, True, now=10) == ANALYZE
+    machine.cancel("AAPL", 4.0, 10)
+    # Judged against the severity-2.0 analysis again, so 3.5 still escalates
+    assert machine.observe("AAPL", 3.5, True, now=20) == ANALYZE
+    machine.confirm("AAPL", 3.5, 20)
+    machine.cancel("AAPL", 3.5, 20)  # a confirmed analysis stays
+    assert machine.observe("AAPL", 3.5, True, now=30) == SUPPRESS
@@ -0,0 +1,53 @@
+import os
+import time
+
+os.environ.setdefault("FINNHUB_API_KEY", "test")  # data_feed_live refuses to import without one
+
+from data_feed_live import AdaptivePollScheduler  # noqa: E402
+
+CALM = [100.0, 100.01, 100.0, 100.01, 100.0]
+VOLATILE = [100.0, 103.0, 99.0, 104.0, 98.0]
+
+
+def scheduler(**kwargs):
+    options = {"rpm": 60, "min_interval": 0.5, "max_interval": 600}
+    return AdaptivePollScheduler(["AAPL", "GOOG", "TSLA"], **{**options, **kwargs})
+
+
+def test_volatile_symbols_get_a_larger_share_of_the_budget():
+    s = scheduler()
+    s.polled("TSLA", VOLATILE)
+    s.polled("AAPL", CALM)
+    s.polled("GOOG", CALM)
+    assert s.intervals["TSLA"] < s.intervals["AAPL"] / 10
+    # Unclamped, the planned polls add up to the budget (stats() rounds intervals to 0.1 s)
+    assert abs(s.stats()["planned_rpm"] - 60) < 3
+
+
+def test_intervals_are_clamped():
+    s = scheduler(min_interval=5, max_interval=30)
+    s.polled("TSLA", VOLATILE)
+    s.polled("AAPL", CALM)
+    assert s.intervals["TSLA"] == 5
+    assert s.intervals["AAPL"] == 30
+
+
+def test_alert_reschedules_the_symbol_sooner():
+    s = scheduler(rpm=6)
+    for symbol in ("AAPL", "GOOG", "TSLA"):
+        s.polled(symbol, CALM)
+    before = s.intervals["AAPL"]
+    s.alert("AAPL")
+    assert s.next_at["AAPL"] <= time.monotonic() + s.min_interval
+    s.polled("AAPL", CALM)
+    assert s.intervals["AAPL"] < before
+
+
+def test_due_skips_superseded_entries():
+    s = scheduler(rpm=0.001, min_interval=0.01, max_interval=0.02)  # only AAPL is due in the first round
+    assert s.due()[1] == ["AAPL"]
+    s.polled("AAPL", CALM)
+    s.alert("AAPL")  # a second, earlier heap entry for AAPL
+    time.sleep(0.05)
+    assert s.due()[1] == ["AAPL"]
+    assert s.due()[1] == []
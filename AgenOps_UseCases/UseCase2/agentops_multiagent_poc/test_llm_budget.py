@@ -0,0 +1,64 @@
+import asyncio
+import time
+import pytest
+from llm_budget import LLMDispatcher, Shed, severity
+
+
+def test_waiting_calls_are_granted_most_severe_first():
+    order = []
+
+    async def call(dispatcher, name, priority):
+        async with dispatcher.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def run():
+        dispatcher = LLMDispatcher(concurrency=1)
+        await dispatcher.acquire()  # hold the only slot while the others queue
+        tasks = [asyncio.create_task(call(dispatcher, name, priority))
+                 for name, priority in (("low", 1.0), ("high", 3.0), ("mid", 2.0), ("high again", 3.0))]
+        await asyncio.sleep(0)
+        assert dispatcher.stats()["waiting"] == 4
+        dispatcher.release()
+        await asyncio.gather(*tasks)
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert order == ["high", "high again", "mid", "low"]
+    assert dispatcher.stats()["granted"] == 5
+    assert dispatcher.stats()["in_flight"] == 0
+
+
+def test_calls_past_their_deadline_are_shed():
+    async def run():
+        dispatcher = LLMDispatcher(concurrency=1)
+        await dispatcher.acquire()
+        with pytest.raises(Shed):
+            await dispatcher.acquire(priority=5.0, deadline=time.monotonic() + 0.05)
+        # A call without a deadline still gets the slot once it frees up
+        waiter = asyncio.create_task(dispatcher.acquire(priority=0.1))
+        await asyncio.sleep(0)
+        dispatcher.release()
+        await waiter
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert dispatcher.stats()["shed"] == 1
+    assert dispatcher.stats()["granted"] == 2
+
+
+def test_rpm_budget_delays_calls_beyond_the_burst():
+    async def run():
+        dispatcher = LLMDispatcher(concurrency=10, rpm=60)  # one call per second, burst of 5
+        started = time.monotonic()
+        for _ in range(6):
+            async with dispatcher.slot():
+                pass
+        return time.monotonic() - started
+
+    assert 0.5 < asyncio.run(run()) < 2.0
+
+
+def test_severity_is_relative_to_the_prompt_thresholds():
+    assert severity(3.0, 0.0) == 1.0
+    assert severity(-1.5, 4.0) == 2.0
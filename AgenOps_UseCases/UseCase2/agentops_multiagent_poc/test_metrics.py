@@ -0,0 +1,12 @@
+import asyncio
+import inspect
+from metrics import handle_metrics, start_metrics_server
+
+
+def test_metrics_use_the_prometheus_text_format():
+    response = asyncio.run(handle_metrics(None))
+    assert response.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+
+
+def test_metrics_server_listens_on_localhost_by_default():
+    assert inspect.signature(start_metrics_server).parameters["host"].default == "127.0.0.1"
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from alert_state import AlertStateMachine
+from llm_budget import Shed
+from pipeline import DROP_NEWEST, DROP_OLDEST, AlertPipeline, Stage
+
+
+class ShedFirstAnalyzer:
+    def __init__(self):
+        self.calls = 0
+
+    async def analyze(self, context, priority=0.0, deadline=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise Shed()
+        return "analysis"
+
+
+def flagged(symbol):
+    return {"symbol": symbol, "alert": True, "pct_change": 6.0, "z_score": 3.0, "context": symbol}
+
+
+def test_alert_shed_by_the_analyzer_is_not_counted_as_analyzed():
+    analyzer = ShedFirstAnalyzer()
+    emitted = []
+    pipeline = AlertPipeline(None, analyzer, lambda tick, result, analysis: emitted.append((result, analysis)),
+                             alert_state=AlertStateMachine(cooldown=300))
+
+    async def run():
+        pipeline.analyze_stage.start()
+        for _ in range(2):
+            await pipeline._route({"symbol": "AAPL"}, flagged("AAPL"), None)
+            await pipeline.analyze_stage.queue.join()
+        await pipeline.analyze_stage.stop()
+
+    asyncio.run(run())
+    # The shed alert is rolled back, so the next flag is analyzed instead of suppressed
+    assert analyzer.calls == 2
+    assert [analysis for _, analysis in emitted] == ["analysis"]
+    assert pipeline.alert_state.stats()["analyzed"] == 2
+    assert pipeline.alert_state.stats()["cancelled"] == 1
+
+
+def test_ticks_that_never_reach_the_sink_are_reported():
+    dropped, emitted = [], []
+    pipeline = AlertPipeline(None, ShedFirstAnalyzer(), lambda tick, result, analysis: emitted.append(tick),
+                             analyzer_queue=1, analyzer_policy="drop_newest", on_drop=dropped.append)
+    first, second, third = {"symbol": "AAPL"}, {"symbol": "MSFT"}, {"symbol": "TSLA"}
+
+    async def run():
+        await pipeline._route(first, flagged("AAPL"), None)
+        await pipeline._route(second, flagged("MSFT"), None)  # the analyzer queue is full
+        pipeline.analyze_stage.start()
+        await pipeline.analyze_stage.queue.join()  # first is shed
+        await pipeline._route(third, flagged("TSLA"), None)
+        await pipeline.analyze_stage.queue.join()
+        await pipeline.analyze_stage.stop()
+
+    asyncio.run(run())
+    assert dropped == [second, first]
+    assert emitted == [third]
+
+
+def drain(stage, items, **put):
+    """Queue ``items`` before the workers start, then return the order they were handled in."""
+    handled = []
+
+    async def handler(item, started):
+        handled.append(item)
+
+    stage.handler = handler
+
+    async def run():
+        for item in items:
+            await stage.put(item, **put)
+        stage.start()
+        await stage.queue.join()
+        await stage.stop()
+
+    asyncio.run(run())
+    return handled
+
+
+def test_stage_serves_most_urgent_first_and_fifo_among_equals():
+    stage = Stage("test", None, priority=lambda item: item[1])
+    assert drain(stage, [("a", 1), ("b", 3), ("c", 1), ("d", 2)]) == [("b", 3), ("d", 2), ("a", 1), ("c", 1)]
+
+
+def test_drop_oldest_evicts_the_least_urgent_item():
+    dropped = []
+    stage = Stage("test", None, maxsize=2, policy=DROP_OLDEST, priority=lambda item: item[1],
+                  on_discard=dropped.append)
+    assert drain(stage, [("a", 2), ("b", 1), ("c", 1), ("d", 3)]) == [("d", 3), ("a", 2)]
+    assert dropped == [("b", 1), ("c", 1)]
+    assert stage.stats.dropped == 2
+
+
+def test_drop_newest_keeps_the_queue():
+    stage = Stage("test", None, maxsize=1, policy=DROP_NEWEST)
+    assert drain(stage, ["a", "b"]) == ["a"]
+    assert stage.stats.dropped == 1
+
+
+def test_expired_items_are_not_handled():
+    dropped = []
+    stage = Stage("test", None, max_age=1.0, on_discard=dropped.append)
+    assert drain(stage, ["old"], started=time.monotonic() - 5) == []
+    assert dropped == ["old"]
+    assert stage.stats.expired == 1
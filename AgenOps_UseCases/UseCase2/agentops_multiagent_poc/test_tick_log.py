@@ -0,0 +1,34 @@
+from tick_log import PRICES, TickLog, TickLogWriter
+
+
+def test_log_round_trips_through_mmap(tmp_path):
+    path = tmp_path / "session"
+    with TickLogWriter(path, flush_every=2) as writer:
+        writer.append("AAPL", 190.5, timestamp=1.0)
+        writer.append("MSFT", 410.25, timestamp=2.0)
+        writer.append("AAPL", 191.0, timestamp=3.0)
+    with TickLog(path) as log:
+        assert list(log) == [("AAPL", 1.0, 190.5), ("MSFT", 2.0, 410.25), ("AAPL", 3.0, 191.0)]
+
+
+def test_appending_keeps_symbol_ids(tmp_path):
+    path = tmp_path / "session"
+    with TickLogWriter(path) as writer:
+        writer.append("AAPL", 1.0, timestamp=1.0)
+    with TickLogWriter(path) as writer:
+        writer.append("TSLA", 2.0, timestamp=2.0)
+        writer.append("AAPL", 3.0, timestamp=3.0)
+    with TickLog(path) as log:
+        assert log.symbols == ["AAPL", "TSLA"]
+        assert [symbol for symbol, _, _ in log] == ["AAPL", "TSLA", "AAPL"]
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+    path = tmp_path / "session"
+    with TickLogWriter(path) as writer:
+        writer.append("AAPL", 1.0, timestamp=1.0)
+        writer.append("AAPL", 2.0, timestamp=2.0)
+    with open(str(path) + PRICES, "ab") as f:
+        f.write(b"\x00\x01\x02")  # an interrupted write
+    with TickLog(path) as log:
+        assert len(log) == 2
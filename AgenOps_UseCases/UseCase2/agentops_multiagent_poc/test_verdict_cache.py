@@ -0,0 +1,37 @@
+import asyncio
+import llm_client
+from mock_llm import MockChatClient
+from verdict_cache import VerdictCache
+from watcher_agent import WatcherAgent
+
+
+def detect_all(history, symbols=("AAPL", "MSFT")):
+    client = MockChatClient()
+    llm_client.configure(client=client)
+    agent = WatcherAgent(cache=VerdictCache())
+    results = [
+        asyncio.run(agent.detect({"symbol": symbol, "price": history[-1], "price_history": history}))
+        for symbol in symbols
+    ]
+    return results, client.calls
+
+
+def test_flag_reasons_are_not_shared_across_symbols():
+    # The same move for both symbols, so the same cache buckets
+    results, calls = detect_all([100.0, 101.0, 99.0, 100.0, 110.0])
+    assert [r["alert"] for r in results] == [True, True]
+    assert calls == 2
+
+
+def test_no_verdicts_are_shared_across_symbols():
+    results, calls = detect_all([100.0, 100.1, 99.9, 100.0, 100.05])
+    assert [r["alert"] for r in results] == [False, False]
+    assert calls == 1
+
+
+def test_cache_keeps_explanations_per_symbol():
+    cache = VerdictCache()
+    key = cache.key(5.0, 3.0, 1.0)
+    cache.put("AAPL", key, {"flag": True, "reason": "YES - AAPL jumped to $110"})
+    assert cache.get("MSFT", key) is None
+    assert cache.get("AAPL", key)["reason"] == "YES - AAPL jumped to $110"
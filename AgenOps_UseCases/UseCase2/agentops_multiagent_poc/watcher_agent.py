@@ -1,59 +1,65 @@
 import agentops
-import os
+import json
+import time
 import traceback
 import logging
-from openai import OpenAI
+from llm_budget import Shed, severity
+from llm_client import chat_completion
+from metrics import ERRORS, SKIPPED
+from telemetry import emit
+from ticks import as_tick
+from verdict_cache import VerdictCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('WatcherAgent')
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+SYSTEM_PROMPT = "You are a stock watcher AI agent focused on detecting unusual price movements."
 
 class WatcherAgent:
-    def __init__(self):
+    def __init__(self, cache=None):
         logger.info("Initializing WatcherAgent...")
         self.trace = agentops.start_trace(tags=["WatcherAgent", "Live"])
+        # verdicts reused across ticks with near-identical features
+        self.cache = cache if cache is not None else VerdictCache.from_env()
         logger.info("✅ WatcherAgent (Live) started")
 
-    async def detect(self, data):
-        """Detects significant movement in live price data."""
-        try:
-            logger.info("Starting detection for new data...")
-            
-            # Validate incoming data
-            required_fields = ["symbol", "price", "price_history"]
-            missing_fields = [field for field in required_fields if field not in data]
-            if missing_fields:
-                logger.error(f"Missing required fields in data: {missing_fields}")
-                return None
-            
-            symbol = data["symbol"]
-            price = data["price"]
-            price_history = data["price_history"]
-            
-            # Log incoming data structure
-            logger.info(f"Processing data for {symbol}:")
-            logger.info(f"  Current Price: ${price:.2f}")
-            logger.info(f"  History Points: {len(price_history)}")
-            logger.info(f"  Price History: {price_history}")
-            logger.info(f"  Available Keys: {list(data.keys())}")
-            
-            # Skip analysis if we don't have enough history
-            if len(price_history) < 2:
-                logger.info(f"Not enough price history for {symbol}, need at least 2 points")
-                return None
-            
-            # Calculate price change
-            prev_price = price_history[-2] if len(price_history) > 1 else price
-            pct_change = ((price - prev_price) / prev_price) * 100
-            
-            # Calculate statistics
-            avg_price = sum(price_history) / len(price_history)
-            std_dev = (sum((p - avg_price) ** 2 for p in price_history) / len(price_history)) ** 0.5
-            z_score = (price - avg_price) / std_dev if std_dev != 0 else 0
-
-            analysis_context = f"""
+    def _compute_stats(self, data):
+        """Validate a tick and compute its movement statistics, or return None."""
+        # Validate incoming data
+        tick = as_tick(data)
+        required_fields = ["symbol", "price", "price_history"]
+        missing_fields = [field for field in required_fields if field not in tick]
+        if missing_fields:
+            logger.error(f"Missing required fields in data: {missing_fields}")
+            return None
+
+        symbol = tick.symbol
+        price = tick.price
+        price_history = tick.history
+
+        # Log incoming data structure
+        logger.info(f"Processing data for {symbol}:")
+        logger.info(f"  Current Price: ${price:.2f}")
+        logger.info(f"  History Points: {len(price_history)}")
+        logger.info(f"  Price History: {list(price_history)}")
+        logger.info(f"  Available Keys: {tick.keys()}")
+
+        # Skip analysis if we don't have enough history
+        if len(price_history) < 2:
+            logger.info(f"Not enough price history for {symbol}, need at least 2 points")
+            return None
+
+        # Calculate price change
+        prev_price = price_history[-2] if len(price_history) > 1 else price
+        pct_change = ((price - prev_price) / prev_price) * 100
+
+        # Calculate statistics
+        avg_price = sum(price_history) / len(price_history)
+        std_dev = (sum((p - avg_price) ** 2 for p in price_history) / len(price_history)) ** 0.5
+        z_score = (price - avg_price) / std_dev if std_dev != 0 else 0
+
+        analysis_context = f"""
             Stock: {symbol}
             Current Price: ${price:.2f}
             Previous Price: ${prev_price:.2f}
@@ -61,7 +67,105 @@ class WatcherAgent:
             Average Price (last {len(price_history)} ticks): ${avg_price:.2f}
             Standard Deviation: ${std_dev:.2f}
             Z-Score (deviation from mean): {z_score:.2f}
+            """
+
+        volatility_pct = std_dev / avg_price * 100 if avg_price else 0.0
+
+        return {
+            "symbol": symbol,
+            "cache_key": self.cache.key(pct_change, z_score, volatility_pct),
+            "price": price,
+            "prev_price": prev_price,
+            "pct_change": pct_change,
+            "avg_price": avg_price,
+            "std_dev": std_dev,
+            "z_score": z_score,
+            "history_points": len(price_history),
+            "context": analysis_context,
+        }
+
+    def _result(self, stats, flagged, analysis, batched=False, cached=False):
+        emit("Watcher Analysis", {
+            "symbol": stats["symbol"],
+            "price": stats["price"],
+            "pct_change": stats["pct_change"],
+            "z_score": stats["z_score"],
+            "analysis": analysis,
+            "batched": batched,
+            "cached": cached
+        })
+
+        if flagged:
+            return {
+                "symbol": stats["symbol"],
+                "alert": True,
+                "context": stats["context"],
+                "current_price": stats["price"],
+                "pct_change": stats["pct_change"],
+                "z_score": stats["z_score"]
+            }
+        return {
+            "symbol": stats["symbol"],
+            "alert": False,
+            "pct_change": stats["pct_change"],
+            "z_score": stats["z_score"]
+        }
+
+    def _cache_verdict(self, stats, flagged, reason, latency):
+        # A "NO" holds for any symbol in the same buckets; a flag's reason names this one
+        if flagged:
+            self.cache.put(stats["symbol"], stats["cache_key"], {"flag": True, "reason": reason}, latency)
+        else:
+            self.cache.put(stats["symbol"], stats["cache_key"], {"flag": False, "reason": "NO"}, latency,
+                           shared=True)
+
+    def _shed(self, stats):
+        SKIPPED.inc(agent="WatcherAgent", reason="shed")
+        logger.info(f"Shed stale tick for {stats['symbol']} before an LLM slot was free")
+        return {"symbol": stats["symbol"], "alert": False, "shed": True}
+
+    async def detect(self, data, deadline=None):
+        """
+        Detects significant movement in live price data.
+
+        Ticks still waiting for LLM budget at ``deadline`` (a time.monotonic()
+        value) are shed and returned with ``"shed": True``.
+        """
+        try:
+            logger.info("Starting detection for new data...")
+
+            stats = self._compute_stats(data)
+            if stats is None:
+                return None
+
+            verdict = self.cache.get(stats["symbol"], stats["cache_key"])
+            if verdict is not None:
+                SKIPPED.inc(agent="WatcherAgent", reason="cache")
+                logger.info(f"Using cached verdict for {stats['symbol']}")
+                return self._result(stats, verdict["flag"], verdict["reason"], cached=True)
 
+            try:
+                return await self._detect_one(stats, deadline)
+            except Shed:
+                return self._shed(stats)
+
+        except Exception as e:
+            return self._failed(data.get("symbol"), e)
+
+    @staticmethod
+    def _failed(symbol, error):
+        """Record a per-symbol detection error; call from its ``except`` block."""
+        ERRORS.inc(component="WatcherAgent")
+        emit("WatcherError", {
+            "error": str(error),
+            "traceback": traceback.format_exc()
+        })
+        return {"symbol": symbol, "alert": False}
+
+    async def _detect_one(self, stats, deadline=None):
+        """Single-symbol LLM verdict for precomputed stats."""
+        symbol = stats["symbol"]
+        analysis_context = stats["context"] + """
             Should this be flagged for risk analysis? Consider:
             1. Absolute price movement (>3% is significant)
             2. Deviation from mean (z-score > 2 is unusual)
@@ -72,47 +176,161 @@ class WatcherAgent:
             'NO' if this is normal movement
             """
 
-            logger.info("Sending request to OpenAI for analysis...")
+        logger.info("Sending request to OpenAI for analysis...")
+        try:
+            logger.info(f"Sending analysis request to OpenAI for {symbol}")
+            started = time.monotonic()
+            response = await chat_completion(
+                agent="WatcherAgent",
+                priority=severity(stats["pct_change"], stats["z_score"]),
+                deadline=deadline,
+                model="gpt-3.5-turbo",  # Using gpt-3.5-turbo instead of gpt-4 for better availability
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": analysis_context}
+                ],
+                max_tokens=100
+            )
+            logger.info("Received response from OpenAI")
+        except Shed:
+            raise
+        except Exception as e:
+            logger.error(f"OpenAI API call failed: {str(e)}")
+            logger.error(f"Error type: {type(e)}")
+            logger.error(f"Error traceback: {traceback.format_exc()}")
+            raise
+
+        result = response.choices[0].message.content.strip()
+        flagged = "yes" in result.lower()
+        self._cache_verdict(stats, flagged, result, time.monotonic() - started)
+        return self._result(stats, flagged, result)
+
+    async def detect_batch(self, batch, deadline=None):
+        """
+        Detect movement for several ticks with a single chat completion.
+
+        The stats for every tick are packed into one prompt that asks for a
+        JSON array of verdicts. Results are returned in input order with the
+        same shape as ``detect``; ticks without a usable verdict fall back to
+        ``detect``. The request is prioritized by its most severe tick.
+        """
+        if len(batch) == 1:
+            return [await self.detect(batch[0], deadline)]
+
+        logger.info(f"Starting batched detection for {len(batch)} ticks...")
+        results = [None] * len(batch)
+        pending = {}  # batch index -> stats
+        for i, data in enumerate(batch):
+            # As in detect(), bad data for one symbol fails only that symbol's result
             try:
-                logger.info(f"Sending analysis request to OpenAI for {symbol}")
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",  # Using gpt-3.5-turbo instead of gpt-4 for better availability
-                    messages=[
-                        {"role": "system", "content": "You are a stock watcher AI agent focused on detecting unusual price movements."},
-                        {"role": "user", "content": analysis_context}
-                    ],
-                    max_tokens=100
-                )
-                logger.info("Received response from OpenAI")
+                stats = self._compute_stats(data)
             except Exception as e:
-                logger.error(f"OpenAI API call failed: {str(e)}")
-                logger.error(f"Error type: {type(e)}")
-                logger.error(f"Error traceback: {traceback.format_exc()}")
-                raise
-
-            result = response.choices[0].message.content.strip()
-            agentops.tool(name="Watcher Analysis")({
-                "symbol": symbol,
-                "price": price,
-                "pct_change": pct_change,
-                "z_score": z_score,
-                "analysis": result
-            })
+                results[i] = self._failed(data.get("symbol"), e)
+                continue
+            if stats is None:
+                continue
+            verdict = self.cache.get(stats["symbol"], stats["cache_key"])
+            if verdict is not None:
+                SKIPPED.inc(agent="WatcherAgent", reason="cache")
+                results[i] = self._result(stats, verdict["flag"], verdict["reason"], cached=True)
+            else:
+                pending[i] = stats
+        if not pending:
+            return results
 
-            if "yes" in result.lower():
-                return {
-                    "symbol": symbol,
-                    "alert": True,
-                    "context": analysis_context,
-                    "current_price": price,
-                    "pct_change": pct_change,
-                    "z_score": z_score
-                }
-            return {"symbol": symbol, "alert": False}
+        rows = [
+            {
+                "id": i,
+                "symbol": stats["symbol"],
+                "price": round(stats["price"], 2),
+                "prev_price": round(stats["prev_price"], 2),
+                "pct_change": round(stats["pct_change"], 2),
+                "z_score": round(stats["z_score"], 2),
+                "std_dev": round(stats["std_dev"], 2),
+                "history_points": stats["history_points"],
+            }
+            for i, stats in pending.items()
+        ]
+        prompt = f"""
+            For each stock tick below, decide whether it should be flagged for risk analysis.
+            Consider:
+            1. Absolute price movement (>3% is significant)
+            2. Deviation from mean (z-score > 2 is unusual)
+            3. Recent price trend
+
+            Ticks (JSON):
+            {json.dumps(rows)}
+
+            Reply with ONLY a JSON array containing one object per tick, in any order:
+            [{{"id": <tick id>, "flag": true or false, "reason": "<brief reason>"}}]
+            """
 
+        verdicts = {}
+        try:
+            logger.info(f"Sending batched analysis request to OpenAI for {len(rows)} ticks")
+            started = time.monotonic()
+            response = await chat_completion(
+                agent="WatcherAgent",
+                priority=max(severity(stats["pct_change"], stats["z_score"]) for stats in pending.values()),
+                deadline=deadline,
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=50 + 40 * len(rows)
+            )
+            logger.info("Received batched response from OpenAI")
+            verdicts = self._parse_verdicts(response.choices[0].message.content)
+            # Each tick's share of the round trip, for the cache's savings estimate
+            latency = (time.monotonic() - started) / len(rows)
+        except Shed:
+            for i, stats in pending.items():
+                results[i] = self._shed(stats)
+            return results
         except Exception as e:
-            agentops.tool(name="WatcherError")({
+            logger.error(f"Batched detection failed, falling back to per-symbol calls: {str(e)}")
+            ERRORS.inc(component="WatcherAgent")
+            emit("WatcherError", {
                 "error": str(e),
                 "traceback": traceback.format_exc()
             })
-            return {"symbol": symbol, "alert": False}
+
+        fallback = []
+        for i, stats in pending.items():
+            verdict = verdicts.get(i)
+            if verdict is None:
+                fallback.append(i)
+                continue
+            self._cache_verdict(stats, verdict["flag"], verdict["reason"], latency)
+            results[i] = self._result(stats, verdict["flag"], verdict["reason"], batched=True)
+
+        if fallback:
+            logger.info(f"No batched verdict for {len(fallback)} ticks, using single-symbol detection")
+            for i in fallback:
+                try:
+                    results[i] = await self._detect_one(pending[i], deadline)
+                except Shed:
+                    results[i] = self._shed(pending[i])
+                except Exception as e:
+                    results[i] = self._failed(pending[i]["symbol"], e)
+        return results
+
+    @staticmethod
+    def _parse_verdicts(text):
+        """Parse the JSON verdict array into {id: {"flag": bool, "reason": str}}."""
+        text = text.strip()
+        # Tolerate a Markdown code fence around the JSON
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end == -1:
+            raise ValueError(f"No JSON array in response: {text[:100]!r}")
+        verdicts = {}
+        for item in json.loads(text[start:end + 1]):
+            try:
+                flag = item["flag"]
+                if isinstance(flag, str):
+                    flag = flag.strip().lower() in ("true", "yes")
+                verdicts[int(item["id"])] = {"flag": bool(flag), "reason": str(item.get("reason", ""))}
+            except (KeyError, TypeError, ValueError):
+                continue
+        return verdicts
@@ -0,0 +1,433 @@
+"""
+Compiled, memory-mapped disease knowledge base shared by all agents.
+
+``compile_kb`` turns data/diseases.json into data/diseases.kb: the symptom
+index (vocabulary, postings with BM25 weights, red-flag postings, norms),
+the same postings per whole symptom/red-flag phrase (see
+agents/phrase_matcher.py; synonyms come from data/synonyms.json) and the
+disease records, laid out as flat arrays in one file. A
+``KnowledgeBase`` maps that file read-only, so the analyzer, the advisor
+and any worker process opening it share one copy in the page cache
+instead of each holding its own parsed JSON.
+
+File layout (native byte order; the file is rebuilt from the JSON on each host):
+
+    header:   magic b"DSKB", version u16, meta length u32
+    meta:     JSON (source mtimes/size, disease count, synonyms, section table), padded to 8 bytes
+    sections: flat arrays at the offsets in the section table
+
+``KnowledgeBaseLoader`` hot-swaps the KB when the JSON (or synonyms file) changes. It
+recompiles into a temporary file that atomically replaces the old one, then
+maps the new file. Requests that already hold the old KB keep a valid
+mapping until they finish.
+"""
+import bisect
+import functools
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from agents.phrase_matcher import PhraseMatcher, load_synonyms, phrase_key
+
+KB_CHECK_INTERVAL = float(os.getenv("KB_CHECK_INTERVAL", "2"))  # seconds between source mtime checks
+KB_RECORD_CACHE = int(os.getenv("KB_RECORD_CACHE", "4096"))  # decoded records kept per process
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAGIC = b"DSKB"
+VERSION = 2
+HEADER = struct.Struct("=4sHI")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t.strip().lower() for t in text.replace("/", " ").replace(",", " ").split() if t.strip()]
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    ptr = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=ptr[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), ptr
+
+
+def _ptr(postings: Dict[str, List[Any]], keys: List[str]) -> np.ndarray:
+    """CSR row pointers of ``postings`` in ``keys`` order."""
+    ptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(postings.get(k, ())) for k in keys], out=ptr[1:])
+    return ptr
+
+
+def _csr(postings: Dict[str, List[int]], keys: List[str], dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """Row pointers and concatenated values of ``postings`` in ``keys`` order."""
+    return _ptr(postings, keys), np.array([v for k in keys for v in postings.get(k, ())], dtype=dtype)
+
+
+def build_arrays(db: Dict[str, Dict[str, Any]],
+                 synonyms: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Compile the JSON disease DB into the KB sections and meta."""
+    ids = list(db)
+    term_counts = []
+    flag_postings: Dict[str, List[int]] = {}
+    phrase_postings: Dict[str, List[int]] = {}
+    phrase_flag_postings: Dict[str, List[int]] = {}
+    norms_phrase = np.empty(len(ids))
+    flag_stride = max((len(d.get("red_flags", [])) for d in db.values()), default=0) + 1
+    for i, key in enumerate(ids):
+        counts = Counter()
+        for symptom in db[key].get("symptoms", []):
+            counts.update(tokenize(symptom))
+        term_counts.append(counts)
+        # Flag f of disease i is cell i * flag_stride + f of a query's (disease x flag) hit mask
+        for f, flag in enumerate(db[key].get("red_flags", [])):
+            for token in set(tokenize(flag)):
+                flag_postings.setdefault(token, []).append(i * flag_stride + f)
+            phrase_flag_postings.setdefault(phrase_key(flag), []).append(i * flag_stride + f)
+        phrases = {phrase_key(symptom) for symptom in db[key].get("symptoms", [])}
+        for phrase in phrases:
+            phrase_postings.setdefault(phrase, []).append(i)
+        norms_phrase[i] = max(1, len(phrases))
+
+    n = len(ids)
+    lengths = [sum(counts.values()) for counts in term_counts]
+    avg_length = sum(lengths) / n if n else 0.0
+    document_frequency = Counter(token for counts in term_counts for token in counts)
+    idf = {token: math.log((n - df + 0.5) / (df + 0.5) + 1.0) for token, df in document_frequency.items()}
+    postings: Dict[str, List[Tuple[int, float]]] = {}
+    norms_legacy = np.empty(n)
+    norms_bm25 = np.empty(n)
+    for i, counts in enumerate(term_counts):
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[i] / avg_length) if avg_length else BM25_K1
+        total = 0.0
+        for token, tf in counts.items():
+            weight = idf[token] * tf * (BM25_K1 + 1) / (tf + length_norm)
+            postings.setdefault(token, []).append((i, weight))
+            total += weight
+        norms_legacy[i] = max(1, len(counts))
+        norms_bm25[i] = total or 1.0
+
+    vocab = sorted(postings.keys() | flag_postings.keys())
+    phrases = sorted((phrase_postings.keys() | phrase_flag_postings.keys()) - {""})
+    arrays = {
+        "post_ptr": _ptr(postings, vocab),
+        "post_disease": np.array([d for t in vocab for d, _ in postings.get(t, ())], dtype=np.int32),
+        "post_bm25": np.array([w for t in vocab for _, w in postings.get(t, ())], dtype=np.float64),
+        "norms_legacy": norms_legacy,
+        "norms_bm25": norms_bm25,
+        "norms_phrase": norms_phrase,
+        "id_order": np.array(sorted(range(n), key=ids.__getitem__), dtype=np.int32),
+    }
+    arrays["flag_ptr"], arrays["flag_code"] = _csr(flag_postings, vocab, np.int64)
+    arrays["phrase_post_ptr"], arrays["phrase_post_disease"] = _csr(phrase_postings, phrases, np.int32)
+    arrays["phrase_flag_ptr"], arrays["phrase_flag_code"] = _csr(phrase_flag_postings, phrases, np.int64)
+    arrays["vocab_blob"], arrays["vocab_ptr"] = _pack_strings(vocab)
+    arrays["phrase_blob"], arrays["phrase_ptr"] = _pack_strings(phrases)
+    arrays["id_blob"], arrays["id_ptr"] = _pack_strings(ids)
+    arrays["record_blob"], arrays["record_ptr"] = _pack_strings([json.dumps(db[key]) for key in ids])
+    return arrays, {"diseases": n, "flag_stride": flag_stride, "synonyms": synonyms or {}}
+
+
+def write_kb(arrays: Dict[str, np.ndarray], meta: Dict[str, Any], path: str):
+    """Write ``arrays`` to ``path`` through a temporary file that atomically replaces it."""
+    sections = {}
+    offset = 0
+    for name, array in arrays.items():
+        sections[name] = [offset, array.dtype.str, len(array)]
+        offset += (array.nbytes + 7) // 8 * 8
+    meta = dict(meta, sections=sections)
+    # The section offsets are relative to the end of the header and meta; pad the meta so they stay aligned
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    meta_bytes += b" " * (-(HEADER.size + len(meta_bytes)) % 8)
+    base = HEADER.size + len(meta_bytes)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+        f.write(meta_bytes)
+        for name, array in arrays.items():
+            f.seek(base + sections[name][0])
+            f.write(array.tobytes())
+        f.truncate(base + offset)
+    os.replace(tmp_path, path)
+
+
+def compiled_path(source: str) -> str:
+    return os.path.splitext(source)[0] + ".kb"
+
+
+def synonyms_path(source: str) -> str:
+    return os.path.join(os.path.dirname(source), "synonyms.json")
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def compile_kb(source: str, path: Optional[str] = None) -> str:
+    """
+    Compile the JSON DB ``source`` into ``path`` (default: next to it, with
+    a .kb suffix), with the synonyms.json next to ``source`` if there is one.
+    """
+    path = path or compiled_path(source)
+    stat = os.stat(source)
+    synonyms_mtime_ns = _mtime_ns(synonyms_path(source))
+    with open(source, "r", encoding="utf-8") as f:
+        db = json.load(f)
+    arrays, meta = build_arrays(db, load_synonyms(synonyms_path(source)))
+    meta.update(source_mtime_ns=stat.st_mtime_ns, source_size=stat.st_size,
+                synonyms_mtime_ns=synonyms_mtime_ns, compiled_at=time.time())
+    write_kb(arrays, meta, path)
+    return path
+
+
+class DiseaseTerms(NamedTuple):
+    symptom_tokens: frozenset
+    symptom_phrases: Dict[str, str]  # phrase_key -> symptom as written in the DB
+    red_flags: Tuple[Tuple[str, frozenset, str], ...]  # (red flag, its tokens, its phrase_key)
+
+
+class KnowledgeBase:
+    """Read-only view of a compiled KB: the index sections and the disease records by id."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], path: Optional[str] = None,
+                 mm: Optional[mmap.mmap] = None):
+        self.arrays = arrays
+        self.meta = meta
+        self.path = path
+        self._mm = mm
+        self.file_id = None  # (inode, mtime) of the mapped file
+        self.flag_stride = meta["flag_stride"]
+        # The only per-process structures: token -> vocabulary row (a few thousand entries) and
+        # bounded caches of the records recent queries returned; a KB never changes once built
+        self.vocab = {self._string("vocab", i): i for i in range(len(arrays["vocab_ptr"]) - 1)}
+        self.phrase_vocab = {self._string("phrase", i): i for i in range(len(arrays["phrase_ptr"]) - 1)}
+        self._phrase_matcher = None
+        self.index_of = functools.lru_cache(maxsize=KB_RECORD_CACHE)(self._index_of)
+        self.record = functools.lru_cache(maxsize=KB_RECORD_CACHE)(self._record)
+        self.terms = functools.lru_cache(maxsize=KB_RECORD_CACHE)(self._terms)
+
+    @classmethod
+    def from_dict(cls, db: Dict[str, Dict[str, Any]],
+                  synonyms: Optional[Dict[str, List[str]]] = None) -> "KnowledgeBase":
+        """Compile ``db`` in memory, without a file (tests, benchmarks, one-off scripts)."""
+        arrays, meta = build_arrays(db, synonyms)
+        return cls(arrays, meta)
+
+    @classmethod
+    def open(cls, path: str) -> "KnowledgeBase":
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, meta_length = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} knowledge base")
+            meta = json.loads(mm[HEADER.size:HEADER.size + meta_length])
+            base = HEADER.size + meta_length
+            arrays = {name: np.frombuffer(mm, dtype=np.dtype(dtype), count=count, offset=base + offset)
+                      for name, (offset, dtype, count) in meta["sections"].items()}
+        except Exception:
+            mm.close()
+            raise
+        kb = cls(arrays, meta, path, mm)
+        kb.file_id = (stat.st_ino, stat.st_mtime_ns)
+        return kb
+
+    def __reduce__(self):
+        # Worker processes re-map the file rather than receiving a pickled copy
+        if self.path:
+            return KnowledgeBase.open, (self.path,)
+        return KnowledgeBase, (self.arrays, self.meta)
+
+    def _string(self, kind: str, i: int) -> str:
+        ptr = self.arrays[f"{kind}_ptr"]
+        return self.arrays[f"{kind}_blob"][ptr[i]:ptr[i + 1]].tobytes().decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.meta["diseases"]
+
+    def __contains__(self, disease_id: str) -> bool:
+        return self.index_of(disease_id) is not None
+
+    def id_of(self, i: int) -> str:
+        return self._string("id", i)
+
+    def _index_of(self, disease_id: str) -> Optional[int]:
+        """Position of ``disease_id`` in the DB (binary search over the sorted id table)."""
+        order = self.arrays["id_order"]
+        lo = bisect.bisect_left(range(len(order)), disease_id, key=lambda k: self.id_of(order[k]))
+        if lo < len(order) and self.id_of(order[lo]) == disease_id:
+            return int(order[lo])
+        return None
+
+    def _record(self, i: int) -> Dict[str, Any]:
+        """The disease dict at position ``i``; shared through the cache, so treat it as read-only."""
+        return json.loads(self._string("record", i))
+
+    def _terms(self, i: int) -> DiseaseTerms:
+        record = self.record(i)
+        symptoms = record.get("symptoms", [])
+        return DiseaseTerms(
+            frozenset(t for symptom in symptoms for t in tokenize(symptom)),
+            {phrase_key(symptom): symptom for symptom in reversed(symptoms)},
+            tuple((flag, frozenset(tokenize(flag)), phrase_key(flag)) for flag in record.get("red_flags", [])),
+        )
+
+    def get(self, disease_id: str, default: Any = None) -> Any:
+        """The disease dict for ``disease_id``, like ``db.get`` on the JSON."""
+        i = self.index_of(disease_id)
+        return self.record(i) if i is not None else default
+
+    def postings(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(disease positions, BM25 weights) of the diseases whose symptoms contain ``token``."""
+        row = self.vocab.get(token)
+        if row is None:
+            return self.arrays["post_disease"][:0], self.arrays["post_bm25"][:0]
+        lo, hi = self.arrays["post_ptr"][row:row + 2]
+        return self.arrays["post_disease"][lo:hi], self.arrays["post_bm25"][lo:hi]
+
+    def flag_codes(self, token: str) -> np.ndarray:
+        """``disease * flag_stride + flag`` for the red flags containing ``token``."""
+        row = self.vocab.get(token)
+        if row is None:
+            return self.arrays["flag_code"][:0]
+        lo, hi = self.arrays["flag_ptr"][row:row + 2]
+        return self.arrays["flag_code"][lo:hi]
+
+    @property
+    def phrase_matcher(self) -> PhraseMatcher:
+        """Matcher for every symptom and red-flag phrase of this KB and their synonyms, built on first use."""
+        if self._phrase_matcher is None:
+            self._phrase_matcher = PhraseMatcher(self.phrase_vocab, self.meta.get("synonyms"))
+        return self._phrase_matcher
+
+    def phrase_postings(self, phrase: str) -> np.ndarray:
+        """Positions of the diseases with ``phrase`` (a phrase_key) among their symptoms."""
+        row = self.phrase_vocab.get(phrase)
+        if row is None:
+            return self.arrays["phrase_post_disease"][:0]
+        lo, hi = self.arrays["phrase_post_ptr"][row:row + 2]
+        return self.arrays["phrase_post_disease"][lo:hi]
+
+    def phrase_flag_codes(self, phrase: str) -> np.ndarray:
+        """``disease * flag_stride + flag`` for the red flags that are ``phrase``."""
+        row = self.phrase_vocab.get(phrase)
+        if row is None:
+            return self.arrays["phrase_flag_code"][:0]
+        lo, hi = self.arrays["phrase_flag_ptr"][row:row + 2]
+        return self.arrays["phrase_flag_code"][lo:hi]
+
+    def is_current(self, source: str) -> bool:
+        """Whether this KB was compiled from the current contents of ``source`` and its synonyms."""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return True  # Nothing newer to load
+        return ((self.meta.get("source_mtime_ns"), self.meta.get("source_size"),
+                 self.meta.get("synonyms_mtime_ns")) ==
+                (stat.st_mtime_ns, stat.st_size, _mtime_ns(synonyms_path(source))))
+
+    def close(self):
+        """Drop this process's mapping. Only call once no request still uses this KB."""
+        self.arrays = {}
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # Arrays from this KB are still referenced; the mapping goes when they do
+            self._mm = None
+
+
+def open_kb(source: str, path: Optional[str] = None) -> KnowledgeBase:
+    """Map the compiled KB for ``source``, compiling it first if missing or stale."""
+    path = path or compiled_path(source)
+    try:
+        kb = KnowledgeBase.open(path)
+        if kb.is_current(source):
+            return kb
+        kb.close()
+    except (OSError, ValueError, KeyError):
+        pass
+    return KnowledgeBase.open(compile_kb(source, path))
+
+
+class KnowledgeBaseLoader:
+    """
+    Holds the current KB for a JSON source and swaps in a new one when the
+    source changes (checked at most every ``check_interval`` seconds).
+    Agents read ``current`` once per message and use that KB throughout it.
+    """
+
+    def __init__(self, source: str, path: Optional[str] = None, check_interval: float = KB_CHECK_INTERVAL):
+        self.source = source
+        self.path = path or compiled_path(source)
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.errors = 0
+        self._kb = open_kb(source, self.path)
+        self._checked_at = time.monotonic()
+
+    def __getstate__(self):
+        return {"source": self.source, "path": self.path, "check_interval": self.check_interval}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def current(self) -> KnowledgeBase:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload()
+        return self._kb
+
+    def reload(self) -> bool:
+        """Swap in a fresh KB if the source (or the compiled file) changed; returns True if swapped."""
+        if self._kb.is_current(self.source) and self._compiled_unchanged():
+            return False
+        try:
+            kb = open_kb(self.source, self.path)
+        except (OSError, ValueError) as e:
+            # Typically the JSON caught mid-write; keep serving the old KB and retry next check
+            self.errors += 1
+            print(f"[KnowledgeBase] Reload of {self.source} failed, keeping the current KB: {e}")
+            return False
+        # The old mapping is left to the garbage collector so in-flight requests can finish with it
+        self._kb = kb
+        self.reloads += 1
+        print(f"[KnowledgeBase] Loaded {len(kb)} diseases from {self.source}")
+        return True
+
+    def _compiled_unchanged(self) -> bool:
+        # Another process may have recompiled the shared file already
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return self._kb.file_id == (stat.st_ino, stat.st_mtime_ns)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "path": self.path,
+            "diseases": len(self._kb),
+            "reloads": self.reloads,
+            "errors": self.errors,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile a JSON disease DB into a shared knowledge base file")
+    parser.add_argument("source", nargs="?", default="data/diseases.json")
+    parser.add_argument("--out", help="default: the source path with a .kb suffix")
+    args = parser.parse_args()
+    path = compile_kb(args.source, args.out)
+    print(f"Compiled {len(KnowledgeBase.open(path))} diseases into {path}")
@@ -1,30 +1,37 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from agents.base_agent import BaseAgent
-import json
+from agents.knowledge_base import KnowledgeBaseLoader
 
 class MedicalAdvisor(BaseAgent):
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, kb: Optional[KnowledgeBaseLoader] = None):
         super().__init__(name="Medical Advisor", role="Recommends next steps based on probable diagnoses")
-        with open(db_path, "r", encoding="utf-8") as f:
-            self.db = json.load(f)
+        self.kb = kb or KnowledgeBaseLoader(db_path)
 
     def receive(self, message: Dict[str, Any]) -> Dict[str, Any]:
         candidates = message.get("candidates", [])
         symptoms_text = message.get("symptoms_text", "")
+        # Phrase keys the analyzer's phrase matcher found (synonyms resolved)
+        phrases = set(message.get("phrases", []))
         recommendations: List[str] = []
         urgent = False
         reasons = []
+        kb = self.kb.current
 
         for c in candidates:
-            disease = self.db.get(c["id"])
-            if not disease:
+            i = kb.index_of(c["id"])
+            if i is None:
                 continue
-            if c.get("flags"):
+            disease = kb.record(i)
+            # A red flag stated as a whole phrase or a synonym ("passed out" for "fainting") also counts
+            flags = list(c.get("flags", []))
+            flags += [flag for flag, _, key in kb.terms(i).red_flags if key in phrases and flag not in flags]
+            if flags:
                 urgent = True
-                reasons.append(f"Red flag(s) for {disease['name']}: {c.get('flags')}")
+                reasons.append(f"Red flag(s) for {disease['name']}: {flags}")
             if disease.get("severity") == "high" and c["score"] > 0.4:
                 urgent = True
-                reasons.append(f"High severity candidate: {disease['name']} (score {c['score']})")
+                matched = f"; matched: {', '.join(c['matched_phrases'])}" if c.get("matched_phrases") else ""
+                reasons.append(f"High severity candidate: {disease['name']} (score {c['score']}{matched})")
             recs = disease.get("recommended_tests", []) + disease.get("advice", [])
             for r in recs:
                 if r not in recommendations:
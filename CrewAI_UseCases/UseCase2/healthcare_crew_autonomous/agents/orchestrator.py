@@ -1,13 +1,21 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from agents.base_agent import BaseAgent
+from agents.knowledge_base import KnowledgeBaseLoader
 from agents.symptom_analyzer import SymptomAnalyzer
+from agents.symptom_index import TRIAGE_SCORING
 from agents.medical_advisor import MedicalAdvisor
+from agents.runtime import MAILBOX_SIZE, AgentRuntime
 
 class Orchestrator(BaseAgent):
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, kb: Optional[KnowledgeBaseLoader] = None, scoring: str = TRIAGE_SCORING):
         super().__init__(name="Orchestrator", role="Coordinates the triage workflow")
-        self.symptom_analyzer = SymptomAnalyzer(db_path)
-        self.medical_advisor = MedicalAdvisor(db_path)
+        # One compiled KB mapped once and shared by both agents
+        self.kb = kb or KnowledgeBaseLoader(db_path)
+        self.symptom_analyzer = SymptomAnalyzer(db_path, scoring=scoring, kb=self.kb)
+        self.medical_advisor = MedicalAdvisor(db_path, kb=self.kb)
+        self.db_path = db_path
+        self.scoring = scoring
+        self.runtime: Optional[AgentRuntime] = None
 
     def receive(self, message: Dict[str, Any]) -> Dict[str, Any]:
         symptoms_text = message.get("symptoms_text", "")
@@ -18,15 +26,76 @@ class Orchestrator(BaseAgent):
         print("[Orchestrator] -> Medical Advisor")
         advisor_resp = self.medical_advisor.receive({
             "candidates": analyze_resp.get("candidates", []),
-            "symptoms_text": symptoms_text
+            "symptoms_text": symptoms_text,
+            "phrases": analyze_resp.get("phrases", [])
         })
 
-        triage_report = {
+        return {"agent": self.name, "triage_report": self._report(symptoms_text, analyze_resp, advisor_resp)}
+
+    def receive_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Triage many messages at once (e.g. re-triaging historical intake
+        notes): the analyzer scores them in one vectorized pass, then the
+        advisor runs per message. Returns what ``receive`` would for each
+        message, without the per-step prints, so output can be piped.
+        """
+        analyze_resps = self.symptom_analyzer.receive_batch(messages)
+        responses = []
+        for message, analyze_resp in zip(messages, analyze_resps):
+            symptoms_text = message.get("symptoms_text", "")
+            advisor_resp = self.medical_advisor.receive({
+                "candidates": analyze_resp.get("candidates", []),
+                "symptoms_text": symptoms_text,
+                "phrases": analyze_resp.get("phrases", [])
+            })
+            responses.append({"agent": self.name,
+                              "triage_report": self._report(symptoms_text, analyze_resp, advisor_resp)})
+        return responses
+
+    async def start(self, analyzers: int = 1, advisors: int = 1, analyzer_backend: str = "inline",
+                    advisor_backend: str = "inline", mailbox_size: int = MAILBOX_SIZE) -> AgentRuntime:
+        """
+        Run the analyzer and advisor as actors (see agents/runtime.py) so
+        ``receive_async`` can serve many sessions concurrently. Use
+        analyzer_backend="process" to score on several cores. Call from
+        inside the event loop and ``stop`` when done.
+        """
+        self.runtime = AgentRuntime(mailbox_size)
+        self.runtime.spawn("analyzer", SymptomAnalyzer, self.db_path, instances=analyzers,
+                           backend=analyzer_backend, scoring=self.scoring, kb=self.kb)
+        self.runtime.spawn("advisor", MedicalAdvisor, self.db_path, instances=advisors,
+                           backend=advisor_backend, kb=self.kb)
+        await self.runtime.ready()
+        return self.runtime
+
+    async def receive_async(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        ``receive`` as one session on the runtime from ``start``. The
+        response also carries the session's ``correlation_id``: the
+        message's own, or a new one.
+        """
+        symptoms_text = message.get("symptoms_text", "")
+        correlation_id = message.get("correlation_id") or self.runtime.new_id()
+        analyze_resp = await self.runtime.ask("analyzer", {"symptoms_text": symptoms_text}, correlation_id)
+        advisor_resp = await self.runtime.ask("advisor", {
+            "candidates": analyze_resp.get("candidates", []),
+            "symptoms_text": symptoms_text,
+            "phrases": analyze_resp.get("phrases", [])
+        }, correlation_id)
+        return {"agent": self.name, "correlation_id": correlation_id,
+                "triage_report": self._report(symptoms_text, analyze_resp, advisor_resp)}
+
+    async def stop(self):
+        if self.runtime is not None:
+            await self.runtime.close()
+            self.runtime = None
+
+    @staticmethod
+    def _report(symptoms_text: str, analyze_resp: Dict[str, Any], advisor_resp: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "input_symptoms": symptoms_text,
             "candidates": analyze_resp.get("candidates", []),
             "analyzer_reasoning": analyze_resp.get("reasoning"),
             "recommendations": advisor_resp.get("recommendations"),
             "advisor_reasons": advisor_resp.get("reasons")
         }
-
-        return {"agent": self.name, "triage_report": triage_report}
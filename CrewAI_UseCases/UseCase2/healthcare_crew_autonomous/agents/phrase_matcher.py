@@ -0,0 +1,123 @@
+"""
+Aho-Corasick matcher for symptom and red-flag phrases.
+
+``tokenize`` sees "chest pain" only as the loose words "chest" and "pain".
+``PhraseMatcher`` compiles every symptom and red-flag phrase of the KB,
+plus synonyms from data/synonyms.json, into one automaton over
+normalized words. It then reports every phrase occurring in a text,
+overlapping ones included ("severe chest pain" and "chest pain"), in one
+pass over the text's words. The cost of that pass does not depend on how
+many phrases the KB has.
+
+Normalization is deliberately simple. Text is lowercased and split on
+anything that is not a letter or digit ("short-of-breath" becomes
+"short of breath", "can't" becomes "can t"). A plural "s" is dropped
+("coughs" matches "cough"). Phrases and input are normalized the same way.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize(text: str) -> List[str]:
+    """Normalized words of ``text``."""
+    return [_stem(w) for w in WORD.findall(text.lower())]
+
+
+def phrase_key(text: str) -> str:
+    """Canonical form of a phrase: its normalized words joined by single spaces."""
+    return " ".join(normalize(text))
+
+
+def load_synonyms(path: Optional[str]) -> Dict[str, List[str]]:
+    """``{phrase: [variants]}`` from a JSON file, keys and variants normalized; {} if there is no file."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {phrase_key(phrase): [phrase_key(v) for v in variants] for phrase, variants in raw.items()}
+
+
+class PhraseHit(NamedTuple):
+    phrase: str  # canonical phrase (phrase_key of the KB symptom or red flag)
+    start: int  # character span of the match in the input text
+    end: int
+    text: str  # the matched input text, e.g. a synonym
+
+
+class PhraseMatcher:
+    def __init__(self, phrases: Iterable[str], synonyms: Optional[Dict[str, List[str]]] = None):
+        """
+        ``phrases`` are canonical phrase keys. Each synonym variant reports
+        its canonical phrase, and only for phrases in ``phrases``.
+        """
+        self.phrases = sorted(set(phrases))
+        patterns: Dict[Tuple[str, ...], set] = {}
+        for phrase in self.phrases:
+            patterns.setdefault(tuple(phrase.split()), set()).add(phrase)
+        for phrase, variants in (synonyms or {}).items():
+            if phrase in patterns.get(tuple(phrase.split()), ()):
+                for variant in variants:
+                    if variant:
+                        patterns.setdefault(tuple(variant.split()), set()).add(phrase)
+
+        # Trie over words; state 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[Tuple[str, int]]] = [[]]  # (canonical phrase, pattern length in words)
+        for words, canonical in patterns.items():
+            state = 0
+            for word in words:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._out.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._out[state] += [(phrase, len(words)) for phrase in sorted(canonical)]
+
+        # Failure links, breadth first, with outputs merged along them
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+        self.patterns = len(patterns)
+
+    def __len__(self) -> int:
+        return self.patterns
+
+    def find(self, text: str) -> List[PhraseHit]:
+        """Every phrase occurrence in ``text``, ordered by where it ends."""
+        lowered = text.lower()
+        # Offsets index the lowered text; they match ``text`` unless lowering changed its length
+        source = text if len(lowered) == len(text) else lowered
+        spans = [(m.start(), m.end(), _stem(m.group())) for m in WORD.finditer(lowered)]
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        state = 0
+        for i, (_, end, word) in enumerate(spans):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for phrase, length in out[state]:
+                start = spans[i - length + 1][0]
+                hits.append(PhraseHit(phrase, start, end, source[start:end]))
+        return hits
+
+    def phrases_in(self, text: str) -> List[str]:
+        """Distinct canonical phrases found in ``text``, in order of first occurrence."""
+        return list(dict.fromkeys(hit.phrase for hit in self.find(text)))
@@ -0,0 +1,232 @@
+"""
+Async actor runtime for the triage agents.
+
+``BaseAgent.receive`` is a plain method call. ``AgentRuntime`` runs agents
+as actors behind it, so many triage sessions can be in flight at once:
+
+- Each agent instance is an actor with its own bounded mailbox (an
+  ``asyncio.Queue``). It handles one message at a time, so agents need no
+  locking. A full mailbox makes ``ask`` wait, which applies backpressure
+  to the sessions.
+- A role (e.g. "analyzer") can have several instances. ``ask`` sends to
+  the instance with the fewest queued and running messages.
+- Every request carries a correlation ID and its own reply future. The
+  response is stamped with the ID. ``Orchestrator`` uses one ID per triage
+  session for both of its hops.
+- Backends say where ``receive`` runs. "inline" runs it on the event loop
+  (cheap agents such as MedicalAdvisor). "thread" gives each instance its
+  own thread. "process" gives each instance its own worker process for
+  CPU-heavy agents such as SymptomAnalyzer. The agent is built in the
+  worker from its class and arguments, and a ``KnowledgeBaseLoader``
+  argument pickles by path, so workers map the shared compiled KB instead
+  of copying it.
+
+``stats`` reports per-role queue depth, counts and latency percentiles.
+Wait is the time a message spends in a mailbox. Service is the time from
+dequeue until the response.
+"""
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type
+from agents.base_agent import BaseAgent
+
+BACKENDS = ("inline", "thread", "process")
+MAILBOX_SIZE = int(os.getenv("AGENT_MAILBOX_SIZE", "256"))  # queued messages per agent instance
+LATENCY_SAMPLES = 4096  # most recent wait/service times kept per role for percentiles
+
+# The agent a "process" backend worker hosts, built once by _start_worker
+_worker_agent: Optional[BaseAgent] = None
+
+
+def _start_worker(agent_class: Type[BaseAgent], args: Tuple, kwargs: Dict[str, Any]):
+    global _worker_agent
+    _worker_agent = agent_class(*args, **kwargs)
+
+
+def _worker_ready() -> bool:
+    return _worker_agent is not None
+
+
+def _worker_receive(message: Dict[str, Any]) -> Dict[str, Any]:
+    return _worker_agent.receive(message)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class Envelope(NamedTuple):
+    correlation_id: str
+    message: Dict[str, Any]
+    reply: asyncio.Future
+    enqueued: float  # time.monotonic() when the message entered the mailbox
+
+
+class Actor:
+    """One agent instance: a mailbox and the task that drains it."""
+
+    def __init__(self, name: str, agent: Optional[BaseAgent], executor: Optional[Executor],
+                 stats: "RoleStats", mailbox_size: int = MAILBOX_SIZE):
+        self.name = name
+        self.agent = agent  # None when the agent lives in the executor's worker process
+        self.executor = executor
+        self.stats = stats
+        self.mailbox: asyncio.Queue = asyncio.Queue(mailbox_size)
+        self.busy = False
+        self.ready = asyncio.Event()
+        self.failed: Optional[BaseException] = None  # why the worker process could not start
+        self._task = asyncio.create_task(self._run(), name=name)
+
+    @property
+    def load(self) -> int:
+        return self.mailbox.qsize() + self.busy
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        if self.agent is None:
+            # Start the worker process (and build its agent) before taking messages
+            try:
+                await loop.run_in_executor(self.executor, _worker_ready)
+            except Exception as e:
+                self.failed = e
+                self.ready.set()
+                raise
+        self.ready.set()
+        while True:
+            envelope = await self.mailbox.get()
+            self.busy = True
+            started = time.monotonic()
+            try:
+                if self.executor is None:
+                    response = self.agent.receive(envelope.message)
+                elif self.agent is None:
+                    response = await loop.run_in_executor(self.executor, _worker_receive, envelope.message)
+                else:
+                    response = await loop.run_in_executor(self.executor, self.agent.receive, envelope.message)
+            except Exception as e:
+                self.stats.errors += 1
+                if not envelope.reply.done():
+                    envelope.reply.set_exception(e)
+            else:
+                if not envelope.reply.done():  # the asker may have been cancelled
+                    envelope.reply.set_result({**response, "correlation_id": envelope.correlation_id})
+            finally:
+                self.busy = False
+                self.stats.record(started - envelope.enqueued, time.monotonic() - started)
+                self.mailbox.task_done()
+
+    async def close(self):
+        await self.mailbox.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+class RoleStats:
+    def __init__(self):
+        self.handled = 0
+        self.errors = 0
+        self.max_queued = 0
+        self.waits: deque = deque(maxlen=LATENCY_SAMPLES)
+        self.services: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, wait: float, service: float):
+        self.handled += 1
+        self.waits.append(wait)
+        self.services.append(service)
+
+
+class AgentRuntime:
+    def __init__(self, mailbox_size: int = MAILBOX_SIZE):
+        """Create inside a running event loop; ``close`` it when done."""
+        self.mailbox_size = mailbox_size
+        self.roles: Dict[str, List[Actor]] = {}
+        self.backends: Dict[str, str] = {}
+        self._stats: Dict[str, RoleStats] = {}
+        self._ids = itertools.count(1)
+
+    def spawn(self, role: str, agent_class: Type[BaseAgent], *args, instances: int = 1,
+              backend: str = "inline", **kwargs) -> List[Actor]:
+        """
+        Start ``instances`` actors of ``agent_class(*args, **kwargs)`` under
+        ``role``. For the "process" backend the class and its arguments must
+        be picklable.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+        if role in self.roles:
+            raise ValueError(f"Role {role!r} is already running")
+        stats = self._stats[role] = RoleStats()
+        actors = []
+        for i in range(instances):
+            agent, executor = None, None
+            if backend == "process":
+                # spawn, not fork: a forked worker would inherit the parent's event loop and threads
+                executor = ProcessPoolExecutor(1, mp_context=mp.get_context("spawn"), initializer=_start_worker,
+                                               initargs=(agent_class, args, kwargs))
+            else:
+                agent = agent_class(*args, **kwargs)
+                if backend == "thread":
+                    executor = ThreadPoolExecutor(1, thread_name_prefix=f"{role}-{i}")
+            actors.append(Actor(f"{role}-{i}", agent, executor, stats, self.mailbox_size))
+        self.roles[role] = actors
+        self.backends[role] = backend
+        return actors
+
+    async def ready(self):
+        """Wait until every actor can take messages ("process" workers take a moment to start)."""
+        actors = [actor for actors in self.roles.values() for actor in actors]
+        await asyncio.gather(*(actor.ready.wait() for actor in actors))
+        for actor in actors:
+            if actor.failed is not None:
+                raise RuntimeError(f"{actor.name} failed to start") from actor.failed
+
+    def new_id(self) -> str:
+        return f"{os.getpid():x}-{next(self._ids):x}"
+
+    async def ask(self, role: str, message: Dict[str, Any], correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send ``message`` to the least-loaded instance of ``role`` and wait
+        for its response, which carries ``correlation_id`` (a new one if not
+        given). Exceptions raised by the agent are re-raised here.
+        """
+        actor = min(self.roles[role], key=lambda a: a.load)
+        reply = asyncio.get_running_loop().create_future()
+        await actor.mailbox.put(Envelope(correlation_id or self.new_id(), message, reply, time.monotonic()))
+        stats = self._stats[role]
+        stats.max_queued = max(stats.max_queued, actor.mailbox.qsize())
+        return await reply
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for role, actors in self.roles.items():
+            stats = self._stats[role]
+            waits, services = list(stats.waits), list(stats.services)
+            report[role] = {
+                "backend": self.backends[role],
+                "instances": len(actors),
+                "queued": sum(a.mailbox.qsize() for a in actors),
+                "busy": sum(a.busy for a in actors),
+                "max_queued": stats.max_queued,
+                "handled": stats.handled,
+                "errors": stats.errors,
+                "wait_ms_p50": percentile(waits, 50) * 1000,
+                "wait_ms_p99": percentile(waits, 99) * 1000,
+                "service_ms_p50": percentile(services, 50) * 1000,
+                "service_ms_p99": percentile(services, 99) * 1000,
+            }
+        return report
+
+    async def close(self):
+        """Let every mailbox drain, then stop the actors and their threads/processes."""
+        await asyncio.gather(*(actor.close() for actors in self.roles.values() for actor in actors))
+        self.roles.clear()
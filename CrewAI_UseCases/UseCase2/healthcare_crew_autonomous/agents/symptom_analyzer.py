@@ -1,15 +1,24 @@
 import json
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from agents.base_agent import BaseAgent
+from agents.knowledge_base import KnowledgeBaseLoader
+from agents.phrase_matcher import phrase_key
+from agents.symptom_index import TRIAGE_SCORING, SymptomIndex, tokenize
 
 def load_db(path: str):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def tokenize(text: str) -> List[str]:
-    return [t.strip().lower() for t in text.replace("/", " ").replace(",", " ").split() if t.strip()]
-
-def score_disease(symptom_tokens: List[str], disease: Dict) -> Tuple[float, List[str]]:
+def score_disease(symptom_tokens: List[str], disease: Dict,
+                  phrases: Optional[List[str]] = None) -> Tuple[float, List[str]]:
+    if phrases is not None:
+        # Phrase level: whole symptoms / red flags found by the phrase matcher (phrase keys)
+        symptoms = {phrase_key(s) for s in disease.get("symptoms", [])}
+        base_score = len(symptoms.intersection(phrases)) / max(1, len(symptoms))
+        flagged = [rf for rf in disease.get("red_flags", []) if phrase_key(rf) in phrases]
+        for _ in flagged:
+            base_score += 0.35 # flag boost
+        return min(base_score, 1.0), flagged
     disease_tokens = []
     for s in disease.get("symptoms", []):
         disease_tokens += tokenize(s)
@@ -26,24 +35,37 @@ def score_disease(symptom_tokens: List[str], disease: Dict) -> Tuple[float, List
     return min(base_score, 1.0), flagged
 
 class SymptomAnalyzer(BaseAgent):
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, scoring: str = TRIAGE_SCORING, kb: Optional[KnowledgeBaseLoader] = None):
         super().__init__(name="Symptom Analyzer", role="Identifies possible medical conditions from symptoms")
-        self.db = load_db(db_path)
+        # Shared compiled KB (see agents/knowledge_base.py); pass the Orchestrator's loader to share it
+        self.kb = kb or KnowledgeBaseLoader(db_path)
+        self.scoring = scoring
+        self._index = SymptomIndex(self.kb.current, scoring)
+
+    @property
+    def index(self) -> SymptomIndex:
+        kb = self.kb.current
+        if self._index.kb is not kb:  # KB was hot-swapped
+            self._index = SymptomIndex(kb, self.scoring)
+        return self._index
 
     def receive(self, message: Dict[str, Any]) -> Dict[str, Any]:
         symptoms_text = message.get("symptoms_text", "")
         tokens = tokenize(symptoms_text)
-        scores = []
-        for key, disease in self.db.items():
-            sc, flags = score_disease(tokens, disease)
-            if sc > 0:
-                scores.append({
-                    "id": key,
-                    "name": disease.get("name"),
-                    "score": round(sc, 3),
-                    "flags": flags,
-                    "matched_tokens": [t for t in tokens if t in " ".join(disease.get("symptoms", [])).lower()]
-                })
-        scores.sort(key=lambda x: x["score"], reverse=True)
-        reasoning = f"Analyzed {len(self.db)} diseases; found {len(scores)} candidates."
-        return {"agent": self.name, "candidates": scores[:5], "reasoning": reasoning}
+        index = self.index
+        # One pass of the KB's phrase automaton; "phrases" goes on to the MedicalAdvisor
+        phrases = index.kb.phrase_matcher.phrases_in(symptoms_text)
+        candidates, found = index.search(tokens, phrases=phrases)
+        reasoning = f"Analyzed {len(index)} diseases; found {found} candidates."
+        return {"agent": self.name, "candidates": candidates, "reasoning": reasoning, "phrases": phrases}
+
+    def receive_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """``receive`` for many messages, scored together by ``SymptomIndex.search_batch``."""
+        index = self.index
+        texts = [m.get("symptoms_text", "") for m in messages]
+        phrases = [index.kb.phrase_matcher.phrases_in(text) for text in texts]
+        results = index.search_batch([tokenize(text) for text in texts], phrases=phrases)
+        return [{"agent": self.name, "candidates": candidates,
+                 "reasoning": f"Analyzed {len(index)} diseases; found {found} candidates.",
+                 "phrases": query_phrases}
+                for (candidates, found), query_phrases in zip(results, phrases)]
@@ -0,0 +1,220 @@
+"""
+Inverted index over the disease DB for SymptomAnalyzer.
+
+The DB is compiled once into token -> disease postings (NumPy arrays of
+disease indices and precomputed weights) and token -> red-flag postings;
+see agents/knowledge_base.py, which stores them in a shared memory-mapped
+file. A query adds the postings of its tokens into one score array, so it
+only touches the diseases that share a token with it instead of
+re-tokenizing every disease's symptoms per query.
+
+Scoring modes:
+- "legacy" (``SymptomIndex``'s default): the scores of ``score_disease``
+  on tokens. This is the number
+  of query tokens (repeats included) found among a disease's distinct
+  symptom tokens, divided by the count of those tokens. Each red flag
+  sharing a token with the query adds 0.35, and the score is capped at 1.0.
+- "bm25": the BM25 weight of the matched symptom tokens divided by the
+  disease's total BM25 weight, plus the same red-flag boost. Rare,
+  specific symptoms then count for more than common words like "pain".
+  Scores stay in [0, 1], so MedicalAdvisor's 0.4 threshold keeps its
+  meaning.
+- "phrase": whole symptoms found by the phrase matcher (agents/phrase_matcher.py,
+  synonyms included) divided by the disease's number of symptoms. Each red
+  flag found as a whole phrase adds 0.35 ("pain" alone no longer fires the
+  "chest pain" red flag). This is ``score_disease`` with ``phrases``.
+
+SymptomAnalyzer and Orchestrator score with ``TRIAGE_SCORING`` (default
+"phrase"), so triage uses whole phrases and synonyms unless set otherwise.
+
+When the query's phrases are passed to ``search``, every candidate also
+lists ``matched_phrases``: its symptoms (as written in the DB) found in the
+text.
+
+Compatibility with the linear scan: in "legacy" mode the candidate ids,
+scores, flags, candidate count and tie order (DB order) are unchanged.
+``matched_tokens`` now lists query tokens that are whole symptom tokens.
+The old substring test also matched fragments, for example "ache" in
+"headache" or "in" in "pain".
+"""
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from agents.knowledge_base import KnowledgeBase, tokenize
+
+try:
+    import scipy.sparse as sparse
+except ImportError:  # search_batch falls back to one search() per query
+    sparse = None
+
+RED_FLAG_BOOST = 0.35
+SCORING_MODES = ("legacy", "bm25", "phrase")
+TRIAGE_SCORING = os.getenv("TRIAGE_SCORING", "phrase")  # scoring mode of SymptomAnalyzer and Orchestrator
+BATCH_CELLS = 1 << 23  # query x disease scores held at once by search_batch (64 MB)
+
+
+class SymptomIndex:
+    def __init__(self, kb: Union[KnowledgeBase, Dict[str, Dict[str, Any]]], scoring: str = "legacy"):
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring {scoring!r}; expected one of {SCORING_MODES}")
+        self.kb = kb if isinstance(kb, KnowledgeBase) else KnowledgeBase.from_dict(kb)
+        self.scoring = scoring
+        self.norms = self.kb.arrays[f"norms_{scoring}"]
+        self._matrices = None
+
+    def __len__(self) -> int:
+        return len(self.kb)
+
+    def search(self, tokens: List[str], limit: int = 5,
+               phrases: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Top ``limit`` candidates for the query ``tokens`` and the total number
+        of candidates. ``phrases`` are the phrase keys the phrase matcher
+        found in the query text; "phrase" scoring needs them.
+        """
+        query = self._query_terms(tokens, phrases)
+        kb = self.kb
+        scores = np.zeros(len(kb))
+        for term, count in query.items():
+            diseases, weights = self._postings(term)
+            # Legacy and phrase weights are all 1.0: each occurrence of the term in the query counts once
+            scores[diseases] += weights if self.scoring == "bm25" else count
+        scores /= self.norms
+
+        flag_hits = np.zeros((len(kb), kb.flag_stride), dtype=bool)
+        for term in query:
+            flag_hits.flat[self._flag_codes(term)] = True
+        flag_counts = flag_hits.sum(axis=1)
+        # One add per flag, as score_disease does, so legacy scores match it bit for bit
+        for n in range(flag_counts.max(initial=0)):
+            scores[flag_counts > n] += RED_FLAG_BOOST
+        np.minimum(scores, 1.0, out=scores)
+
+        hits = np.flatnonzero(scores > 0)
+        candidates = self._top(hits, scores[hits], tokens, phrases, limit)
+        return candidates, len(hits)
+
+    def _query_terms(self, tokens: List[str], phrases: Optional[List[str]]) -> Counter:
+        if self.scoring == "phrase":
+            return Counter(set(phrases or ()))  # A symptom counts once however often it is mentioned
+        return Counter(tokens)
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.scoring == "phrase":
+            return self.kb.phrase_postings(term), None
+        return self.kb.postings(term)
+
+    def _flag_codes(self, term: str) -> np.ndarray:
+        if self.scoring == "phrase":
+            return self.kb.phrase_flag_codes(term)
+        return self.kb.flag_codes(term)
+
+    def search_batch(self, queries: List[List[str]], limit: int = 5,
+                     phrases: Optional[List[List[str]]] = None) -> List[Tuple[List[Dict[str, Any]], int]]:
+        """
+        ``search`` for many token lists (and their phrase lists) at once: a
+        (query x term) sparse matrix times the (term x disease) postings
+        matrix, with red-flag boosts applied as masked adds. Results equal
+        ``search`` per query.
+        """
+        phrases = phrases if phrases is not None else [None] * len(queries)
+        if sparse is None:
+            return [self.search(tokens, limit, query_phrases) for tokens, query_phrases in zip(queries, phrases)]
+        # Common words match most diseases, so score rows are nearly dense: score a block of
+        # queries at a time into a dense array of at most BATCH_CELLS scores
+        block = max(1, BATCH_CELLS // max(1, len(self.kb)))
+        results = []
+        for start in range(0, len(queries), block):
+            results += self._search_block(queries[start:start + block], phrases[start:start + block], limit)
+        return results
+
+    def _search_block(self, queries: List[List[str]], phrases: List[Optional[List[str]]],
+                      limit: int) -> List[Tuple[List[Dict[str, Any]], int]]:
+        kb = self.kb
+        weights, flag_matrix = self._sparse_matrices()
+        vocab = kb.phrase_vocab if self.scoring == "phrase" else kb.vocab
+        rows, cols, counts = [], [], []
+        for q, (tokens, query_phrases) in enumerate(zip(queries, phrases)):
+            for term, count in self._query_terms(tokens, query_phrases).items():
+                row = vocab.get(term)
+                if row is not None:
+                    rows.append(q)
+                    cols.append(row)
+                    counts.append(count)
+        shape = (len(queries), len(vocab))
+        counts = np.array(counts, dtype=float)
+        present = sparse.csr_matrix((np.ones_like(counts), (rows, cols)), shape=shape)
+        query = present if self.scoring == "bm25" else sparse.csr_matrix((counts, (rows, cols)), shape=shape)
+
+        scores = (query @ weights).toarray()
+        scores /= self.norms
+        # (query x disease*flag) hits; a disease's boost is one add per distinct flag hit, as in search()
+        flag_hits = (present @ flag_matrix).tocsr()
+        hit_rows = np.repeat(np.arange(len(queries)), np.diff(flag_hits.indptr))
+        flag_counts = np.bincount(hit_rows * len(kb) + flag_hits.indices // kb.flag_stride,
+                                  minlength=scores.size).reshape(scores.shape)
+        for n in range(flag_counts.max(initial=0)):
+            # Masked add: x + 0.0 == x, so unmasked scores are untouched
+            scores += (flag_counts > n) * RED_FLAG_BOOST
+        np.minimum(scores, 1.0, out=scores)
+
+        results = []
+        for q, (tokens, query_phrases) in enumerate(zip(queries, phrases)):
+            hits = np.flatnonzero(scores[q] > 0)
+            results.append((self._top(hits, scores[q, hits], tokens, query_phrases, limit), len(hits)))
+        return results
+
+    def _sparse_matrices(self):
+        """(term x disease) weights and (term x disease*flag) red flags, sharing the KB's arrays."""
+        if self._matrices is None:
+            kb, arrays = self.kb, self.kb.arrays
+            prefix, terms = ("phrase_", len(kb.phrase_vocab)) if self.scoring == "phrase" else ("", len(kb.vocab))
+            diseases = arrays[f"{prefix}post_disease"]
+            data = arrays["post_bm25"] if self.scoring == "bm25" else np.ones(len(diseases))
+            weights = sparse.csr_matrix((data, diseases, arrays[f"{prefix}post_ptr"]), shape=(terms, len(kb)))
+            flag_codes = arrays[f"{prefix}flag_code"]
+            flag_matrix = sparse.csr_matrix((np.ones(len(flag_codes)), flag_codes, arrays[f"{prefix}flag_ptr"]),
+                                            shape=(terms, len(kb) * kb.flag_stride))
+            self._matrices = weights, flag_matrix
+        return self._matrices
+
+    def _top(self, hits: np.ndarray, scores: np.ndarray, tokens: List[str], phrases: Optional[List[str]],
+             limit: int) -> List[Dict[str, Any]]:
+        """Candidate dicts for the ``limit`` best of ``hits`` (disease positions) scored ``scores``."""
+        kb = self.kb
+        if len(hits) > limit:
+            # Rounding to 3 places moves a score by at most 0.0005, so nothing more than 0.001
+            # below the limit-th best score can reach the top after rounding
+            cutoff = np.partition(scores, len(hits) - limit)[len(hits) - limit] - 0.001
+            keep = scores >= cutoff
+            hits, scores = hits[keep], scores[keep]
+        rounded = np.round(scores, 3)
+        # np.round scales by 1000 first; redo scores near a half-way point with round() so ties break
+        # exactly as they did in the scan
+        scaled = scores * 1000
+        for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+            rounded[i] = round(float(scores[i]), 3)
+        order = np.lexsort((hits, -rounded))[:limit]
+
+        query = set(tokens)
+        query_phrases = set(phrases or ())
+        candidates = []
+        for disease, score in zip(hits[order].tolist(), rounded[order].tolist()):
+            terms = kb.terms(disease)
+            if self.scoring == "phrase":
+                flags = [flag for flag, _, key in terms.red_flags if key in query_phrases]
+            else:
+                flags = [flag for flag, flag_tokens, _ in terms.red_flags if not query.isdisjoint(flag_tokens)]
+            candidate = {
+                "id": kb.id_of(disease),
+                "name": kb.record(disease).get("name"),
+                "score": score,
+                "flags": flags,
+                "matched_tokens": [t for t in tokens if t in terms.symptom_tokens],
+            }
+            if phrases is not None:
+                candidate["matched_phrases"] = [terms.symptom_phrases[p] for p in dict.fromkeys(phrases)
+                                                if p in terms.symptom_phrases]
+            candidates.append(candidate)
+        return candidates
@@ -0,0 +1,56 @@
+"""
+Triage throughput: Orchestrator.receive per note vs. receive_batch.
+
+Random intake notes are triaged against synthetic KBs from ``generate_kb.py``
+one ``receive`` at a time, then with ``receive_batch`` (the sparse matrix
+path, or one search per note if scipy is not installed). Also checks that
+both give the same reports:
+
+    python bench_batch.py --diseases 1000 10000 100000 --notes 2000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from agents import symptom_index
+from agents.orchestrator import Orchestrator
+from agents.symptom_analyzer import load_db
+from bench_symptom_index import make_queries
+from generate_kb import generate_db
+
+
+def main(args):
+    messages = [{"symptoms_text": ", ".join(tokens)} for tokens in make_queries(args.notes, args.seed)]
+    backend = "scipy.sparse" if symptom_index.sparse is not None else "per-note fallback (no scipy)"
+    print(f"{args.notes} notes per run, batches of {args.batch_size}, batch backend: {backend}")
+    print(f"{'diseases':>9} {'receive/s':>10} {'batch/s':>9} {'speedup':>8} {'same':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.diseases:
+            source = os.path.join(tmp, f"diseases_{n}.json")
+            with open(source, "w", encoding="utf-8") as f:
+                json.dump(generate_db(n, args.seed, load_db("data/diseases.json")), f)
+            orchestrator = Orchestrator(source)
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                single = [orchestrator.receive(m) for m in messages]
+                single_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            batched = []
+            for i in range(0, len(messages), args.batch_size):
+                batched += orchestrator.receive_batch(messages[i:i + args.batch_size])
+            batch_seconds = time.perf_counter() - started
+            same = sum(a == b for a, b in zip(single, batched))
+            print(f"{n:>9} {len(messages) / single_seconds:>10.0f} {len(messages) / batch_seconds:>9.0f} "
+                  f"{single_seconds / batch_seconds:>7.2f}x {same:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diseases", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+"""
+Startup time and memory: per-agent JSON loads vs. the shared compiled KB.
+
+Each measurement runs in a fresh process that builds the triage agents and
+answers a few queries:
+
+- json: the previous startup. SymptomAnalyzer and MedicalAdvisor each
+  ``json.load`` the DB, and the analyzer compiles its index in memory.
+- kb: ``Orchestrator`` on a compiled data/*.kb file mapped once and shared
+  by both agents.
+
+Memory is reported as private (anonymous) RSS, which every worker process
+pays again, and file-backed RSS, which worker processes mapping the same KB
+share through the page cache (Linux /proc only). Times are CPU seconds of
+one worker, so workers sharing a core do not inflate them:
+
+    python bench_kb.py --diseases 10000 100000 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict
+from agents.knowledge_base import compile_kb
+from agents.symptom_analyzer import load_db
+from generate_kb import generate_db
+
+QUERIES = ["fever, cough and fatigue", "severe chest pain and shortness of breath",
+           "headache, stiff neck, high fever", "lower back pain with numbness"]
+
+
+def rss() -> Dict[str, float]:
+    """RssAnon and RssFile of this process in MB."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+
+def measure(mode: str, source: str) -> Dict[str, float]:
+    from agents.medical_advisor import MedicalAdvisor
+    from agents.orchestrator import Orchestrator
+    from agents.symptom_index import SymptomIndex, tokenize
+    before = rss()
+    started = time.process_time()
+    if mode == "json":
+        db = load_db(source)
+        advisor_db = load_db(source)
+        index = SymptomIndex(db)
+
+        def triage(text):
+            candidates, _ = index.search(tokenize(text))
+            return [advisor_db.get(c["id"]) for c in candidates]
+    else:
+        orchestrator = Orchestrator(source)
+        analyzer, advisor = orchestrator.symptom_analyzer, orchestrator.medical_advisor
+
+        def triage(text):
+            return advisor.receive(analyzer.receive({"symptoms_text": text}))
+    startup = time.process_time() - started
+    started = time.process_time()
+    for text in QUERIES:
+        triage(text)
+    first_queries = (time.process_time() - started) / len(QUERIES)
+    after = rss()
+    return {
+        "startup": startup,
+        "query": first_queries,
+        "anon": after["RssAnon"] - before["RssAnon"],
+        "file": after["RssFile"] - before["RssFile"],
+    }
+
+
+def main(args):
+    context = multiprocessing.get_context("spawn")
+    print(f"{'diseases':>9} {'mode':>5} {'compile s':>10} {'startup s':>10} {'query ms':>9} "
+          f"{'private MB':>11} {'file MB':>8} {f'private MB x{args.workers}':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.diseases:
+            source = os.path.join(tmp, f"diseases_{n}.json")
+            with open(source, "w", encoding="utf-8") as f:
+                json.dump(generate_db(n, args.seed, load_db("data/diseases.json")), f)
+            started = time.perf_counter()
+            compile_kb(source)
+            compile_seconds = time.perf_counter() - started
+            for mode in ("json", "kb"):
+                with context.Pool(args.workers) as pool:
+                    results = pool.starmap(measure, [(mode, source)] * args.workers)
+                r = results[0]
+                compile_text = f"{compile_seconds:>10.2f}" if mode == "kb" else f"{'-':>10}"
+                print(f"{n:>9} {mode:>5} {compile_text} {r['startup']:>10.3f} {r['query'] * 1000:>9.2f} "
+                      f"{r['anon']:>11.1f} {r['file']:>8.1f} {sum(x['anon'] for x in results):>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diseases", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--workers", type=int, default=4, help="processes started side by side")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
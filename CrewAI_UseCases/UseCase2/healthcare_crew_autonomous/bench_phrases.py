@@ -0,0 +1,62 @@
+"""
+Phrase matching cost vs. number of KB phrases: Aho-Corasick vs. per-phrase scan.
+
+Builds phrase sets of growing size (the KB's own symptoms and red flags
+plus random multi-word phrases) and matches the same intake notes with
+``PhraseMatcher`` and with a scan that tests every phrase against the
+normalized note, the way a substring check per symptom would:
+
+    python bench_phrases.py --phrases 100 1000 10000 100000 --notes 500
+"""
+import argparse
+import random
+import time
+from typing import List
+from agents.phrase_matcher import PhraseMatcher, load_synonyms, normalize, phrase_key
+from agents.symptom_analyzer import load_db
+from generate_kb import COMPLAINTS, GENERAL, SEVERE, SITES
+
+WORDS = sorted({w for phrase in SITES + COMPLAINTS + GENERAL + SEVERE for w in phrase.split()})
+
+
+def scan(phrases: List[str], text: str) -> List[str]:
+    padded = f" {' '.join(normalize(text))} "
+    return [phrase for phrase in phrases if f" {phrase} " in padded]
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    db = load_db("data/diseases.json")
+    base = {phrase_key(p) for d in db.values() for p in d["symptoms"] + d["red_flags"]}
+    notes = [", ".join(rng.sample(GENERAL + SEVERE, 3)) + f" and {rng.choice(SITES)} {rng.choice(COMPLAINTS)}"
+             for _ in range(args.notes)]
+    print(f"{args.notes} notes of ~{sum(len(n.split()) for n in notes) // len(notes)} words")
+    print(f"{'phrases':>8} {'build s':>8} {'matcher us':>11} {'scan us':>9} {'same':>6}")
+    for n in args.phrases:
+        phrases = set(base)
+        while len(phrases) < n:
+            phrases.add(" ".join(rng.sample(WORDS, rng.randint(2, 4))))
+        phrases = sorted(phrases)
+        started = time.perf_counter()
+        matcher = PhraseMatcher(phrases, load_synonyms("data/synonyms.json"))
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        found = [set(matcher.phrases_in(note)) for note in notes]
+        matcher_seconds = (time.perf_counter() - started) / len(notes)
+        scan_notes = notes[:max(1, args.notes * 1000 // n)]  # the scan gets slow on big phrase sets
+        started = time.perf_counter()
+        scanned = [set(scan(phrases, note)) for note in scan_notes]
+        scan_seconds = (time.perf_counter() - started) / len(scan_notes)
+        # Synonyms only exist for the matcher, so compare on the notes' canonical phrases
+        same = sum(s <= f for s, f in zip(scanned, found))
+        print(f"{n:>8} {build:>8.2f} {matcher_seconds * 1e6:>11.1f} {scan_seconds * 1e6:>9.1f} "
+              f"{same:>3}/{len(scan_notes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--phrases", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+"""
+Concurrent triage sessions: sequential Orchestrator.receive vs. the actor runtime.
+
+Random intake notes are triaged against a synthetic KB from ``generate_kb.py``,
+first one ``receive`` at a time, then as ``--concurrency`` concurrent
+``receive_async`` sessions per analyzer backend and instance count
+(``backend:instances``). The advisor runs inline. Reports throughput,
+session latency, the analyzer's mailbox wait and service time, and checks
+that the reports match ``receive``:
+
+    python bench_runtime.py --diseases 10000 --sessions 2000 --runtimes inline:1 thread:2 process:4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from agents.orchestrator import Orchestrator
+from agents.runtime import percentile
+from agents.symptom_analyzer import load_db
+from agents.symptom_index import SCORING_MODES, TRIAGE_SCORING
+from bench_symptom_index import make_queries
+from generate_kb import generate_db
+
+
+async def run_sessions(orchestrator, messages, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(message):
+        async with semaphore:
+            started = time.monotonic()
+            response = await orchestrator.receive_async(message)
+            return response, time.monotonic() - started
+
+    return await asyncio.gather(*(one(m) for m in messages))
+
+
+async def main(args):
+    messages = [{"symptoms_text": ", ".join(tokens)} for tokens in make_queries(args.sessions, args.seed)]
+    print(f"{args.sessions} sessions, {args.diseases} diseases, concurrency {args.concurrency}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'analyzer':>11} {'sessions/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'wait p50':>9} "
+          f"{'service p50':>12} {'same':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, f"diseases_{args.diseases}.json")
+        with open(source, "w", encoding="utf-8") as f:
+            json.dump(generate_db(args.diseases, args.seed, load_db("data/diseases.json")), f)
+        orchestrator = Orchestrator(source, scoring=args.scoring)
+
+        expected, latencies = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            for message in messages:
+                began = time.perf_counter()
+                expected.append(orchestrator.receive(message)["triage_report"])
+                latencies.append(time.perf_counter() - began)
+            seconds = time.perf_counter() - started
+        print(f"{'receive':>11} {len(messages) / seconds:>11.0f} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 99) * 1000:>8.1f} {'-':>9} {'-':>12} {'-':>6}")
+
+        for spec in args.runtimes:
+            backend, instances = spec.split(":")
+            runtime = await orchestrator.start(analyzers=int(instances), analyzer_backend=backend)
+            started = time.perf_counter()
+            results = await run_sessions(orchestrator, messages, args.concurrency)
+            seconds = time.perf_counter() - started
+            analyzer = runtime.stats()["analyzer"]
+            await orchestrator.stop()
+            latencies = [latency for _, latency in results]
+            same = sum(r["triage_report"] == e for (r, _), e in zip(results, expected))
+            print(f"{spec:>11} {len(messages) / seconds:>11.0f} {percentile(latencies, 50) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f} {analyzer['wait_ms_p50']:>9.1f} "
+                  f"{analyzer['service_ms_p50']:>12.2f} {same:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diseases", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--runtimes", nargs="+", default=["inline:1", "thread:2", f"process:{os.cpu_count() or 1}"],
+                        help="analyzer backend:instances per run")
+    parser.add_argument("--scoring", choices=SCORING_MODES, default=TRIAGE_SCORING)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""
+SymptomAnalyzer query latency: linear scan vs. inverted index.
+
+Synthetic knowledge bases from ``generate_kb.py`` are queried with random
+symptom texts by the original per-query scan (``score_disease`` over every
+disease) and by ``SymptomIndex`` in both scoring modes. Also reports how
+often the legacy-mode index returns the same top-5 as the scan:
+
+    python bench_symptom_index.py --diseases 1000 10000 100000 --queries 200
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+from agents.symptom_analyzer import load_db, score_disease, tokenize
+from agents.symptom_index import SymptomIndex
+from generate_kb import COMPLAINTS, GENERAL, SEVERE, SITES, generate_db
+
+
+def linear_scan(db: Dict[str, Any], tokens: List[str]) -> List[Dict[str, Any]]:
+    scores = []
+    for key, disease in db.items():
+        sc, flags = score_disease(tokens, disease)
+        if sc > 0:
+            scores.append({"id": key, "score": round(sc, 3), "flags": flags})
+    scores.sort(key=lambda x: x["score"], reverse=True)
+    return scores[:5]
+
+
+def make_queries(n: int, seed: int) -> List[List[str]]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        words = rng.sample(GENERAL + SEVERE, rng.randint(1, 3))
+        words += [f"{rng.choice(SITES)} {rng.choice(COMPLAINTS)}" for _ in range(rng.randint(0, 2))]
+        queries.append(tokenize(", ".join(words)))
+    return queries
+
+
+def timed(fn, queries) -> List[float]:
+    latencies = []
+    for tokens in queries:
+        started = time.perf_counter()
+        fn(tokens)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main(args):
+    base = load_db("data/diseases.json")
+    queries = make_queries(args.queries, args.seed)
+    print(f"{args.queries} queries per run")
+    print(f"{'diseases':>9} {'mode':>8} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'same top5':>10}")
+    for n in args.diseases:
+        db = generate_db(n, args.seed, base)
+        scan = [linear_scan(db, tokens) for tokens in queries[:args.check]]
+        lat = timed(lambda tokens: linear_scan(db, tokens), queries[:args.scan_queries])
+        print(f"{n:>9} {'scan':>8} {0:>8.2f} {statistics.median(lat) * 1000:>8.2f} "
+              f"{sorted(lat)[int(len(lat) * 0.99)] * 1000:>8.2f} {'-':>10}")
+        for scoring in ("legacy", "bm25"):
+            started = time.perf_counter()
+            index = SymptomIndex(db, scoring)
+            build = time.perf_counter() - started
+            lat = timed(index.search, queries)
+            same = "-"
+            if scoring == "legacy":
+                hits = sum(
+                    [(c["id"], c["score"], c["flags"]) for c in index.search(tokens)[0]]
+                    == [(c["id"], c["score"], c["flags"]) for c in expected]
+                    for tokens, expected in zip(queries, scan))
+                same = f"{hits}/{len(scan)}"
+            print(f"{n:>9} {scoring:>8} {build:>8.2f} {statistics.median(lat) * 1000:>8.2f} "
+                  f"{sorted(lat)[int(len(lat) * 0.99)] * 1000:>8.2f} {same:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diseases", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=20, help="queries timed on the slow scan")
+    parser.add_argument("--check", type=int, default=20, help="queries compared against the scan")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,61 @@
+"""
+Generate large synthetic disease DBs in the data/diseases.json format for benchmarks.
+
+Symptoms and red flags are drawn from a fixed clinical vocabulary, so
+common words ("pain", "fever") appear across many diseases the way they do
+in a real knowledge base. The real diseases in data/diseases.json are kept
+as the first entries:
+
+    python generate_kb.py --diseases 100000 --out data/diseases_100k.json
+"""
+import argparse
+import json
+import random
+from typing import Any, Dict
+
+SITES = ["chest", "abdominal", "back", "joint", "muscle", "head", "throat", "ear", "eye", "pelvic",
+         "flank", "neck", "shoulder", "knee", "skin", "arm", "leg", "jaw", "lower back", "upper abdominal"]
+COMPLAINTS = ["pain", "swelling", "stiffness", "tenderness", "numbness", "rash", "itching", "weakness",
+              "burning", "cramps", "pressure", "discomfort", "redness", "bleeding", "tingling"]
+GENERAL = ["fever", "fatigue", "nausea", "vomiting", "cough", "dizziness", "headache", "sweating",
+           "chills", "weight loss", "loss of appetite", "shortness of breath", "runny nose", "sore throat",
+           "diarrhea", "constipation", "palpitations", "insomnia", "confusion", "blurred vision",
+           "dry mouth", "frequent urination", "sneezing", "wheezing", "hoarseness", "night sweats"]
+SEVERE = ["high fever", "fainting", "vomiting blood", "severe chest pain", "difficulty swallowing",
+          "severe shortness of breath", "sudden weakness", "slurred speech", "seizure", "stiff neck",
+          "blood in stool", "severe headache", "unintended weight loss", "coughing blood"]
+TESTS = ["CBC", "ECG", "Chest X-ray", "Urinalysis", "CT scan", "Ultrasound", "Blood culture", "MRI"]
+ADVICE = ["Rest and hydration", "See primary care if persistent", "Seek urgent evaluation if worsening",
+          "OTC analgesics as needed", "Avoid strenuous activity"]
+
+
+def generate_db(diseases: int, seed: int = 7, base: Dict[str, Any] = None) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    db = dict(base or {})
+    for i in range(len(db), diseases):
+        symptoms = set(rng.sample(GENERAL, rng.randint(2, 4)))
+        while len(symptoms) < rng.randint(4, 7):
+            symptoms.add(f"{rng.choice(SITES)} {rng.choice(COMPLAINTS)}")
+        db[f"condition_{i:06d}"] = {
+            "name": f"Condition {i}",
+            "symptoms": sorted(symptoms),
+            "red_flags": rng.sample(SEVERE, rng.randint(1, 3)),
+            "recommended_tests": rng.sample(TESTS, 2),
+            "advice": rng.sample(ADVICE, 2),
+            "severity": rng.choice(["low", "moderate", "high"]),
+        }
+    return db
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diseases", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--base", default="data/diseases.json", help="real diseases kept at the start")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(generate_db(args.diseases, args.seed, base), f)
+    print(f"Wrote {args.diseases} diseases to {args.out}")
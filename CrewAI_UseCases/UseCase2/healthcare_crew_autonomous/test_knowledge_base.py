@@ -0,0 +1,33 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from agents.knowledge_base import KnowledgeBaseLoader
+
+DATA = Path(__file__).parent / "data"
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))  # a new mtime even on coarse clocks
+
+
+def test_reload_keeps_the_old_kb_on_bad_json(tmp_path):
+    shutil.copy(DATA / "diseases.json", tmp_path / "diseases.json")
+    shutil.copy(DATA / "synonyms.json", tmp_path / "synonyms.json")
+    source = tmp_path / "diseases.json"
+    loader = KnowledgeBaseLoader(str(source), check_interval=0)
+    old = loader.current
+    assert "angina" in old and loader.reload() is False
+
+    mtime_ns = source.stat().st_mtime_ns
+    write(source, '{"angina": {"symptoms": ["chest pa', mtime_ns + 10**9)  # caught mid-write
+    assert loader.reload() is False
+    assert loader.errors == 1 and loader.reloads == 0
+    assert loader.current is old and "angina" in loader.current
+
+    db = json.loads((DATA / "diseases.json").read_text(encoding="utf-8"))
+    db["new_disease"] = {"name": "New disease", "symptoms": ["itchy elbow"], "red_flags": []}
+    write(source, json.dumps(db), mtime_ns + 2 * 10**9)
+    assert loader.current is not old
+    assert loader.reloads == 1 and "new_disease" in loader.current
@@ -0,0 +1,30 @@
+import contextlib
+import io
+from pathlib import Path
+from agents.orchestrator import Orchestrator
+
+DB = str(Path(__file__).parent / "data" / "diseases.json")
+
+
+def triage(text, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Orchestrator(DB, **kwargs).receive({"symptoms_text": text})["triage_report"]
+
+
+def test_default_scoring_matches_whole_phrases():
+    # "back pain" shares only "pain" with Angina's "chest pain" red flag
+    report = triage("back pain")
+    assert not any(c["flags"] for c in report["candidates"])
+    assert not any("Red flag" in reason for reason in report["advisor_reasons"])
+
+
+def test_default_scoring_resolves_synonyms():
+    report = triage("passed out and sweaty")
+    angina = next(c for c in report["candidates"] if c["name"] == "Angina")
+    assert set(angina["flags"]) == {"fainting", "sweating"}
+    assert report["recommendations"][0].startswith("URGENT")
+
+
+def test_legacy_scoring_is_still_available():
+    report = triage("back pain", scoring="legacy")
+    assert "chest pain" in report["candidates"][0]["flags"]
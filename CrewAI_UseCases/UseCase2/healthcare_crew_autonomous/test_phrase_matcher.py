@@ -0,0 +1,48 @@
+from pathlib import Path
+from agents.phrase_matcher import PhraseMatcher, load_synonyms, normalize, phrase_key
+from agents.symptom_analyzer import load_db, score_disease
+from agents.symptom_index import SymptomIndex
+from bench_symptom_index import make_queries
+from generate_kb import generate_db
+
+DATA = Path(__file__).parent / "data"
+
+
+def test_overlapping_phrases_are_all_reported():
+    matcher = PhraseMatcher(["severe shortness of breath", "shortness of breath", "breath"])
+    hits = matcher.find("Severe shortness of breath since noon")
+    assert sorted(hit.phrase for hit in hits) == ["breath", "severe shortness of breath", "shortness of breath"]
+    assert {hit.text for hit in hits} == {"Severe shortness of breath", "shortness of breath", "breath"}
+
+
+def test_synonyms_report_their_canonical_phrase():
+    synonyms = load_synonyms(str(DATA / "synonyms.json"))
+    matcher = PhraseMatcher(["shortness of breath", "chest pain"], synonyms)
+    assert matcher.phrases_in("I can't catch my breath, I'm breathless and my chest hurts") == \
+           ["shortness of breath", "chest pain"]
+    # Variants of phrases the matcher was not built with are ignored
+    assert matcher.phrases_in("I fainted") == []
+
+
+def test_normalization_and_plurals():
+    assert normalize("Short-of-Breath, coughs") == ["short", "of", "breath", "cough"]
+    assert phrase_key("  Swollen   Lymph-Nodes ") == "swollen lymph node"
+    matcher = PhraseMatcher([phrase_key("swollen lymph nodes")])
+    assert matcher.phrases_in("a swollen lymph node on the left") == ["swollen lymph node"]
+
+
+def test_phrase_index_matches_score_disease():
+    db = generate_db(1000, 7, load_db(str(DATA / "diseases.json")))
+    index = SymptomIndex(db, "phrase")
+    matcher = index.kb.phrase_matcher
+    for tokens in make_queries(100, 3):
+        phrases = matcher.phrases_in(" ".join(tokens))
+        expected = {}
+        for key, disease in db.items():
+            score, flags = score_disease(tokens, disease, phrases)
+            if score > 0:
+                expected[key] = (round(score, 3), flags)
+        candidates, found = index.search(tokens, phrases=phrases)
+        assert found == len(expected)
+        assert [c["score"] for c in candidates] == sorted((s for s, _ in expected.values()), reverse=True)[:5]
+        assert all(expected[c["id"]] == (c["score"], c["flags"]) for c in candidates)
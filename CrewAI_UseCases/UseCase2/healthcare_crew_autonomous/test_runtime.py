@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import pytest
+from agents.base_agent import BaseAgent
+from agents.runtime import AgentRuntime, percentile
+
+
+class Echo(BaseAgent):
+    def __init__(self, gate=None):
+        super().__init__(name="Echo", role="Echoes its message")
+        self.gate = gate
+        self.handled = 0
+
+    def receive(self, message):
+        if message.get("fail"):
+            raise ValueError("bad message")
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.handled += 1
+        return {"echo": message["n"], "agent": id(self)}
+
+
+def test_responses_carry_their_correlation_id():
+    async def run():
+        runtime = AgentRuntime()
+        runtime.spawn("echo", Echo, instances=2, backend="thread")
+        await runtime.ready()
+        responses = await asyncio.gather(*(runtime.ask("echo", {"n": n}, correlation_id=f"s{n}") for n in range(20)))
+        fresh = await runtime.ask("echo", {"n": 20})
+        await runtime.close()
+        return responses, fresh
+
+    responses, fresh = asyncio.run(run())
+    assert [(r["echo"], r["correlation_id"]) for r in responses] == [(n, f"s{n}") for n in range(20)]
+    assert fresh["echo"] == 20 and fresh["correlation_id"]
+
+
+def test_ask_routes_to_the_least_loaded_instance():
+    gate = threading.Event()
+
+    async def run():
+        runtime = AgentRuntime()
+        actors = runtime.spawn("echo", Echo, gate, instances=2, backend="thread")
+        await runtime.ready()
+        first = asyncio.ensure_future(runtime.ask("echo", {"n": 0}))
+        await asyncio.sleep(0.05)  # the first instance is now blocked on the gate
+        second = asyncio.ensure_future(runtime.ask("echo", {"n": 1}))
+        await asyncio.sleep(0.05)
+        gate.set()
+        responses = await asyncio.gather(first, second)
+        await runtime.close()
+        return actors, responses
+
+    actors, responses = asyncio.run(run())
+    assert [r["agent"] for r in responses] == [id(actor.agent) for actor in actors]
+    assert [actor.agent.handled for actor in actors] == [1, 1]
+
+
+def test_agent_errors_reach_the_asker_and_stats():
+    async def run():
+        runtime = AgentRuntime()
+        runtime.spawn("echo", Echo)
+        with pytest.raises(ValueError, match="bad message"):
+            await runtime.ask("echo", {"fail": True})
+        await runtime.ask("echo", {"n": 1})
+        stats = runtime.stats()["echo"]
+        await runtime.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["handled"] == 2 and stats["errors"] == 1
+    assert stats["backend"] == "inline" and stats["instances"] == 1 and stats["queued"] == 0
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([float(n) for n in range(100)], 99) == 99.0
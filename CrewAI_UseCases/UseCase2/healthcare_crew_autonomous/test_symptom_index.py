@@ -0,0 +1,38 @@
+from pathlib import Path
+from agents.symptom_analyzer import load_db, score_disease
+from agents.knowledge_base import KnowledgeBase
+from agents import symptom_index
+from agents.symptom_index import SCORING_MODES, SymptomIndex
+from bench_symptom_index import linear_scan, make_queries
+from generate_kb import generate_db
+
+BASE = load_db(str(Path(__file__).parent / "data" / "diseases.json"))
+
+
+def test_legacy_index_matches_score_disease():
+    db = generate_db(2000, 7, BASE)
+    index = SymptomIndex(db, "legacy")
+    for tokens in make_queries(200, 3):
+        candidates, found = index.search(tokens)
+        assert [(c["id"], c["score"], c["flags"]) for c in candidates] == \
+               [(e["id"], e["score"], e["flags"]) for e in linear_scan(db, tokens)]
+        assert found == sum(score_disease(tokens, disease)[0] > 0 for disease in db.values())
+
+
+def test_scores_stay_in_range_in_every_mode():
+    db = generate_db(500, 7, BASE)
+    for scoring in ("legacy", "bm25"):
+        index = SymptomIndex(db, scoring)
+        for tokens in make_queries(50, 5):
+            assert all(0 < c["score"] <= 1.0 for c in index.search(tokens)[0])
+
+
+def test_search_batch_matches_search_in_every_mode(monkeypatch):
+    kb = KnowledgeBase.from_dict(generate_db(500, 7, BASE))
+    queries = make_queries(60, 11) + [[], ["unknownword"]]
+    phrases = [kb.phrase_matcher.phrases_in(" ".join(tokens)) for tokens in queries]
+    monkeypatch.setattr(symptom_index, "BATCH_CELLS", 500 * 16)  # several blocks
+    for scoring in SCORING_MODES:
+        index = SymptomIndex(kb, scoring)
+        assert index.search_batch(queries, phrases=phrases) == \
+               [index.search(tokens, phrases=p) for tokens, p in zip(queries, phrases)]
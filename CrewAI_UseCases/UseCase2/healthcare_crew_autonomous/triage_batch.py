@@ -0,0 +1,90 @@
+"""
+Re-triage a JSONL file of intake notes, streaming JSONL reports out.
+
+Each input line is a JSON object whose ``symptoms_text`` (see --text-field)
+is triaged; its ``id`` (see --id-field) is copied to the report. Lines are
+read and written ``--batch-size`` at a time through
+``Orchestrator.receive_batch``, so files larger than memory stream through
+in constant memory. Unreadable lines produce ``{"line": n, "error": ...}``:
+
+    python triage_batch.py notes.jsonl --out reports.jsonl
+    cat notes.jsonl | python triage_batch.py - > reports.jsonl
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from typing import Any, Dict, Iterator, List, TextIO, Tuple
+from agents.orchestrator import Orchestrator
+from agents.symptom_index import SCORING_MODES, TRIAGE_SCORING
+
+
+def read_batches(lines: TextIO, batch_size: int) -> Iterator[List[Tuple[int, str]]]:
+    batch = []
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            batch.append((number, line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def triage_batch(orchestrator: Orchestrator, batch: List[Tuple[int, str]], text_field: str,
+                 id_field: str) -> List[Dict[str, Any]]:
+    """Reports for one batch of (line number, raw line), in input order."""
+    out: List[Dict[str, Any]] = [None] * len(batch)
+    messages, slots = [], []
+    for i, (number, line) in enumerate(batch):
+        try:
+            note = json.loads(line)
+            text = note[text_field]
+            if not isinstance(text, str):
+                raise TypeError(f"{text_field} is not a string")
+        except (ValueError, KeyError, TypeError) as e:
+            out[i] = {"line": number, "error": f"{type(e).__name__}: {e}"}
+            continue
+        messages.append({"symptoms_text": text, id_field: note.get(id_field)})
+        slots.append(i)
+    for i, message, response in zip(slots, messages, orchestrator.receive_batch(messages)):
+        out[i] = {id_field: message[id_field], **response["triage_report"]}
+    return out
+
+
+def main(args):
+    started = time.monotonic()
+    notes = errors = 0
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        # Keep agent prints (e.g. KB reloads) out of a report stream on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            orchestrator = Orchestrator(args.db, scoring=args.scoring)
+            for batch in read_batches(source, args.batch_size):
+                for report in triage_batch(orchestrator, batch, args.text_field, args.id_field):
+                    sink.write(json.dumps(report) + "\n")
+                    errors += "error" in report
+                sink.flush()
+                notes += len(batch)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    elapsed = time.monotonic() - started
+    print(f"Triaged {notes - errors} notes ({errors} errors) in {elapsed:.1f}s "
+          f"({notes / elapsed if elapsed else 0:.0f} notes/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL intake notes, or - for stdin")
+    parser.add_argument("--out", default="-", help="JSONL reports, or - for stdout (default)")
+    parser.add_argument("--db", default="data/diseases.json")
+    parser.add_argument("--scoring", choices=SCORING_MODES, default=TRIAGE_SCORING)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--text-field", default="symptoms_text")
+    parser.add_argument("--id-field", default="id")
+    main(parser.parse_args())